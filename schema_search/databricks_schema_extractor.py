@@ -1,5 +1,5 @@
 import logging
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional
 from sqlalchemy.engine import Engine
 from sqlalchemy import text
 
@@ -50,6 +50,19 @@ class DatabricksSchemaExtractor:
 
         return schemas
 
+    def fingerprint(self) -> Optional[str]:
+        # last_altered moves on any DDL change, and the count catches dropped tables
+        query = text("""
+            SELECT COUNT(*), MAX(last_altered)
+            FROM system.information_schema.tables
+            WHERE table_catalog = :catalog
+            AND table_schema NOT IN ('information_schema', 'sys')
+        """)
+
+        with self.engine.connect() as conn:
+            row = conn.execute(query, {"catalog": self.catalog}).one()
+        return f"{row[0]}:{row[1]}"
+
     def _get_tables(self) -> List[tuple]:
         query = text(f"""
             SELECT table_name, table_schema, table_type
@@ -1,5 +1,17 @@
 from schema_search.embedding_cache.base import BaseEmbeddingCache
 from schema_search.embedding_cache.inmemory import InMemoryEmbeddingCache
-from schema_search.embedding_cache.factory import create_embedding_cache
+from schema_search.embedding_cache.vectordb import VectorDBEmbeddingCache
+from schema_search.embedding_cache.store import EmbeddingStore
+from schema_search.embedding_cache.factory import (
+    create_embedding_cache,
+    prune_embedding_store,
+)
 
-__all__ = ["BaseEmbeddingCache", "InMemoryEmbeddingCache", "create_embedding_cache"]
+__all__ = [
+    "BaseEmbeddingCache",
+    "InMemoryEmbeddingCache",
+    "VectorDBEmbeddingCache",
+    "EmbeddingStore",
+    "create_embedding_cache",
+    "prune_embedding_store",
+]
@@ -1,10 +1,25 @@
+import logging
+import threading
 from abc import ABC, abstractmethod
 from pathlib import Path
-from typing import Dict, List
+from typing import Dict, List, Optional, Tuple, TYPE_CHECKING
 
 import numpy as np
 
 from schema_search.chunkers import Chunk
+from schema_search.embedding_cache.store import EmbeddingStore
+from schema_search.metrics import get_metric
+from schema_search.utils.hashing import content_hash
+from schema_search.utils.lazy_import import lazy_import_check
+from schema_search.utils.lru_cache import LRUCache
+
+if TYPE_CHECKING:
+    from sentence_transformers import SentenceTransformer
+
+logger = logging.getLogger(__name__)
+
+# Queries scored per matrix product in top_k_many; bounds the score matrix
+QUERY_BLOCK_ROWS = 64
 
 
 class BaseEmbeddingCache(ABC):
@@ -15,15 +30,22 @@ class BaseEmbeddingCache(ABC):
         metric: str,
         batch_size: int,
         show_progress: bool,
+        store: Optional[EmbeddingStore] = None,
+        query_cache_size: int = 0,
+        query_store: Optional[EmbeddingStore] = None,
     ):
         self.cache_dir = cache_dir
         self.cache_dir.mkdir(exist_ok=True)
         self.model_name = model_name
-        self.model = None
+        self.model: Optional["SentenceTransformer"] = None
         self.metric = metric
         self.batch_size = batch_size
         self.show_progress = show_progress
+        self.store = store
+        self.query_cache = LRUCache(maxsize=query_cache_size)
+        self.query_store = query_store
         self.embeddings = None
+        self._model_lock = threading.Lock()
 
     @abstractmethod
     def load_or_generate(
@@ -31,10 +53,158 @@ class BaseEmbeddingCache(ABC):
     ) -> None:
         pass
 
-    @abstractmethod
-    def encode_query(self, query: str) -> np.ndarray:
-        pass
-
     @abstractmethod
     def compute_similarities(self, query_embedding: np.ndarray) -> np.ndarray:
         pass
+
+    def compute_similarities_many(self, query_embeddings: np.ndarray) -> np.ndarray:
+        """Scores of every row for each query, shaped (num_queries, num_rows)."""
+        return np.stack(
+            [self.compute_similarities(q[None, :]) for q in query_embeddings]
+        )
+
+    def is_loaded(self) -> bool:
+        return self.embeddings is not None
+
+    def top_k(
+        self, query_embedding: np.ndarray, k: int
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        scores = self.compute_similarities(query_embedding)
+        indices = scores.argsort()[::-1][:k]
+        return indices, scores[indices]
+
+    def top_k_many(
+        self, query_embeddings: np.ndarray, k: int
+    ) -> List[Tuple[np.ndarray, np.ndarray]]:
+        if self.approximate:
+            return [self.top_k(q[None, :], k) for q in query_embeddings]
+
+        results = []
+        for start in range(0, len(query_embeddings), QUERY_BLOCK_ROWS):
+            block = query_embeddings[start : start + QUERY_BLOCK_ROWS]
+            for scores in self.compute_similarities_many(block):
+                indices = scores.argsort()[::-1][:k]
+                results.append((indices, scores[indices]))
+        return results
+
+    @property
+    def approximate(self) -> bool:
+        """Whether top_k may miss rows that an exhaustive scan would return."""
+        return False
+
+    def score_rows(
+        self, query_embedding: np.ndarray, indices: np.ndarray
+    ) -> np.ndarray:
+        return self.compute_similarities(query_embedding)[indices]
+
+    def _resolve_vectors(
+        self, vectors: Dict[str, np.ndarray], texts: Dict[str, str], force: bool
+    ) -> None:
+        """Fill `vectors` for every hash in `texts`, from the store or the model."""
+        if not force and self.store is not None:
+            wanted = [h for h in texts if h not in vectors]
+            vectors.update(self.store.get_many(self.model_name, wanted))
+
+        missing = {h: text for h, text in texts.items() if h not in vectors}
+        logger.info(
+            f"Embedding {len(missing)} new chunk texts "
+            f"({len(texts) - len(missing)} of {len(texts)} reused)"
+        )
+        if not missing:
+            return
+
+        encoded = self._encode(list(missing.values()))
+        vectors.update(zip(missing.keys(), encoded))
+        if self.store is not None:
+            self.store.put_many(self.model_name, list(missing.keys()), encoded)
+
+    def _encode(self, texts: List[str]) -> np.ndarray:
+        self._load_model()
+
+        assert self.model is not None
+        return self.model.encode(
+            texts,
+            batch_size=self.batch_size,
+            normalize_embeddings=True,
+            show_progress_bar=self.show_progress,
+        )
+
+    def _load_model(self) -> None:
+        if self.model is not None:
+            return
+
+        with self._model_lock:
+            if self.model is not None:
+                return
+
+            sentence_transformers = lazy_import_check(
+                "sentence_transformers",
+                "semantic",
+                "semantic/hybrid search or reranking",
+            )
+            logging.getLogger("sentence_transformers").setLevel(logging.WARNING)
+            self.model = sentence_transformers.SentenceTransformer(self.model_name)
+            logger.info(f"Loaded embedding model: {self.model_name}")
+
+    def encode_query(self, query: str) -> np.ndarray:
+        return self.encode_queries([query])
+
+    def encode_queries(self, queries: List[str]) -> np.ndarray:
+        """Embed queries, hitting the caches first and the model once for the rest."""
+        keys = [content_hash(query) for query in queries]
+        found: Dict[str, np.ndarray] = {}
+        for key in keys:
+            query_emb = self.query_cache.get(key)
+            if query_emb is not None:
+                found[key] = query_emb
+
+        missing = {key: query for key, query in zip(keys, queries) if key not in found}
+        if missing and self.query_store is not None:
+            stored = self.query_store.get_many(self.model_name, list(missing))
+            for key, vector in stored.items():
+                found[key] = vector[None, :]
+                self.query_cache.put(key, found[key])
+                del missing[key]
+
+        if missing:
+            self._load_model()
+
+            assert self.model is not None
+            encoded = self.model.encode(
+                list(missing.values()),
+                batch_size=self.batch_size,
+                normalize_embeddings=True,
+            )
+            for key, vector in zip(missing, encoded):
+                query_emb = vector[None, :]
+                # Cached arrays are shared between callers
+                query_emb.setflags(write=False)
+                found[key] = query_emb
+                self.query_cache.put(key, query_emb)
+            if self.query_store is not None:
+                self.query_store.put_many(self.model_name, list(missing), encoded)
+
+        if len(keys) == 1:
+            return found[keys[0]]
+        return np.concatenate([found[key] for key in keys])
+
+    def _score(
+        self, embeddings: np.ndarray, query_embedding: np.ndarray
+    ) -> np.ndarray:
+        return self._score_many(embeddings, query_embedding)[0]
+
+    def _score_many(
+        self, embeddings: np.ndarray, query_embeddings: np.ndarray
+    ) -> np.ndarray:
+        if self.metric == "cosine":
+            # Stored rows are unit-normalized at encode time, so a plain matmul
+            # over the mapped array avoids copying the matrix per query
+            return self._unit(query_embeddings) @ embeddings.T
+
+        metric_fn = get_metric(self.metric)
+        return metric_fn(embeddings, query_embeddings).T
+
+    def _unit(self, query_embedding: np.ndarray) -> np.ndarray:
+        return query_embedding / (
+            np.linalg.norm(query_embedding, axis=-1, keepdims=True) + 1e-8
+        )
@@ -1,13 +1,25 @@
-from typing import List
+from pathlib import Path
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+import json
 import re
+import shutil
+import tempfile
 import logging
 import numpy as np
 
 import bm25s
 
 from schema_search.chunkers import Chunk
+from schema_search.utils.hashing import content_hash
 
 logging.getLogger("bm25s").setLevel(logging.WARNING)
+logger = logging.getLogger(__name__)
+
+INDEX_DIR = "bm25"
+MANIFEST_FILE = "bm25_index.json"
+# Bump when _tokenize changes, so persisted vocabularies are rebuilt
+TOKENIZER_VERSION = 1
 
 
 def light_stem(token: str) -> str:
@@ -45,19 +57,218 @@ def _tokenize(text: str) -> List[str]:
 
 
 class BM25Cache:
-    def __init__(self):
+    def __init__(self, cache_dir: Optional[Path] = None):
+        self.cache_dir = cache_dir
         self.bm25 = None
         self.tokenized_docs = None
+        self.contents = None
+
+    def load_or_build(self, chunks: List[Chunk]) -> None:
+        chunks_digest = content_hash(
+            "\n".join(content_hash(chunk.content) for chunk in chunks)
+        )
+        if self.cache_dir is not None and self._load(chunks_digest):
+            return
+
+        logger.info("Building BM25 index")
+        self.build(chunks)
+        if self.cache_dir is not None:
+            self._save(chunks_digest)
+
+    def _load(self, chunks_digest: str) -> bool:
+        assert self.cache_dir is not None
+        manifest_file = self.cache_dir / INDEX_DIR / MANIFEST_FILE
+        if not manifest_file.exists():
+            return False
+
+        with open(manifest_file) as f:
+            manifest = json.load(f)
+        if manifest != self._manifest(chunks_digest):
+            logger.debug("BM25 index invalidated: chunks or tokenizer changed")
+            return False
+
+        logger.info("Loading BM25 index from cache")
+        self.bm25 = bm25s.BM25.load(
+            str(self.cache_dir / INDEX_DIR), mmap=True, show_progress=False
+        )
+        # Token lists are only kept for indexes built in this process
+        self.tokenized_docs = None
+        self.contents = None
+        return True
+
+    def _save(self, chunks_digest: str) -> None:
+        assert self.cache_dir is not None and self.bm25 is not None
+        index_dir = self.cache_dir / INDEX_DIR
+        # Unique per writer: workers starting cold all build and save at once
+        tmp_dir = Path(tempfile.mkdtemp(prefix=f"{INDEX_DIR}.", dir=self.cache_dir))
+
+        self.bm25.save(str(tmp_dir), show_progress=False)
+        with open(tmp_dir / MANIFEST_FILE, "w") as f:
+            json.dump(self._manifest(chunks_digest), f)
+
+        # Swap whole directories so readers never see a mixed index
+        old_dir = tmp_dir.with_name(f"{tmp_dir.name}.old")
+        try:
+            index_dir.rename(old_dir)
+        except FileNotFoundError:
+            pass
+        try:
+            tmp_dir.rename(index_dir)
+        except OSError:
+            # Another writer's index landed first; serve that one instead
+            logger.debug("BM25 index saved concurrently by another process")
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            self._load(chunks_digest)
+        shutil.rmtree(old_dir, ignore_errors=True)
+
+    def _manifest(self, chunks_digest: str) -> Dict:
+        return {
+            "chunks_digest": chunks_digest,
+            "tokenizer_version": TOKENIZER_VERSION,
+        }
 
     def build(self, chunks: List[Chunk]) -> None:
-        if self.bm25 is None:
-            self.tokenized_docs = [_tokenize(chunk.content) for chunk in chunks]
-            self.bm25 = bm25s.BM25()
-            self.bm25.index(self.tokenized_docs)
+        # On rebuild, only chunks whose text changed are tokenized again
+        previous: Dict[str, List[str]] = {}
+        if self.contents is not None and self.tokenized_docs is not None:
+            previous = dict(zip(self.contents, self.tokenized_docs))
+
+        self.contents = [chunk.content for chunk in chunks]
+        self.tokenized_docs = [
+            previous[content] if content in previous else _tokenize(content)
+            for content in self.contents
+        ]
+        self.bm25 = bm25s.BM25()
+        self.bm25.index(self.tokenized_docs, show_progress=False)
 
     def get_scores(self, query: str) -> np.ndarray:
-        if self.bm25 is None or self.tokenized_docs is None:
+        if self.bm25 is None:
             raise RuntimeError("BM25 cache not built. Call build() first.")
         query_tokens = _tokenize(query)
         scores = self.bm25.get_scores(query_tokens)
         return scores
+
+    def get_scores_many(self, queries: List[str]) -> np.ndarray:
+        """Scores of every chunk for each query, shaped (num_queries, num_chunks).
+
+        Each query's posting lists are added straight into its row of the
+        term-major score matrix, skipping the per-query setup of get_scores.
+        """
+        if self._has_nonoccurrence():
+            return np.stack([self.get_scores(query) for query in queries])
+
+        data = self.bm25.scores["data"]
+        indices = self.bm25.scores["indices"]
+        indptr = self.bm25.scores["indptr"]
+        scores = np.zeros((len(queries), self.bm25.scores["num_docs"]), np.float32)
+        for row, query in zip(scores, queries):
+            for term_id, count in self._term_counts(query).items():
+                start, end = indptr[term_id], indptr[term_id + 1]
+                # A posting list names each chunk once, so fancy += is exact
+                row[indices[start:end]] += data[start:end] * np.float32(count)
+        return scores
+
+    def top_k(self, query: str, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Best k matching chunks, without a dense score for every chunk.
+
+        Term-at-a-time MaxScore: terms are visited by decreasing score upper
+        bound. Once the bounds of the unvisited terms cannot lift an unseen
+        chunk past the current k-th score, the remaining terms only update
+        surviving candidates, found by binary search in their sorted postings.
+        Chunks matching no query term are not returned.
+        """
+        postings = self._postings(query)
+        if postings is None:
+            scores = self.get_scores(query)
+            top_indices = scores.argsort()[::-1][:k]
+            return top_indices, scores[top_indices]
+
+        remaining_bounds = np.cumsum([bound for _, _, bound in postings][::-1])[::-1]
+        docs = np.zeros(0, dtype=np.int64)
+        scores = np.zeros(0, dtype=np.float32)
+        threshold = -np.inf
+
+        for i, (term_docs, term_scores, _) in enumerate(postings):
+            if len(docs) >= k and remaining_bounds[i] < threshold:
+                alive = scores + remaining_bounds[i] >= threshold
+                docs, scores = docs[alive], scores[alive]
+                for later_docs, later_scores, _ in postings[i:]:
+                    positions = np.searchsorted(later_docs, docs)
+                    positions[positions == len(later_docs)] = 0
+                    hit = later_docs[positions] == docs
+                    scores[hit] += later_scores[positions[hit]]
+                break
+
+            if len(docs) == 0:
+                docs, scores = term_docs, term_scores.copy()
+            else:
+                docs, inverse = np.unique(
+                    np.concatenate([docs, term_docs]), return_inverse=True
+                )
+                scores = np.bincount(
+                    inverse, weights=np.concatenate([scores, term_scores])
+                ).astype(np.float32)
+            if len(scores) >= k:
+                threshold = np.partition(scores, len(scores) - k)[len(scores) - k]
+
+        order = scores.argsort()[::-1][:k]
+        return docs[order], scores[order]
+
+    def top_k_many(
+        self, queries: List[str], k: int
+    ) -> List[Tuple[np.ndarray, np.ndarray]]:
+        """top_k for each query; repeated queries in the batch are scored once.
+
+        Pruned retrieval is per query by nature, so there is no shared scoring
+        pass; the postings it reads are the same for every query of a batch.
+        """
+        rankings = {query: self.top_k(query, k) for query in dict.fromkeys(queries)}
+        return [rankings[query] for query in queries]
+
+    def score_rows(self, query: str, indices: np.ndarray) -> np.ndarray:
+        postings = self._postings(query)
+        if postings is None:
+            return self.get_scores(query)[indices]
+
+        indices = np.asarray(indices, dtype=np.int64)
+        scores = np.zeros(len(indices), dtype=np.float32)
+        for term_docs, term_scores, _ in postings:
+            positions = np.searchsorted(term_docs, indices)
+            positions[positions == len(term_docs)] = 0
+            hit = term_docs[positions] == indices
+            scores[hit] += term_scores[positions[hit]]
+        return scores
+
+    def _postings(
+        self, query: str
+    ) -> Optional[List[Tuple[np.ndarray, np.ndarray, float]]]:
+        """Per query term: sorted chunk ids, their scores and the score bound."""
+        if self._has_nonoccurrence():
+            return None
+
+        data = self.bm25.scores["data"]
+        indices = self.bm25.scores["indices"]
+        indptr = self.bm25.scores["indptr"]
+
+        postings = []
+        for term_id, count in self._term_counts(query).items():
+            start, end = indptr[term_id], indptr[term_id + 1]
+            if start == end:
+                continue
+            term_docs = np.asarray(indices[start:end], dtype=np.int64)
+            # Repeated query tokens add their contribution once per repeat
+            term_scores = np.asarray(data[start:end], dtype=np.float32) * count
+            postings.append((term_docs, term_scores, float(term_scores.max())))
+        postings.sort(key=lambda posting: posting[2], reverse=True)
+        return postings
+
+    def _has_nonoccurrence(self) -> bool:
+        if self.bm25 is None:
+            raise RuntimeError("BM25 cache not built. Call build() first.")
+        # Variants with a non-occurrence score have no sparse form
+        return getattr(self.bm25, "nonoccurrence_array", None) is not None
+
+    def _term_counts(self, query: str) -> Counter:
+        """Vocabulary ids of the query's tokens, with repeats counted."""
+        vocab = self.bm25.vocab_dict
+        return Counter(vocab[t] for t in _tokenize(query) if t in vocab)
@@ -3,11 +3,41 @@ from typing import Dict
 
 from schema_search.embedding_cache.base import BaseEmbeddingCache
 from schema_search.embedding_cache.inmemory import InMemoryEmbeddingCache
+from schema_search.embedding_cache.store import EmbeddingStore
+from schema_search.embedding_cache.vectordb import VectorDBEmbeddingCache
+from schema_search.vector_index import create_vector_index
+
+
+def prune_embedding_store(config: Dict) -> int:
+    """Drop shared-store vectors that no database cache under cache_dir uses."""
+    cache_root = Path(config["embedding"]["cache_dir"])
+    store_dir = cache_root / "embedding_store"
+    if not store_dir.exists():
+        return 0
+
+    referenced = set()
+    for cache_dir in cache_root.iterdir():
+        if cache_dir.is_dir():
+            referenced |= InMemoryEmbeddingCache.referenced_hashes(cache_dir)
+            referenced |= VectorDBEmbeddingCache.referenced_hashes(cache_dir)
+    return EmbeddingStore(store_dir).prune(referenced)
 
 
 def create_embedding_cache(config: Dict, cache_dir: Path) -> BaseEmbeddingCache:
     location = config["embedding"]["location"]
 
+    store = None
+    if config["embedding"].get("shared_store", True):
+        store_dir = Path(config["embedding"]["cache_dir"]) / "embedding_store"
+        store = EmbeddingStore(store_dir)
+
+    # Query vectors live apart from chunk vectors so either can be cleared alone
+    query_store = None
+    if config["embedding"].get("query_disk_cache", False):
+        query_store_dir = Path(config["embedding"]["cache_dir"]) / "query_store"
+        query_store = EmbeddingStore(query_store_dir)
+    query_cache_size = config["embedding"].get("query_cache_size", 1024)
+
     if location == "memory":
         return InMemoryEmbeddingCache(
             cache_dir=cache_dir,
@@ -15,6 +45,29 @@ def create_embedding_cache(config: Dict, cache_dir: Path) -> BaseEmbeddingCache:
             metric=config["embedding"]["metric"],
             batch_size=config["embedding"]["batch_size"],
             show_progress=config["embedding"]["show_progress"],
+            store=store,
+            query_cache_size=query_cache_size,
+            query_store=query_store,
+            precision=config["embedding"].get("precision", "float32"),
+            rescore_top_k=(
+                config["search"]["initial_top_k"]
+                if config["embedding"].get("rescore", True)
+                else 0
+            ),
+            binary_prefilter=config["embedding"].get("binary_prefilter", False),
+            binary_oversample=config["embedding"].get("binary_oversample", 10),
+            index=create_vector_index(config),
+        )
+    elif location == "vectordb":
+        return VectorDBEmbeddingCache(
+            cache_dir=cache_dir,
+            model_name=config["embedding"]["model"],
+            metric=config["embedding"]["metric"],
+            batch_size=config["embedding"]["batch_size"],
+            show_progress=config["embedding"]["show_progress"],
+            store=store,
+            query_cache_size=query_cache_size,
+            query_store=query_store,
         )
     else:
         raise ValueError(f"Unsupported embedding location: {location}")
@@ -1,20 +1,37 @@
 import json
 import logging
 from pathlib import Path
-from typing import Dict, List, Optional, TYPE_CHECKING
+from typing import Dict, List, Optional, Set, Tuple
 
 import numpy as np
 
 from schema_search.chunkers import Chunk
 from schema_search.embedding_cache.base import BaseEmbeddingCache
-from schema_search.metrics import get_metric
-from schema_search.utils.lazy_import import lazy_import_check
-
-if TYPE_CHECKING:
-    from sentence_transformers import SentenceTransformer
+from schema_search.embedding_cache.store import EmbeddingStore
+from schema_search.metrics import hamming_distance, pack_signs
+from schema_search.utils.atomic import atomic_write
+from schema_search.utils.hashing import content_hash
+from schema_search.vector_index import BaseVectorIndex
 
 logger = logging.getLogger(__name__)
 
+FORMAT_VERSION = 1
+MANIFEST_FILE = "embeddings.json"
+EMBEDDINGS_FILE = "embeddings.npy"
+HASHES_FILE = "embedding_hashes.npy"
+SCALE_FILE = "embedding_scale.npy"
+BINARY_FILE = "embeddings.binary.npy"
+
+PRECISIONS = ("float32", "float16", "int8")
+# Rows scored per step on compact matrices; small blocks keep the float32
+# scratch copy in CPU cache
+SCORE_BLOCK_ROWS = 2048
+# Exact rescoring covers this many times rescore_top_k approximate candidates,
+# so rows just below the approximate cut can still make the final top-k
+RESCORE_OVERSAMPLE = 2
+# Rows per step of the Hamming scan, bounding the XOR scratch buffers
+HAMMING_BLOCK_ROWS = 65536
+
 
 class InMemoryEmbeddingCache(BaseEmbeddingCache):
     def __init__(
@@ -24,99 +41,320 @@ class InMemoryEmbeddingCache(BaseEmbeddingCache):
         metric: str,
         batch_size: int,
         show_progress: bool,
+        store: Optional[EmbeddingStore] = None,
+        query_cache_size: int = 0,
+        query_store: Optional[EmbeddingStore] = None,
+        precision: str = "float32",
+        rescore_top_k: int = 0,
+        binary_prefilter: bool = False,
+        binary_oversample: int = 10,
+        index: Optional[BaseVectorIndex] = None,
     ):
-        super().__init__(cache_dir, model_name, metric, batch_size, show_progress)
-        self.model: Optional["SentenceTransformer"] = None
+        super().__init__(
+            cache_dir,
+            model_name,
+            metric,
+            batch_size,
+            show_progress,
+            store,
+            query_cache_size,
+            query_store,
+        )
+        if precision not in PRECISIONS:
+            raise ValueError(
+                f"Unknown embedding precision: {precision}. "
+                f"Available: {list(PRECISIONS)}"
+            )
+        self.chunk_hashes: Optional[List[str]] = None
+        self.chunks_digest: Optional[str] = None
+        self.precision = precision
+        self.rescore_top_k = rescore_top_k
+        self.quantized: Optional[np.ndarray] = None
+        self.scale: Optional[np.ndarray] = None
+        self.binary_prefilter = binary_prefilter
+        self.binary_oversample = binary_oversample
+        self.binary: Optional[np.ndarray] = None
+        self.index = index
+        self.index_loaded = False
 
     def load_or_generate(
         self, chunks: List[Chunk], force: bool, chunking_config: Dict
     ) -> None:
-        cache_file = self.cache_dir / "embeddings.npz"
-        config_file = self.cache_dir / "cache_config.json"
+        chunk_hashes = [content_hash(chunk.content) for chunk in chunks]
+        chunks_digest = content_hash("\n".join(chunk_hashes))
 
-        if not force and self._is_cache_valid(cache_file, config_file, chunking_config):
-            self._load_from_cache(cache_file)
-        else:
-            self._generate_and_cache(chunks, cache_file, config_file, chunking_config)
+        if not force and self.embeddings is None:
+            self._load_from_cache()
 
-    def _load_from_cache(self, cache_file: Path) -> None:
-        logger.info("Loading embeddings from cache")
-        self.embeddings = np.load(cache_file)["embeddings"]
+        if not force and self.chunks_digest == chunks_digest:
+            self.chunk_hashes = chunk_hashes
+            return
 
-    def _is_cache_valid(
-        self, cache_file: Path, config_file: Path, chunking_config: Dict
-    ) -> bool:
-        if not (cache_file.exists() and config_file.exists()):
-            return False
+        self._assemble_and_cache(chunks, chunk_hashes, force)
+        self._save(chunks_digest, chunking_config)
 
-        with open(config_file) as f:
-            cached_config = json.load(f)
+    def _load_from_cache(self) -> None:
+        manifest_file = self.cache_dir / MANIFEST_FILE
+        hashes_file = self.cache_dir / HASHES_FILE
+        if not manifest_file.exists() or not hashes_file.exists():
+            return
 
-        current_config = {
-            "strategy": chunking_config["strategy"],
-            "max_tokens": chunking_config["max_tokens"],
-            "embedding_model": self.model_name,
-        }
+        with open(manifest_file) as f:
+            manifest = json.load(f)
 
-        if cached_config != current_config:
-            logger.info("Cache invalidated: chunking config changed")
-            return False
+        if manifest.get("format_version") != FORMAT_VERSION:
+            logger.info("Cache invalidated: embedding cache format changed")
+            return
 
-        return True
+        # Rows are keyed by chunk content, so only the model can invalidate them
+        if manifest["model"] != self.model_name:
+            logger.info("Cache invalidated: embedding model changed")
+            return
 
-    def _generate_and_cache(
-        self,
-        chunks: List[Chunk],
-        cache_file: Path,
-        config_file: Path,
-        chunking_config: Dict,
+        logger.info("Memory-mapping embeddings from cache")
+        embeddings = self._map(self.cache_dir / EMBEDDINGS_FILE)
+
+        # The float32 rows stay mapped, so a storage change only re-derives
+        # the compact copies
+        compact_current = True
+        if manifest.get("precision", "float32") != self.precision:
+            logger.info("Cache invalidated: embedding precision changed")
+            compact_current = False
+        elif manifest.get("binary_prefilter", False) != self.binary_prefilter:
+            logger.info("Cache invalidated: binary prefilter setting changed")
+            compact_current = False
+        elif manifest.get("index") != self._index_params():
+            logger.info("Cache invalidated: vector index setting changed")
+            compact_current = False
+
+        if compact_current:
+            if self.precision != "float32":
+                self.quantized = self._map(self.cache_dir / self._quantized_file())
+            if self.precision == "int8":
+                self.scale = np.load(self.cache_dir / SCALE_FILE)
+            if self.binary_prefilter:
+                self.binary = self._map(self.cache_dir / BINARY_FILE)
+            if self.index is not None:
+                self.index.load(self.cache_dir, embeddings.shape[1])
+                self.index_loaded = True
+
+        # _save writes the hashes first and the manifest last, so reading the
+        # hashes after every other file exposes any file newer than the
+        # manifest, e.g. from a crashed or concurrent save
+        row_hashes = [h.decode() for h in np.load(hashes_file)]
+        if (
+            manifest.get("rows", len(row_hashes)) != len(row_hashes)
+            or len(embeddings) != len(row_hashes)
+            or content_hash("\n".join(row_hashes)) != manifest["chunks_digest"]
+        ):
+            logger.warning("Cache invalidated: cached files do not match manifest")
+            self.quantized = self.scale = self.binary = None
+            self.index_loaded = False
+            return
+
+        self.embeddings = embeddings
+        self.chunk_hashes = row_hashes
+        if compact_current:
+            self.chunks_digest = manifest["chunks_digest"]
+
+    @staticmethod
+    def referenced_hashes(cache_dir: Path) -> Set[Tuple[str, str]]:
+        """(model, chunk hash) pairs of the rows saved under `cache_dir`."""
+        manifest_file = cache_dir / MANIFEST_FILE
+        hashes_file = cache_dir / HASHES_FILE
+        if not manifest_file.exists() or not hashes_file.exists():
+            return set()
+
+        with open(manifest_file) as f:
+            model = json.load(f)["model"]
+        return {(model, h.decode()) for h in np.load(hashes_file)}
+
+    def _assemble_and_cache(
+        self, chunks: List[Chunk], chunk_hashes: List[str], force: bool
     ) -> None:
-        self._load_model()
+        vectors: Dict[str, np.ndarray] = {}
+        if not force and self.embeddings is not None:
+            assert self.chunk_hashes is not None
+            vectors.update(zip(self.chunk_hashes, self.embeddings))
 
-        logger.info(f"Generating embeddings for {len(chunks)} chunks")
-        texts = [chunk.content for chunk in chunks]
+        texts = {h: chunk.content for chunk, h in zip(chunks, chunk_hashes)}
+        self._resolve_vectors(vectors, texts, force)
 
-        assert self.model is not None
-        self.embeddings = self.model.encode(
-            texts,
-            batch_size=self.batch_size,
-            normalize_embeddings=True,
-            show_progress_bar=self.show_progress,
+        self.embeddings = (
+            np.stack([vectors[h] for h in chunk_hashes])
+            if chunk_hashes
+            else np.zeros((0, 0), dtype=np.float32)
         )
+        self.chunk_hashes = chunk_hashes
+
+    def _save(self, chunks_digest: str, chunking_config: Dict) -> None:
+        assert self.embeddings is not None and self.chunk_hashes is not None
+        embeddings = np.ascontiguousarray(self.embeddings, dtype=np.float32)
 
-        np.savez_compressed(cache_file, embeddings=self.embeddings)
+        # Write-then-rename so other workers never map a half-written file.
+        # Hashes go first and the manifest last; _load_from_cache relies on it
+        self._atomic_save(HASHES_FILE, np.array(self.chunk_hashes, dtype="S64"))
+        self._atomic_save(EMBEDDINGS_FILE, embeddings)
+        if self.precision != "float32":
+            quantized, scale = self._quantize(embeddings)
+            self._atomic_save(self._quantized_file(), quantized)
+            if scale is not None:
+                self._atomic_save(SCALE_FILE, scale)
+            self.scale = scale
+        if self.binary_prefilter:
+            self._atomic_save(BINARY_FILE, pack_signs(embeddings))
+        if self.index is not None:
+            self.index.build(embeddings)
+            self.index.save(self.cache_dir)
+            self.index_loaded = True
 
-        cache_config = {
-            "strategy": chunking_config["strategy"],
-            "max_tokens": chunking_config["max_tokens"],
-            "embedding_model": self.model_name,
+        manifest = {
+            "format_version": FORMAT_VERSION,
+            "model": self.model_name,
+            "precision": self.precision,
+            "binary_prefilter": self.binary_prefilter,
+            "index": self._index_params(),
+            "dtype": str(embeddings.dtype),
+            "shape": list(embeddings.shape),
+            "rows": len(self.chunk_hashes),
+            "chunks_digest": chunks_digest,
+            "chunking": {
+                "strategy": chunking_config["strategy"],
+                "max_tokens": chunking_config["max_tokens"],
+            },
         }
-        with open(config_file, "w") as f:
-            json.dump(cache_config, f, indent=2)
-
-    def _load_model(self) -> None:
-        if self.model is None:
-            sentence_transformers = lazy_import_check(
-                "sentence_transformers",
-                "semantic",
-                "semantic/hybrid search or reranking",
-            )
-            logging.getLogger("sentence_transformers").setLevel(logging.WARNING)
-            self.model = sentence_transformers.SentenceTransformer(self.model_name)
-            logger.info(f"Loaded embedding model: {self.model_name}")
-
-    def encode_query(self, query: str) -> np.ndarray:
-        self._load_model()
-
-        assert self.model is not None
-        query_emb = self.model.encode(
-            [query],
-            batch_size=self.batch_size,
-            normalize_embeddings=True,
-        )
+        with atomic_write(self.cache_dir / MANIFEST_FILE, "w") as f:
+            json.dump(manifest, f, indent=2)
+
+        # Serve from the page cache like a process that loaded the cache cold
+        self.embeddings = self._map(self.cache_dir / EMBEDDINGS_FILE)
+        if self.precision != "float32":
+            self.quantized = self._map(self.cache_dir / self._quantized_file())
+        if self.binary_prefilter:
+            self.binary = self._map(self.cache_dir / BINARY_FILE)
+        self.chunks_digest = chunks_digest
+
+    def _index_params(self) -> Optional[Dict]:
+        return self.index.params() if self.index is not None else None
+
+    def _quantized_file(self) -> str:
+        return f"embeddings.{self.precision}.npy"
+
+    def _quantize(
+        self, embeddings: np.ndarray
+    ) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+        if self.precision == "float16":
+            return embeddings.astype(np.float16), None
 
-        return query_emb
+        # Symmetric int8 with one scale per dimension: x ~= code * scale
+        scale = np.abs(embeddings).max(axis=0, initial=0.0) / 127
+        scale[scale == 0] = 1.0
+        codes = np.clip(np.rint(embeddings / scale), -127, 127).astype(np.int8)
+        return codes, scale.astype(np.float32)
+
+    def _atomic_save(self, file_name: str, array: np.ndarray) -> None:
+        with atomic_write(self.cache_dir / file_name) as f:
+            np.save(f, array)
+
+    def _map(self, path: Path) -> np.ndarray:
+        # mmap cannot map a zero-length data section
+        array = np.load(path, mmap_mode="r")
+        return array if array.size else np.asarray(array)
 
     def compute_similarities(self, query_embedding: np.ndarray) -> np.ndarray:
-        metric_fn = get_metric(self.metric)
-        return metric_fn(self.embeddings, query_embedding).flatten()
+        if self.quantized is None:
+            return self._score(self.embeddings, query_embedding)
+
+        scores = self._score_quantized(query_embedding)
+
+        # Exact float32 scores for the head of the ranking; only these rows of
+        # the mapped full-precision matrix are paged in
+        k = min(self.rescore_top_k * RESCORE_OVERSAMPLE, len(scores))
+        if k > 0:
+            top = np.sort(np.argpartition(-scores, k - 1)[:k])
+            scores[top] = self._score(self.embeddings[top], query_embedding)
+        return scores
+
+    def compute_similarities_many(self, query_embeddings: np.ndarray) -> np.ndarray:
+        if self.quantized is None and self.metric in ("cosine", "dot"):
+            # One matrix product for the whole batch instead of one per query
+            return self._score_many(self.embeddings, query_embeddings)
+        return super().compute_similarities_many(query_embeddings)
+
+    def top_k(
+        self, query_embedding: np.ndarray, k: int
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        if self.index_loaded:
+            assert self.index is not None
+            candidates = self.index.candidates(
+                query_embedding, k * RESCORE_OVERSAMPLE
+            )
+        elif self.binary is not None:
+            candidates = self._binary_candidates(
+                query_embedding, k * self.binary_oversample
+            )
+        else:
+            return super().top_k(query_embedding, k)
+
+        scores = self.score_rows(query_embedding, candidates)
+        order = scores.argsort()[::-1][:k]
+        return candidates[order], scores[order]
+
+    @property
+    def approximate(self) -> bool:
+        return self.index_loaded or self.binary is not None
+
+    def score_rows(
+        self, query_embedding: np.ndarray, indices: np.ndarray
+    ) -> np.ndarray:
+        # Exact scores from the mapped float32 rows; only these pages are read
+        return self._score(self.embeddings[indices], query_embedding)
+
+    def _binary_candidates(
+        self, query_embedding: np.ndarray, count: int
+    ) -> np.ndarray:
+        assert self.binary is not None
+        num_rows = self.binary.shape[1]
+        if count >= num_rows:
+            return np.arange(num_rows)
+
+        query_words = pack_signs(query_embedding)
+        distances = np.empty(num_rows, dtype=np.int32)
+        for start in range(0, num_rows, HAMMING_BLOCK_ROWS):
+            block = self.binary[:, start : start + HAMMING_BLOCK_ROWS]
+            distances[start : start + block.shape[1]] = hamming_distance(
+                block, query_words
+            )
+
+        # Sorted so the float32 gather walks the mapped file forwards
+        return np.sort(np.argpartition(distances, count - 1)[:count])
+
+    def _score_quantized(self, query_embedding: np.ndarray) -> np.ndarray:
+        assert self.quantized is not None
+
+        # For inner products the per-dimension scale folds into the query:
+        # (code * scale) . q == code . (scale * q)
+        folded = None
+        if self.metric in ("cosine", "dot"):
+            folded = (
+                self._unit(query_embedding)
+                if self.metric == "cosine"
+                else query_embedding
+            )
+            if self.scale is not None:
+                folded = folded * self.scale
+
+        num_rows = self.quantized.shape[0]
+        scores = np.empty(num_rows, dtype=np.float32)
+        for start in range(0, num_rows, SCORE_BLOCK_ROWS):
+            block = self.quantized[start : start + SCORE_BLOCK_ROWS].astype(
+                np.float32
+            )
+            stop = start + len(block)
+            if folded is not None:
+                scores[start:stop] = (block @ folded.T).flatten()
+                continue
+            if self.scale is not None:
+                block *= self.scale
+            scores[start:stop] = self._score(block, query_embedding)
+        return scores
@@ -0,0 +1,103 @@
+import logging
+import sqlite3
+from contextlib import closing
+from pathlib import Path
+from typing import Dict, Iterable, List, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# SQLite's default bound-parameter limit is 999 on older builds
+_BATCH_SIZE = 900
+
+
+class EmbeddingStore:
+    """Content-addressed vectors keyed by (model name, chunk content hash).
+
+    One store is shared by every database indexed under the same cache root, so
+    identical chunk texts are embedded once no matter where they come from.
+    Rows are never evicted on their own; `prune` drops the ones no database
+    cache still uses.
+    """
+
+    def __init__(self, store_dir: Path):
+        store_dir.mkdir(parents=True, exist_ok=True)
+        self.path = store_dir / "embeddings.sqlite"
+        with closing(self._connect()) as conn, conn:
+            self._enable_wal(conn)
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings ("
+                "model TEXT NOT NULL, "
+                "content_hash TEXT NOT NULL, "
+                "vector BLOB NOT NULL, "
+                "PRIMARY KEY (model, content_hash)"
+                ") WITHOUT ROWID"
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=30)
+
+    @staticmethod
+    def _enable_wal(conn: sqlite3.Connection) -> None:
+        if conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal":
+            return
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+        except sqlite3.OperationalError:
+            # Switching modes ignores the busy timeout, so a concurrent opener
+            # can win the race; it is switching to WAL as well
+            logger.debug("Journal mode change raced another connection")
+
+    def get_many(self, model: str, hashes: List[str]) -> Dict[str, np.ndarray]:
+        found: Dict[str, np.ndarray] = {}
+        with closing(self._connect()) as conn:
+            for start in range(0, len(hashes), _BATCH_SIZE):
+                batch = hashes[start : start + _BATCH_SIZE]
+                placeholders = ",".join("?" * len(batch))
+                rows = conn.execute(
+                    "SELECT content_hash, vector FROM embeddings "
+                    f"WHERE model = ? AND content_hash IN ({placeholders})",
+                    [model, *batch],
+                )
+                for content_hash, vector in rows:
+                    found[content_hash] = np.frombuffer(vector, dtype=np.float32)
+        return found
+
+    def put_many(self, model: str, hashes: List[str], vectors: np.ndarray) -> None:
+        vectors = np.asarray(vectors, dtype=np.float32)
+        with closing(self._connect()) as conn, conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (model, content_hash, vector) "
+                "VALUES (?, ?, ?)",
+                [(model, h, v.tobytes()) for h, v in zip(hashes, vectors)],
+            )
+        logger.debug(f"Stored {len(hashes)} embeddings for {model}")
+
+    def prune(self, referenced: Iterable[Tuple[str, str]]) -> int:
+        """Delete every row whose (model, content hash) is not in `referenced`.
+
+        Freed pages are reused by later inserts. A row deleted while another
+        process is still indexing only costs that process a re-encode later.
+        """
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                "CREATE TEMP TABLE referenced ("
+                "model TEXT NOT NULL, "
+                "content_hash TEXT NOT NULL, "
+                "PRIMARY KEY (model, content_hash)"
+                ") WITHOUT ROWID"
+            )
+            conn.executemany(
+                "INSERT OR IGNORE INTO referenced (model, content_hash) "
+                "VALUES (?, ?)",
+                referenced,
+            )
+            deleted = conn.execute(
+                "DELETE FROM embeddings WHERE NOT EXISTS ("
+                "SELECT 1 FROM referenced r "
+                "WHERE r.model = embeddings.model "
+                "AND r.content_hash = embeddings.content_hash)"
+            ).rowcount
+        logger.info(f"Pruned {deleted} unreferenced embeddings from {self.path}")
+        return deleted
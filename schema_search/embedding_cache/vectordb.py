@@ -0,0 +1,362 @@
+import logging
+import sqlite3
+from contextlib import closing
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+import numpy as np
+
+from schema_search.chunkers import Chunk
+from schema_search.embedding_cache.base import BaseEmbeddingCache
+from schema_search.embedding_cache.store import EmbeddingStore
+from schema_search.utils.hashing import content_hash
+
+logger = logging.getLogger(__name__)
+
+STORE_FILE = "vectors.sqlite"
+# Chunk rows scored per step of a streamed scan
+SCAN_BLOCK_ROWS = 2048
+# Tables embedded and written per transaction while (re)indexing
+UPSERT_BATCH_TABLES = 512
+# SQLite's default bound-parameter limit is 999 on older builds
+_BATCH_SIZE = 900
+
+TableEntry = Tuple[str, int, List[str], np.ndarray]
+
+
+class VectorDBEmbeddingCache(BaseEmbeddingCache):
+    """Embeddings kept in a per-database SQLite file, one row per table.
+
+    Every query streams the rows in fixed-size blocks, so resident memory is
+    bounded by the scan block instead of growing with the catalog. Rows carry
+    the position of the table's first chunk, which is how scores map back
+    onto the chunk list.
+    """
+
+    def __init__(
+        self,
+        cache_dir: Path,
+        model_name: str,
+        metric: str,
+        batch_size: int,
+        show_progress: bool,
+        store: Optional[EmbeddingStore] = None,
+        query_cache_size: int = 0,
+        query_store: Optional[EmbeddingStore] = None,
+    ):
+        super().__init__(
+            cache_dir,
+            model_name,
+            metric,
+            batch_size,
+            show_progress,
+            store,
+            query_cache_size,
+            query_store,
+        )
+        self.path = cache_dir / STORE_FILE
+        self.num_chunks: Optional[int] = None
+        self.dim: Optional[int] = None
+        # Sorted first-chunk positions of the stored tables, read on demand
+        self._starts: Optional[np.ndarray] = None
+        with closing(self._connect()) as conn, conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS table_vectors ("
+                "table_name TEXT PRIMARY KEY, "
+                "position INTEGER NOT NULL, "
+                "chunk_hashes TEXT NOT NULL, "
+                "vectors BLOB NOT NULL"
+                ")"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS ix_table_vectors_position "
+                "ON table_vectors (position)"
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=30)
+
+    def is_loaded(self) -> bool:
+        return self.num_chunks is not None
+
+    @staticmethod
+    def referenced_hashes(cache_dir: Path) -> Set[Tuple[str, str]]:
+        """(model, chunk hash) pairs of the rows saved under `cache_dir`."""
+        path = cache_dir / STORE_FILE
+        if not path.exists():
+            return set()
+
+        with closing(sqlite3.connect(path, timeout=30)) as conn:
+            row = conn.execute("SELECT value FROM meta WHERE key = 'model'").fetchone()
+            if row is None:
+                return set()
+            return {
+                (row[0], h)
+                for (chunk_hashes,) in conn.execute(
+                    "SELECT chunk_hashes FROM table_vectors"
+                )
+                for h in chunk_hashes.split("\n")
+            }
+
+    def load_or_generate(
+        self, chunks: List[Chunk], force: bool, chunking_config: Dict
+    ) -> None:
+        tables = self._group_by_table(chunks)
+
+        with closing(self._connect()) as conn, conn:
+            meta = dict(conn.execute("SELECT key, value FROM meta"))
+            if force or meta.get("model") != self.model_name:
+                conn.execute("DELETE FROM table_vectors")
+                conn.execute("DELETE FROM meta")
+                conn.execute(
+                    "INSERT INTO meta (key, value) VALUES ('model', ?)",
+                    (self.model_name,),
+                )
+                meta = {"model": self.model_name}
+            stored = {
+                table_name: (position, chunk_hashes)
+                for table_name, position, chunk_hashes in conn.execute(
+                    "SELECT table_name, position, chunk_hashes FROM table_vectors"
+                )
+            }
+
+        self.dim = int(meta["dim"]) if "dim" in meta else None
+        self.delete_tables([name for name in stored if name not in tables])
+
+        changed: List[str] = []
+        moved: List[Tuple[int, str]] = []
+        for table_name, (position, hashes, _) in tables.items():
+            stored_position, stored_hashes = stored.get(table_name, (None, None))
+            if stored_hashes != "\n".join(hashes):
+                changed.append(table_name)
+            elif stored_position != position:
+                moved.append((position, table_name))
+
+        logger.info(
+            f"Vector store: {len(changed)} tables to embed, "
+            f"{len(tables) - len(changed)} unchanged"
+        )
+        for start in range(0, len(changed), UPSERT_BATCH_TABLES):
+            batch = changed[start : start + UPSERT_BATCH_TABLES]
+            # Rows of a modified table that kept their text are reused
+            vectors = {} if force else self._stored_vectors(batch)
+            texts = {
+                h: text
+                for table_name in batch
+                for h, text in zip(tables[table_name][1], tables[table_name][2])
+            }
+            self._resolve_vectors(vectors, texts, force)
+            self.upsert_tables(
+                [
+                    (
+                        table_name,
+                        tables[table_name][0],
+                        tables[table_name][1],
+                        np.stack([vectors[h] for h in tables[table_name][1]]),
+                    )
+                    for table_name in batch
+                ]
+            )
+
+        if moved:
+            with closing(self._connect()) as conn, conn:
+                conn.executemany(
+                    "UPDATE table_vectors SET position = ? WHERE table_name = ?",
+                    moved,
+                )
+
+        self.num_chunks = len(chunks)
+        self._starts = None
+
+    def _group_by_table(
+        self, chunks: List[Chunk]
+    ) -> Dict[str, Tuple[int, List[str], List[str]]]:
+        # Rows map back to chunks by start position plus offset, which only
+        # holds while each table's chunks are contiguous in the chunk list
+        tables: Dict[str, Tuple[int, List[str], List[str]]] = {}
+        previous = None
+        for position, chunk in enumerate(chunks):
+            if chunk.table_name not in tables:
+                tables[chunk.table_name] = (position, [], [])
+            elif chunk.table_name != previous:
+                raise ValueError(
+                    f"Chunks of table {chunk.table_name} are not contiguous"
+                )
+            previous = chunk.table_name
+            tables[chunk.table_name][1].append(content_hash(chunk.content))
+            tables[chunk.table_name][2].append(chunk.content)
+        return tables
+
+    def _stored_vectors(self, table_names: List[str]) -> Dict[str, np.ndarray]:
+        vectors: Dict[str, np.ndarray] = {}
+        if self.dim is None:
+            return vectors
+
+        placeholders = ",".join("?" * len(table_names))
+        with closing(self._connect()) as conn:
+            rows = conn.execute(
+                "SELECT chunk_hashes, vectors FROM table_vectors "
+                f"WHERE table_name IN ({placeholders})",
+                table_names,
+            )
+            for chunk_hashes, blob in rows:
+                matrix = self._unpack(blob)
+                vectors.update(zip(chunk_hashes.split("\n"), matrix))
+        return vectors
+
+    def upsert_tables(self, entries: List[TableEntry]) -> None:
+        """Insert or replace the vectors of whole tables."""
+        if not entries:
+            return
+
+        if self.dim is None:
+            self.dim = int(entries[0][3].shape[1])
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES ('dim', ?)",
+                (str(self.dim),),
+            )
+            conn.executemany(
+                "INSERT OR REPLACE INTO table_vectors "
+                "(table_name, position, chunk_hashes, vectors) VALUES (?, ?, ?, ?)",
+                [
+                    (
+                        table_name,
+                        position,
+                        "\n".join(hashes),
+                        np.ascontiguousarray(vectors, dtype=np.float32).tobytes(),
+                    )
+                    for table_name, position, hashes, vectors in entries
+                ],
+            )
+        self._starts = None
+        logger.debug(f"Upserted vectors for {len(entries)} tables")
+
+    def delete_tables(self, table_names: List[str]) -> None:
+        if not table_names:
+            return
+
+        with closing(self._connect()) as conn, conn:
+            conn.executemany(
+                "DELETE FROM table_vectors WHERE table_name = ?",
+                [(table_name,) for table_name in table_names],
+            )
+        self._starts = None
+        logger.debug(f"Deleted vectors for {len(table_names)} tables")
+
+    def _unpack(self, blob: bytes) -> np.ndarray:
+        assert self.dim is not None
+        return np.frombuffer(blob, dtype=np.float32).reshape(-1, self.dim)
+
+    def _scan(self) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+        """Yield (chunk positions, vectors) blocks covering every stored row."""
+        if self.dim is None:
+            return
+
+        row_bytes = 4 * self.dim
+        with closing(self._connect()) as conn:
+            rows = conn.execute("SELECT position, vectors FROM table_vectors")
+            starts: List[int] = []
+            blobs: List[bytes] = []
+            num_rows = 0
+            for position, blob in rows:
+                starts.append(position)
+                blobs.append(blob)
+                num_rows += len(blob) // row_bytes
+                if num_rows >= SCAN_BLOCK_ROWS:
+                    yield self._block(starts, blobs)
+                    starts, blobs, num_rows = [], [], 0
+            if blobs:
+                yield self._block(starts, blobs)
+
+    def _block(
+        self, starts: List[int], blobs: List[bytes]
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        vectors = self._unpack(b"".join(blobs))
+        counts = np.array([len(blob) for blob in blobs]) // (4 * vectors.shape[1])
+        # Row i of a table sits at the table's start position plus i
+        first_rows = np.repeat(np.cumsum(counts) - counts, counts)
+        offsets = np.arange(len(vectors)) - first_rows
+        return np.repeat(starts, counts) + offsets, vectors
+
+    def compute_similarities(self, query_embedding: np.ndarray) -> np.ndarray:
+        assert self.num_chunks is not None
+        scores = np.zeros(self.num_chunks, dtype=np.float32)
+        for positions, block in self._scan():
+            scores[positions] = self._score(block, query_embedding)
+        return scores
+
+    def compute_similarities_many(self, query_embeddings: np.ndarray) -> np.ndarray:
+        assert self.num_chunks is not None
+        # One pass over the store scores the whole batch
+        scores = np.zeros((len(query_embeddings), self.num_chunks), dtype=np.float32)
+        for positions, block in self._scan():
+            scores[:, positions] = self._score_many(block, query_embeddings)
+        return scores
+
+    def top_k(
+        self, query_embedding: np.ndarray, k: int
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        best_positions = np.zeros(0, dtype=np.int64)
+        best_scores = np.zeros(0, dtype=np.float32)
+        for positions, block in self._scan():
+            best_positions = np.concatenate([best_positions, positions])
+            best_scores = np.concatenate(
+                [best_scores, self._score(block, query_embedding)]
+            )
+            if 0 < k < len(best_scores):
+                keep = np.argpartition(-best_scores, k - 1)[:k]
+                best_positions, best_scores = best_positions[keep], best_scores[keep]
+
+        order = best_scores.argsort()[::-1]
+        return best_positions[order], best_scores[order]
+
+    def score_rows(
+        self, query_embedding: np.ndarray, indices: np.ndarray
+    ) -> np.ndarray:
+        if len(indices) == 0:
+            return np.zeros(0, dtype=np.float32)
+
+        starts = self._table_starts()
+        indices = np.asarray(indices, dtype=np.int64)
+        # The owning table is the last one starting at or before each index
+        owners = starts[np.searchsorted(starts, indices, side="right") - 1]
+        wanted = np.unique(owners).tolist()
+
+        blobs: Dict[int, bytes] = {}
+        with closing(self._connect()) as conn:
+            for batch_start in range(0, len(wanted), _BATCH_SIZE):
+                batch = wanted[batch_start : batch_start + _BATCH_SIZE]
+                placeholders = ",".join("?" * len(batch))
+                blobs.update(
+                    conn.execute(
+                        "SELECT position, vectors FROM table_vectors "
+                        f"WHERE position IN ({placeholders})",
+                        batch,
+                    )
+                )
+        rows = np.stack(
+            [
+                self._unpack(blobs[owner])[idx - owner]
+                for owner, idx in zip(owners.tolist(), indices.tolist())
+            ]
+        )
+        return self._score(rows, query_embedding)
+
+    def _table_starts(self) -> np.ndarray:
+        if self._starts is None:
+            with closing(self._connect()) as conn:
+                self._starts = np.array(
+                    [
+                        position
+                        for (position,) in conn.execute(
+                            "SELECT position FROM table_vectors ORDER BY position"
+                        )
+                    ],
+                    dtype=np.int64,
+                )
+        return self._starts
@@ -1,69 +1,180 @@
+import json
 import logging
-import pickle
 from pathlib import Path
-from typing import Dict, Set
+from typing import TYPE_CHECKING, Dict, FrozenSet, List, Optional, Tuple
 
-import networkx as nx
+import numpy as np
 
-from schema_search.types import TableSchema
+from schema_search.schema_diff import SchemaDiff
+from schema_search.types import ForeignKeyInfo, TableSchema
+from schema_search.utils.atomic import atomic_write
+from schema_search.utils.lru_cache import LRUCache
+
+if TYPE_CHECKING:
+    import networkx as nx
 
 logger = logging.getLogger(__name__)
 
+GRAPH_FILE = "graph.npz"
+# Bump when the arrays stored in GRAPH_FILE change meaning
+FORMAT_VERSION = 1
+# Written by older releases; replaced by GRAPH_FILE on the next build
+LEGACY_GRAPH_FILE = "graph.pkl"
+
 
 class GraphBuilder:
-    def __init__(self, cache_dir: Path):
+    """Foreign key graph over table names, stored as integer edge arrays.
+
+    The artifact holds node names, one (source, target) pair per referencing
+    table and referred table, and the FK column metadata of each edge. Table
+    schemas themselves live in metadata.json and are not duplicated here.
+    """
+
+    def __init__(self, cache_dir: Path, neighbor_cache_size: int = 4096):
         self.cache_dir = cache_dir
         self.cache_dir.mkdir(exist_ok=True)
-        self.graph: nx.DiGraph
+        self.node_names: List[str] = []
+        self.node_ids: Dict[str, int] = {}
+        self.edges = np.zeros((0, 2), dtype=np.int32)
+        self._edge_foreign_keys: Optional[List[List[ForeignKeyInfo]]] = []
+        # Serving only needs the edges; FK metadata is parsed on first access
+        self._foreign_keys_json = b"[]"
+        # CSR adjacency derived from the edges; rebuilt whenever they change
+        self.forward: Tuple[np.ndarray, np.ndarray]
+        self.backward: Tuple[np.ndarray, np.ndarray]
+        self.neighbor_cache = LRUCache(maxsize=neighbor_cache_size)
 
     def build(self, schemas: Dict[str, TableSchema], force: bool) -> None:
-        cache_file = self.cache_dir / "graph.pkl"
+        if not force and self._load_from_cache():
+            return
+        self._build_and_cache(schemas)
 
-        if not force and cache_file.exists():
-            self._load_from_cache(cache_file)
-        else:
-            self._build_and_cache(schemas, cache_file)
+    def update(self, schemas: Dict[str, TableSchema], diff: SchemaDiff) -> None:
+        # Edges are derived from the FK lists alone, so a rebuild costs one
+        # pass over the schemas and always matches a fresh build
+        logger.info(f"Rebuilding foreign key graph: {diff}")
+        self._build_and_cache(schemas)
 
-    def _load_from_cache(self, cache_file: Path) -> None:
-        logger.debug(f"Loading graph from cache: {cache_file}")
-        with open(cache_file, "rb") as f:
-            self.graph = pickle.load(f)
+    def _load_from_cache(self) -> bool:
+        cache_file = self.cache_dir / GRAPH_FILE
+        if not cache_file.exists():
+            return False
 
-    def _build_and_cache(
-        self, schemas: Dict[str, TableSchema], cache_file: Path
-    ) -> None:
+        logger.debug(f"Loading graph from cache: {cache_file}")
+        with np.load(cache_file, allow_pickle=False) as data:
+            if int(data["format_version"]) != FORMAT_VERSION:
+                logger.info("Graph cache invalidated: format changed")
+                return False
+            self.node_names = data["nodes"].tolist()
+            self.edges = data["edges"]
+            self._foreign_keys_json = data["foreign_keys"].tobytes()
+        self._edge_foreign_keys = None
+        self._index()
+        return True
+
+    def _build_and_cache(self, schemas: Dict[str, TableSchema]) -> None:
         logger.info("Building foreign key relationship graph")
-        self.graph = nx.DiGraph()
-
-        for table_name, schema in schemas.items():
-            self.graph.add_node(table_name, **schema)
+        self.node_names = list(schemas)
+        node_ids = {name: i for i, name in enumerate(self.node_names)}
 
+        edge_fks: Dict[Tuple[int, int], List[ForeignKeyInfo]] = {}
         for table_name, schema in schemas.items():
-            if schema["foreign_keys"]:
-                for fk in schema["foreign_keys"]:
-                    referred_table = fk["referred_table"]
-                    if referred_table in self.graph:
-                        self.graph.add_edge(table_name, referred_table, **fk)
-
-        with open(cache_file, "wb") as f:
-            pickle.dump(self.graph, f)
-
-    def get_neighbors(self, table_name: str, hops: int) -> Set[str]:
-        if table_name not in self.graph:
-            return set()
-
-        neighbors: Set[str] = set()
-
-        forward = nx.single_source_shortest_path_length(
-            self.graph, table_name, cutoff=hops
-        )
-        neighbors.update(forward.keys())
-
-        backward = nx.single_source_shortest_path_length(
-            self.graph.reverse(), table_name, cutoff=hops
-        )
-        neighbors.update(backward.keys())
+            for fk in schema["foreign_keys"] or []:
+                referred_id = node_ids.get(fk["referred_table"])
+                if referred_id is not None:
+                    key = (node_ids[table_name], referred_id)
+                    edge_fks.setdefault(key, []).append(fk)
+
+        self.edges = np.array(list(edge_fks), dtype=np.int32).reshape(-1, 2)
+        self._edge_foreign_keys = list(edge_fks.values())
+        self._foreign_keys_json = json.dumps(self._edge_foreign_keys).encode()
+        self._save()
+        self._index()
+
+    def _save(self) -> None:
+        with atomic_write(self.cache_dir / GRAPH_FILE) as f:
+            np.savez(
+                f,
+                format_version=np.array(FORMAT_VERSION),
+                nodes=np.array(self.node_names, dtype=str),
+                edges=self.edges,
+                foreign_keys=np.frombuffer(self._foreign_keys_json, dtype=np.uint8),
+            )
+        (self.cache_dir / LEGACY_GRAPH_FILE).unlink(missing_ok=True)
+
+    def _index(self) -> None:
+        """Index the edges as CSR arrays over node ids, both directions."""
+        self.node_ids = {name: i for i, name in enumerate(self.node_names)}
+        num_nodes = len(self.node_names)
+        self.forward = _csr(self.edges[:, 0], self.edges[:, 1], num_nodes)
+        self.backward = _csr(self.edges[:, 1], self.edges[:, 0], num_nodes)
+        self.neighbor_cache.clear()
+
+    @property
+    def edge_foreign_keys(self) -> List[List[ForeignKeyInfo]]:
+        """FK constraints behind each edge, aligned with `edges`."""
+        if self._edge_foreign_keys is None:
+            self._edge_foreign_keys = json.loads(self._foreign_keys_json)
+        return self._edge_foreign_keys
+
+    def to_networkx(self) -> "nx.DiGraph":
+        """The graph as a networkx DiGraph, for analysis outside the search path."""
+        import networkx as nx
+
+        graph = nx.DiGraph()
+        graph.add_nodes_from(self.node_names)
+        for (source, target), fks in zip(self.edges.tolist(), self.edge_foreign_keys):
+            graph.add_edge(
+                self.node_names[source], self.node_names[target], foreign_keys=fks
+            )
+        return graph
+
+    def get_neighbors(self, table_name: str, hops: int) -> FrozenSet[str]:
+        """Tables within `hops` FK edges, following references either way."""
+        node = self.node_ids.get(table_name)
+        if node is None:
+            return frozenset()
+
+        key = (table_name, hops)
+        neighbors = self.neighbor_cache.get(key)
+        if neighbors is None:
+            # Forward and backward walks are separate: a table two hops away
+            # through a shared parent is not a neighbour at hops=2
+            reached = np.union1d(
+                _reachable(*self.forward, node, hops),
+                _reachable(*self.backward, node, hops),
+            )
+            neighbors = frozenset(
+                self.node_names[i] for i in reached.tolist() if i != node
+            )
+            self.neighbor_cache.put(key, neighbors)
+        return neighbors
 
-        neighbors.discard(table_name)
 
-        return neighbors
+def _csr(
+    sources: np.ndarray, targets: np.ndarray, num_nodes: int
+) -> Tuple[np.ndarray, np.ndarray]:
+    order = np.argsort(sources, kind="stable")
+    indptr = np.zeros(num_nodes + 1, dtype=np.int64)
+    np.cumsum(np.bincount(sources, minlength=num_nodes), out=indptr[1:])
+    return indptr, targets[order]
+
+
+def _reachable(
+    indptr: np.ndarray, indices: np.ndarray, start: int, hops: int
+) -> np.ndarray:
+    """Node ids at most `hops` edges from start (breadth-first over the CSR)."""
+    visited = np.zeros(len(indptr) - 1, dtype=bool)
+    visited[start] = True
+    frontier = np.array([start])
+    for _ in range(hops):
+        starts = indptr[frontier]
+        counts = indptr[frontier + 1] - starts
+        # Positions of every out-edge of the frontier, without a Python loop
+        first = np.repeat(starts - (np.cumsum(counts) - counts), counts)
+        frontier = np.unique(indices[first + np.arange(counts.sum())])
+        frontier = frontier[~visited[frontier]]
+        if len(frontier) == 0:
+            break
+        visited[frontier] = True
+    return np.flatnonzero(visited)
@@ -1,6 +1,7 @@
 #!/usr/bin/env python3
 import logging
-from typing import Optional
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Optional
 
 from fastmcp import FastMCP
 from sqlalchemy import create_engine
@@ -10,11 +11,23 @@ from schema_search import SchemaSearch
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-mcp = FastMCP("schema-search")
+
+@asynccontextmanager
+async def lifespan(server: FastMCP) -> AsyncIterator[None]:
+    try:
+        yield
+    finally:
+        # Stops the thread pool that runs searches off the event loop
+        search_engine = getattr(server, "search_engine", None)
+        if search_engine is not None:
+            search_engine.close()
+
+
+mcp = FastMCP("schema-search", lifespan=lifespan)
 
 
 @mcp.tool()
-def schema_search(
+async def schema_search(
     query: str,
     limit: Optional[int] = None,
 ) -> str:
@@ -33,7 +46,7 @@ def schema_search(
     if limit is None:
         limit = int(mcp.search_engine.config["output"]["limit"])  # type: ignore
 
-    search_result = mcp.search_engine.search(query, limit=limit)  # type: ignore
+    search_result = await mcp.search_engine.asearch(query, limit=limit)  # type: ignore
     return str(search_result)
 
 
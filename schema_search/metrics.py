@@ -19,6 +19,35 @@ def manhattan_distance(a: np.ndarray, b: np.ndarray) -> np.ndarray:
     return -np.sum(np.abs(a[:, None] - b[None, :]), axis=-1)
 
 
+# Set-bit count of every byte value, for NumPy builds without bitwise_count
+_POPCOUNT = np.unpackbits(np.arange(256, dtype=np.uint8)[:, None], axis=1).sum(axis=1)
+
+
+def pack_signs(a: np.ndarray) -> np.ndarray:
+    """Sign bits of (n, d) rows as (ceil(d / 64), n) uint64 words.
+
+    Word-major layout lets the Hamming scan XOR one contiguous word column at
+    a time instead of reducing over a short trailing axis.
+    """
+    bits = np.packbits(np.atleast_2d(a) > 0, axis=-1)
+    bits = np.pad(bits, [(0, 0), (0, -bits.shape[1] % 8)])
+    return np.ascontiguousarray(bits.view(np.uint64).T)
+
+
+def _popcount(words: np.ndarray) -> np.ndarray:
+    if hasattr(np, "bitwise_count"):
+        return np.bitwise_count(words)
+    counts = _POPCOUNT[words.view(np.uint8)].reshape(len(words), 8)
+    return counts.sum(axis=1, dtype=np.uint8)
+
+
+def hamming_distance(packed: np.ndarray, query_words: np.ndarray) -> np.ndarray:
+    distances = np.zeros(packed.shape[1], dtype=np.int32)
+    for column, query_word in zip(packed, query_words.ravel()):
+        distances += _popcount(column ^ query_word)
+    return distances
+
+
 METRICS = {
     "cosine": cosine_similarity,
     "dot": dot_product,
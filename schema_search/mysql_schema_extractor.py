@@ -0,0 +1,327 @@
+import hashlib
+import logging
+from typing import Dict, List, Any, Optional, Tuple
+from sqlalchemy.engine import Engine
+from sqlalchemy import text
+
+from schema_search.schema_extractor import SchemaExtractor
+from schema_search.types import (
+    TableSchema,
+    ColumnInfo,
+    ForeignKeyInfo,
+    IndexInfo,
+    ConstraintInfo,
+)
+
+try:
+    # Reflection's parser for SHOW CREATE TABLE column lines (SQLAlchemy 1.4-2.x)
+    from sqlalchemy.dialects.mysql.reflection import (
+        MySQLTableDefinitionParser,
+        ReflectedState,
+    )
+except ImportError:  # pragma: no cover - layout changed in a newer SQLAlchemy
+    MySQLTableDefinitionParser = None
+
+logger = logging.getLogger(__name__)
+
+SYSTEM_SCHEMAS = "('information_schema', 'performance_schema', 'mysql', 'sys')"
+
+
+def _checksum(columns: str, view: str, where: str = "") -> str:
+    return f"""(
+        SELECT CONCAT(COUNT(*), ':', COALESCE(SUM(CRC32(CONCAT_WS('|', {columns}))), 0))
+        FROM information_schema.{view}
+        WHERE TABLE_SCHEMA NOT IN {SYSTEM_SCHEMAS} {where}
+    )"""
+
+
+# UPDATE_TIME is left out on purpose: it moves on every data write, not just DDL
+TABLES_CHECKSUM = _checksum(
+    "TABLE_SCHEMA, TABLE_NAME, CREATE_TIME",
+    "TABLES",
+    "AND TABLE_TYPE = 'BASE TABLE'",
+)
+COLUMNS_CHECKSUM = _checksum(
+    "TABLE_SCHEMA, TABLE_NAME, COLUMN_NAME, ORDINAL_POSITION, "
+    "COLUMN_TYPE, IS_NULLABLE, COLUMN_DEFAULT",
+    "COLUMNS",
+)
+KEYS_CHECKSUM = _checksum(
+    "TABLE_SCHEMA, TABLE_NAME, CONSTRAINT_NAME, COLUMN_NAME, "
+    "REFERENCED_TABLE_NAME, REFERENCED_COLUMN_NAME",
+    "KEY_COLUMN_USAGE",
+)
+# CHECK constraints only appear here; they have no KEY_COLUMN_USAGE rows
+CONSTRAINTS_CHECKSUM = _checksum(
+    "TABLE_SCHEMA, TABLE_NAME, CONSTRAINT_NAME, CONSTRAINT_TYPE",
+    "TABLE_CONSTRAINTS",
+)
+STATISTICS_CHECKSUM = _checksum(
+    "TABLE_SCHEMA, TABLE_NAME, INDEX_NAME, NON_UNIQUE, SEQ_IN_INDEX, COLUMN_NAME",
+    "STATISTICS",
+)
+FINGERPRINT_QUERY = f"""
+    SELECT
+        {TABLES_CHECKSUM},
+        {COLUMNS_CHECKSUM},
+        {KEYS_CHECKSUM},
+        {CONSTRAINTS_CHECKSUM},
+        {STATISTICS_CHECKSUM}
+"""
+
+
+class MySQLSchemaExtractor:
+    """Extracts MySQL/MariaDB schemas with one bulk query per catalog view."""
+
+    def __init__(self, engine: Engine, config: Dict[str, Any]):
+        self.engine = engine
+        self.config = config
+
+    def extract(self) -> Dict[str, TableSchema]:
+        if not hasattr(MySQLTableDefinitionParser, "_parse_column"):
+            logger.warning(
+                "SQLAlchemy's MySQL type parser is unavailable; "
+                "falling back to inspector reflection"
+            )
+            return SchemaExtractor(self.engine, self.config).extract()
+
+        logger.info("Starting extraction...")
+        schema_config = self.config["schema"]
+
+        with self.engine.connect() as conn:
+            # Server-side cursors keep memory flat on very large catalogs
+            conn = conn.execution_options(stream_results=True, yield_per=1000)
+
+            tables = self._get_tables(conn)
+            logger.info(f"Found {len(tables)} tables")
+
+            logger.debug("Fetching all columns...")
+            all_columns = (
+                self._get_all_columns(conn) if schema_config["include_columns"] else {}
+            )
+
+            logger.debug("Fetching all key constraints...")
+            constraints = self._get_all_constraints(conn)
+
+            logger.debug("Fetching all indexes...")
+            all_indices = (
+                self._get_all_indices(conn) if schema_config["include_indices"] else {}
+            )
+
+        schemas: Dict[str, TableSchema] = {}
+        for table_key in tables:
+            table_name = table_key[1]
+            table_constraints = constraints.get(table_key, {})
+
+            schemas[table_name] = {
+                "name": table_name,
+                "columns": (
+                    all_columns.get(table_key, [])
+                    if schema_config["include_columns"]
+                    else None
+                ),
+                "primary_keys": table_constraints.get("primary_keys", []),
+                "foreign_keys": (
+                    table_constraints.get("foreign_keys", [])
+                    if schema_config["include_foreign_keys"]
+                    else None
+                ),
+                "indices": (
+                    all_indices.get(table_key, [])
+                    if schema_config["include_indices"]
+                    else None
+                ),
+                "unique_constraints": (
+                    table_constraints.get("unique_constraints", [])
+                    if schema_config["include_constraints"]
+                    else None
+                ),
+                "check_constraints": (
+                    table_constraints.get("check_constraints", [])
+                    if schema_config["include_constraints"]
+                    else None
+                ),
+            }
+
+        return schemas
+
+    def fingerprint(self) -> Optional[str]:
+        # One round trip; every checksum is aggregated server-side
+        with self.engine.connect() as conn:
+            row = conn.execute(text(FINGERPRINT_QUERY)).one()
+        return hashlib.sha256("/".join(map(str, row)).encode()).hexdigest()
+
+    def _get_tables(self, conn) -> List[Tuple[str, str]]:
+        query = text(f"""
+            SELECT TABLE_SCHEMA, TABLE_NAME
+            FROM information_schema.TABLES
+            WHERE TABLE_TYPE = 'BASE TABLE'
+            AND TABLE_SCHEMA NOT IN {SYSTEM_SCHEMAS}
+            ORDER BY TABLE_SCHEMA, TABLE_NAME
+        """)
+
+        return [(row[0], row[1]) for row in conn.execute(query)]
+
+    def _get_all_columns(self, conn) -> Dict[tuple, List[ColumnInfo]]:
+        query = text(f"""
+            SELECT
+                TABLE_SCHEMA,
+                TABLE_NAME,
+                COLUMN_NAME,
+                COLUMN_TYPE,
+                IS_NULLABLE,
+                COLUMN_DEFAULT
+            FROM information_schema.COLUMNS
+            WHERE TABLE_SCHEMA NOT IN {SYSTEM_SCHEMAS}
+            ORDER BY TABLE_SCHEMA, TABLE_NAME, ORDINAL_POSITION
+        """)
+
+        columns_by_table = {}
+        type_names: Dict[str, str] = {}
+        for row in conn.execute(query):
+            table_key = (row[0], row[1])
+            if table_key not in columns_by_table:
+                columns_by_table[table_key] = []
+
+            if row[3] not in type_names:
+                type_names[row[3]] = self._resolve_type(row[3])
+
+            columns_by_table[table_key].append({
+                "name": row[2],
+                "type": type_names[row[3]],
+                "nullable": row[4] == "YES",
+                "default": str(row[5]) if row[5] is not None else None,
+            })
+
+        return columns_by_table
+
+    def _resolve_type(self, column_type: str) -> str:
+        """Spell a COLUMN_TYPE (e.g. 'int(11) unsigned') as reflection does."""
+        # Reflection parses SHOW CREATE TABLE lines; parse the same line shape
+        dialect = self.engine.dialect
+        parser = MySQLTableDefinitionParser(dialect, dialect.identifier_preparer)
+        state = ReflectedState()
+        try:
+            parser._parse_column(f"  `c` {column_type},", state)
+        except TypeError:
+            # Types reflection cannot instantiate; it would fail on them too
+            return column_type
+        return str(state.columns[0]["type"])
+
+    def _get_all_constraints(self, conn) -> Dict[tuple, Dict[str, list]]:
+        # CHECK constraints have no KEY_COLUMN_USAGE rows, hence the LEFT JOIN
+        query = text(f"""
+            SELECT
+                tc.TABLE_SCHEMA,
+                tc.TABLE_NAME,
+                tc.CONSTRAINT_NAME,
+                tc.CONSTRAINT_TYPE,
+                kcu.COLUMN_NAME,
+                kcu.REFERENCED_TABLE_NAME,
+                kcu.REFERENCED_COLUMN_NAME
+            FROM information_schema.TABLE_CONSTRAINTS tc
+            LEFT JOIN information_schema.KEY_COLUMN_USAGE kcu
+                ON tc.CONSTRAINT_SCHEMA = kcu.CONSTRAINT_SCHEMA
+                AND tc.CONSTRAINT_NAME = kcu.CONSTRAINT_NAME
+                AND tc.TABLE_SCHEMA = kcu.TABLE_SCHEMA
+                AND tc.TABLE_NAME = kcu.TABLE_NAME
+            WHERE tc.TABLE_SCHEMA NOT IN {SYSTEM_SCHEMAS}
+            ORDER BY
+                tc.TABLE_SCHEMA,
+                tc.TABLE_NAME,
+                tc.CONSTRAINT_NAME,
+                kcu.ORDINAL_POSITION
+        """)
+
+        grouped: Dict[tuple, Dict[str, Dict[str, Any]]] = {}
+        for row in conn.execute(query):
+            table_key = (row[0], row[1])
+            constraint_name = row[2]
+
+            if table_key not in grouped:
+                grouped[table_key] = {}
+
+            if constraint_name not in grouped[table_key]:
+                grouped[table_key][constraint_name] = {
+                    "type": row[3],
+                    "columns": [],
+                    "referred_table": row[5],
+                    "referred_columns": [],
+                }
+
+            constraint = grouped[table_key][constraint_name]
+            if row[4] is not None:
+                constraint["columns"].append(row[4])
+            if row[6] is not None:
+                constraint["referred_columns"].append(row[6])
+
+        return {k: self._split_constraints(v) for k, v in grouped.items()}
+
+    def _split_constraints(
+        self, constraints: Dict[str, Dict[str, Any]]
+    ) -> Dict[str, list]:
+        primary_keys: List[str] = []
+        foreign_keys: List[ForeignKeyInfo] = []
+        unique_constraints: List[ConstraintInfo] = []
+        check_constraints: List[ConstraintInfo] = []
+
+        for name, constraint in constraints.items():
+            constraint_type = constraint["type"]
+            if constraint_type == "PRIMARY KEY":
+                primary_keys = constraint["columns"]
+            elif constraint_type == "FOREIGN KEY":
+                foreign_keys.append({
+                    "constrained_columns": constraint["columns"],
+                    "referred_table": constraint["referred_table"],
+                    "referred_columns": constraint["referred_columns"],
+                })
+            elif constraint_type == "UNIQUE":
+                unique_constraints.append(
+                    {"name": name, "columns": constraint["columns"]}
+                )
+            elif constraint_type == "CHECK":
+                check_constraints.append(
+                    {"name": name, "columns": constraint["columns"]}
+                )
+
+        return {
+            "primary_keys": primary_keys,
+            "foreign_keys": foreign_keys,
+            "unique_constraints": unique_constraints,
+            "check_constraints": check_constraints,
+        }
+
+    def _get_all_indices(self, conn) -> Dict[tuple, List[IndexInfo]]:
+        query = text(f"""
+            SELECT
+                TABLE_SCHEMA,
+                TABLE_NAME,
+                INDEX_NAME,
+                NON_UNIQUE,
+                COLUMN_NAME
+            FROM information_schema.STATISTICS
+            WHERE TABLE_SCHEMA NOT IN {SYSTEM_SCHEMAS}
+            AND INDEX_NAME <> 'PRIMARY'
+            ORDER BY TABLE_SCHEMA, TABLE_NAME, INDEX_NAME, SEQ_IN_INDEX
+        """)
+
+        indices_by_table: Dict[tuple, Dict[str, IndexInfo]] = {}
+        for row in conn.execute(query):
+            table_key = (row[0], row[1])
+            index_name = row[2]
+
+            if table_key not in indices_by_table:
+                indices_by_table[table_key] = {}
+
+            if index_name not in indices_by_table[table_key]:
+                indices_by_table[table_key][index_name] = {
+                    "name": index_name,
+                    "columns": [],
+                    "unique": int(row[3]) == 0,
+                }
+
+            # Functional index parts have no column name
+            if row[4] is not None:
+                indices_by_table[table_key][index_name]["columns"].append(row[4])
+
+        return {k: list(v.values()) for k, v in indices_by_table.items()}
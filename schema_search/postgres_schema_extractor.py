@@ -0,0 +1,199 @@
+import json
+import logging
+from typing import Dict, List, Any, Optional
+from sqlalchemy.engine import Engine
+from sqlalchemy import text
+
+from schema_search.types import TableSchema
+
+logger = logging.getLogger(__name__)
+
+
+USER_SCHEMAS = """
+    n.nspname NOT IN ('pg_catalog', 'information_schema', 'pg_toast')
+    AND n.nspname NOT LIKE 'pg\\_temp\\_%'
+    AND n.nspname NOT LIKE 'pg\\_toast\\_temp\\_%'
+"""
+
+
+def _column_names(attnums: str, relid: str) -> str:
+    return f"""(
+        SELECT json_agg(a.attname ORDER BY k.ord)
+        FROM unnest({attnums}) WITH ORDINALITY AS k(attnum, ord)
+        JOIN pg_catalog.pg_attribute a
+            ON a.attrelid = {relid} AND a.attnum = k.attnum
+    )"""
+
+
+COLUMNS_QUERY = """
+    SELECT json_agg(json_build_object(
+        'name', a.attname,
+        'type', pg_catalog.format_type(a.atttypid, a.atttypmod),
+        'nullable', NOT a.attnotnull,
+        'default', pg_catalog.pg_get_expr(d.adbin, d.adrelid)
+    ) ORDER BY a.attnum)
+    FROM pg_catalog.pg_attribute a
+    LEFT JOIN pg_catalog.pg_attrdef d
+        ON d.adrelid = a.attrelid AND d.adnum = a.attnum
+    WHERE a.attrelid = c.oid AND a.attnum > 0 AND NOT a.attisdropped
+"""
+
+PRIMARY_KEYS_QUERY = f"""
+    SELECT {_column_names("con.conkey", "con.conrelid")}
+    FROM pg_catalog.pg_constraint con
+    WHERE con.conrelid = c.oid AND con.contype = 'p'
+"""
+
+FOREIGN_KEYS_QUERY = f"""
+    SELECT json_agg(json_build_object(
+        'constrained_columns', {_column_names("con.conkey", "con.conrelid")},
+        'referred_table', rc.relname,
+        'referred_columns', {_column_names("con.confkey", "con.confrelid")}
+    ) ORDER BY con.conname)
+    FROM pg_catalog.pg_constraint con
+    JOIN pg_catalog.pg_class rc ON rc.oid = con.confrelid
+    WHERE con.conrelid = c.oid AND con.contype = 'f'
+"""
+
+INDICES_QUERY = f"""
+    SELECT json_agg(json_build_object(
+        'name', ic.relname,
+        'columns', COALESCE(
+            {_column_names("i.indkey::int2[]", "i.indrelid")}, '[]'::json
+        ),
+        'unique', i.indisunique
+    ) ORDER BY ic.relname)
+    FROM pg_catalog.pg_index i
+    JOIN pg_catalog.pg_class ic ON ic.oid = i.indexrelid
+    WHERE i.indrelid = c.oid AND NOT i.indisprimary
+"""
+
+
+def _constraints_query(contype: str) -> str:
+    return f"""
+    SELECT json_agg(json_build_object(
+        'name', con.conname,
+        'columns', COALESCE(
+            {_column_names("con.conkey", "con.conrelid")}, '[]'::json
+        )
+    ) ORDER BY con.conname)
+    FROM pg_catalog.pg_constraint con
+    WHERE con.conrelid = c.oid AND con.contype = '{contype}'
+"""
+
+# Catalog rows get a new xmin on every transactional DDL change, while VACUUM and
+# ANALYZE update pg_class in place, so this hash only moves when the schema does
+FINGERPRINT_QUERY = f"""
+    SELECT md5(string_agg(entry, ',' ORDER BY entry))
+    FROM (
+        SELECT 'c' || c.oid::text || ':' || c.xmin::text AS entry
+        FROM pg_catalog.pg_class c
+        JOIN pg_catalog.pg_namespace n ON n.oid = c.relnamespace
+        WHERE c.relkind IN ('r', 'p', 'i', 'I') AND {USER_SCHEMAS}
+        UNION ALL
+        SELECT 'a' || a.attrelid::text || '.' || a.attnum::text || ':' || a.xmin::text
+        FROM pg_catalog.pg_attribute a
+        JOIN pg_catalog.pg_class c ON c.oid = a.attrelid
+        JOIN pg_catalog.pg_namespace n ON n.oid = c.relnamespace
+        WHERE c.relkind IN ('r', 'p') AND a.attnum > 0 AND {USER_SCHEMAS}
+        UNION ALL
+        SELECT 'k' || con.oid::text || ':' || con.xmin::text
+        FROM pg_catalog.pg_constraint con
+        JOIN pg_catalog.pg_namespace n ON n.oid = con.connamespace
+        WHERE {USER_SCHEMAS}
+        UNION ALL
+        SELECT 'd' || d.oid::text || ':' || d.xmin::text
+        FROM pg_catalog.pg_attrdef d
+        JOIN pg_catalog.pg_class c ON c.oid = d.adrelid
+        JOIN pg_catalog.pg_namespace n ON n.oid = c.relnamespace
+        WHERE {USER_SCHEMAS}
+    ) entries
+"""
+
+
+class PostgresSchemaExtractor:
+    """Extracts every table in one aggregated pg_catalog query."""
+
+    def __init__(self, engine: Engine, config: Dict[str, Any]):
+        self.engine = engine
+        self.config = config
+
+    def extract(self) -> Dict[str, TableSchema]:
+        logger.info("Starting extraction...")
+        schema_config = self.config["schema"]
+        include_constraints = schema_config["include_constraints"]
+
+        parts = {
+            "columns": COLUMNS_QUERY if schema_config["include_columns"] else None,
+            "primary_keys": PRIMARY_KEYS_QUERY,
+            "foreign_keys": (
+                FOREIGN_KEYS_QUERY if schema_config["include_foreign_keys"] else None
+            ),
+            "indices": INDICES_QUERY if schema_config["include_indices"] else None,
+            "unique_constraints": (
+                _constraints_query("u") if include_constraints else None
+            ),
+            "check_constraints": (
+                _constraints_query("c") if include_constraints else None
+            ),
+        }
+
+        schemas: Dict[str, TableSchema] = {}
+        with self.engine.connect() as conn:
+            result = conn.execution_options(
+                stream_results=True, yield_per=1000
+            ).execute(self._build_query(parts))
+
+            for row in result:
+                table_name = row[1]
+                values = {
+                    name: None if parts[name] is None else self._load_json(value)
+                    for name, value in zip(parts.keys(), row[2:])
+                }
+                schemas[table_name] = {
+                    "name": table_name,
+                    "columns": values["columns"],
+                    "primary_keys": values["primary_keys"],
+                    "foreign_keys": values["foreign_keys"],
+                    "indices": values["indices"],
+                    "unique_constraints": values["unique_constraints"],
+                    "check_constraints": values["check_constraints"],
+                }
+
+        logger.info(f"Found {len(schemas)} tables")
+        return schemas
+
+    def fingerprint(self) -> Optional[str]:
+        with self.engine.connect() as conn:
+            return conn.execute(text(FINGERPRINT_QUERY)).scalar() or ""
+
+    def _build_query(self, parts: Dict[str, Any]):
+        select = []
+        joins = []
+        for name, subquery in parts.items():
+            if subquery is None:
+                select.append(f"NULL AS {name}")
+                continue
+            select.append(f"{name}_agg.value AS {name}")
+            joins.append(
+                f"LEFT JOIN LATERAL ({subquery}) AS {name}_agg(value) ON true"
+            )
+
+        return text(f"""
+            SELECT
+                n.nspname AS table_schema,
+                c.relname AS table_name,
+                {", ".join(select)}
+            FROM pg_catalog.pg_class c
+            JOIN pg_catalog.pg_namespace n ON n.oid = c.relnamespace
+            {" ".join(joins)}
+            WHERE c.relkind IN ('r', 'p') AND {USER_SCHEMAS}
+            ORDER BY n.nspname, c.relname
+        """)
+
+    def _load_json(self, value: Any) -> List[Any]:
+        if value is None:
+            return []
+        if isinstance(value, str):
+            return json.loads(value)
+        return value
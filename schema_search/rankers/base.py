@@ -1,3 +1,4 @@
+import threading
 from typing import Dict, List, Tuple
 from collections import defaultdict
 from abc import ABC, abstractmethod
@@ -8,6 +9,7 @@ from schema_search.chunkers import Chunk
 class BaseRanker(ABC):
     def __init__(self):
         self.chunks: List[Chunk]
+        self._rank_lock = threading.Lock()
 
     @abstractmethod
     def build(self, chunks: List[Chunk]) -> None:
@@ -18,6 +20,18 @@ class BaseRanker(ABC):
         """Returns: List of (chunk_idx, score)"""
         pass
 
+    def rank_many(
+        self, queries: List[str], chunk_lists: List[List[Chunk]]
+    ) -> List[List[Tuple[int, float]]]:
+        """Rank chunk_lists[i] against queries[i]; indices are per list."""
+        rankings = []
+        # build() and rank() share self.chunks, so concurrent searches take turns
+        with self._rank_lock:
+            for query, chunks in zip(queries, chunk_lists):
+                self.build(chunks)
+                rankings.append(self.rank(query))
+        return rankings
+
     def get_top_tables_from_chunks(
         self, ranked_chunks: List[Tuple[int, float]], top_k: int
     ) -> Dict[str, List[int]]:
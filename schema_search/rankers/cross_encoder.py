@@ -1,5 +1,8 @@
 from typing import List, Tuple, Optional, TYPE_CHECKING
 import logging
+import threading
+
+import numpy as np
 
 from schema_search.chunkers import Chunk
 from schema_search.rankers.base import BaseRanker
@@ -16,16 +19,21 @@ class CrossEncoderRanker(BaseRanker):
         super().__init__()
         self.model_name = model_name
         self.model: Optional["CrossEncoder"] = None
+        self._model_lock = threading.Lock()
 
     def _load_model(self) -> "CrossEncoder":
-        if self.model is None:
-            sentence_transformers = lazy_import_check(
-                "sentence_transformers", "semantic", "reranking with CrossEncoder"
-            )
-            logging.getLogger("sentence_transformers").setLevel(logging.WARNING)
-            self.model = sentence_transformers.CrossEncoder(self.model_name)
-            assert self.model is not None
-            logger.info(f"Loaded CrossEncoder: {self.model_name}")
+        if self.model is not None:
+            return self.model
+
+        with self._model_lock:
+            if self.model is None:
+                sentence_transformers = lazy_import_check(
+                    "sentence_transformers", "semantic", "reranking with CrossEncoder"
+                )
+                logging.getLogger("sentence_transformers").setLevel(logging.WARNING)
+                self.model = sentence_transformers.CrossEncoder(self.model_name)
+                assert self.model is not None
+                logger.info(f"Loaded CrossEncoder: {self.model_name}")
         return self.model
 
     def build(self, chunks: List[Chunk]) -> None:
@@ -38,3 +46,27 @@ class CrossEncoderRanker(BaseRanker):
         scores = model.predict(pairs, show_progress_bar=False)
         ranked_indices = scores.argsort()[::-1]
         return [(int(idx), float(scores[idx])) for idx in ranked_indices]
+
+    def rank_many(
+        self, queries: List[str], chunk_lists: List[List[Chunk]]
+    ) -> List[List[Tuple[int, float]]]:
+        model = self._load_model()
+        # Stateless, unlike build() + rank(), so concurrent searches can share
+        # the ranker; all pairs go through one predict call
+        pairs = [
+            (query, chunk.content)
+            for query, chunks in zip(queries, chunk_lists)
+            for chunk in chunks
+        ]
+        if not pairs:
+            return [[] for _ in queries]
+
+        scores = model.predict(pairs, show_progress_bar=False)
+        bounds = np.cumsum([len(chunks) for chunks in chunk_lists])[:-1]
+        rankings = []
+        for query_scores in np.split(scores, bounds):
+            ranked_indices = query_scores.argsort()[::-1]
+            rankings.append(
+                [(int(idx), float(query_scores[idx])) for idx in ranked_indices]
+            )
+        return rankings
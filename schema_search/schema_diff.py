@@ -0,0 +1,49 @@
+import json
+from dataclasses import dataclass, field
+from typing import Dict, List
+
+from schema_search.types import TableSchema
+from schema_search.utils.hashing import content_hash
+
+
+def table_hash(schema: TableSchema) -> str:
+    return content_hash(json.dumps(schema, sort_keys=True))
+
+
+@dataclass
+class SchemaDiff:
+    """Tables that differ between the cached and the current schema."""
+
+    added: List[str] = field(default_factory=list)
+    removed: List[str] = field(default_factory=list)
+    modified: List[str] = field(default_factory=list)
+
+    @property
+    def affected(self) -> List[str]:
+        """Tables whose chunks, embeddings and graph edges must be rebuilt."""
+        return self.added + self.modified
+
+    def __bool__(self) -> bool:
+        return bool(self.added or self.removed or self.modified)
+
+    def __str__(self) -> str:
+        return (
+            f"{len(self.added)} added, {len(self.removed)} removed, "
+            f"{len(self.modified)} modified"
+        )
+
+
+def diff_schemas(
+    cached: Dict[str, TableSchema], current: Dict[str, TableSchema]
+) -> SchemaDiff:
+    cached_hashes = {name: table_hash(schema) for name, schema in cached.items()}
+
+    diff = SchemaDiff()
+    for name, schema in current.items():
+        if name not in cached_hashes:
+            diff.added.append(name)
+        elif cached_hashes[name] != table_hash(schema):
+            diff.modified.append(name)
+
+    diff.removed = [name for name in cached if name not in current]
+    return diff
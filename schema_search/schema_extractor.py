@@ -1,4 +1,6 @@
-from typing import Dict, List, Any
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Any, Optional, Tuple
 from sqlalchemy import inspect
 from sqlalchemy.engine import Engine
 
@@ -10,6 +12,8 @@ from schema_search.types import (
     ConstraintInfo,
 )
 
+logger = logging.getLogger(__name__)
+
 
 class SchemaExtractor:
     def __init__(self, engine: Engine, config: Dict[str, Any]):
@@ -18,20 +22,81 @@ class SchemaExtractor:
 
     def extract(self) -> Dict[str, TableSchema]:
         inspector = inspect(self.engine)
-        schemas: Dict[str, TableSchema] = {}
+        max_connections = self.config["schema"].get("max_connections", 1)
 
-        schema_names = inspector.get_schema_names()
-        for schema_name in schema_names:
+        work: List[Tuple[str, List[str]]] = []
+        for schema_name in inspector.get_schema_names():
             if self._should_skip_schema(schema_name):
                 continue
 
-            for table_name in inspector.get_table_names(schema=schema_name):
-                schemas[table_name] = self._extract_table(
-                    inspector, table_name, schema_name
+            table_names = inspector.get_table_names(schema=schema_name)
+            for batch in self._table_batches(table_names, max_connections):
+                work.append((schema_name, batch))
+
+        max_workers = min(max_connections, len(work))
+        if max_workers <= 1:
+            results = [
+                self._extract_tables(inspector, schema_name, table_names)
+                for schema_name, table_names in work
+            ]
+        else:
+            logger.info(
+                f"Extracting {len(work)} table batches with {max_workers} connections"
+            )
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                # map() yields in submission order, so the merge is deterministic
+                results = list(
+                    executor.map(lambda unit: self._extract_with_connection(*unit), work)
                 )
 
+        schemas: Dict[str, TableSchema] = {}
+        for result in results:
+            schemas.update(result)
+
         return schemas
 
+    def fingerprint(self) -> Optional[str]:
+        # Generic reflection has no cheap change probe; always extract
+        return None
+
+    def _table_batches(
+        self, table_names: List[str], max_connections: int
+    ) -> List[List[str]]:
+        if max_connections <= 1:
+            return [table_names]
+
+        batch_size = self.config["schema"].get("table_batch_size", 500)
+        return [
+            table_names[i : i + batch_size]
+            for i in range(0, len(table_names), batch_size)
+        ]
+
+    def _extract_with_connection(
+        self, schema_name: str, table_names: List[str]
+    ) -> Dict[str, TableSchema]:
+        # Inspectors are not thread-safe; each worker checks out its own connection
+        with self.engine.connect() as conn:
+            return self._extract_tables(inspect(conn), schema_name, table_names)
+
+    def _extract_tables(
+        self, inspector, schema_name: str, table_names: List[str]
+    ) -> Dict[str, TableSchema]:
+        if self._supports_multi_reflection(inspector):
+            try:
+                return self._extract_schema_batched(
+                    inspector, table_names, schema_name
+                )
+            except NotImplementedError:
+                logger.info(
+                    f"Multi-table reflection unavailable for schema {schema_name}; "
+                    "falling back to per-table reflection"
+                )
+
+        return {
+            table_name: self._extract_table(inspector, table_name, schema_name)
+            for table_name in table_names
+        }
+
     def _should_skip_schema(self, schema_name: str) -> bool:
         skip = {
             "information_schema",
@@ -43,53 +108,144 @@ class SchemaExtractor:
         }
         return schema_name.lower() in skip
 
+    def _supports_multi_reflection(self, inspector) -> bool:
+        if not self.config["schema"].get("batch_reflection", True):
+            return False
+        # Inspector.get_multi_* only exists on SQLAlchemy 2.x
+        return hasattr(inspector, "get_multi_columns")
+
+    def _extract_schema_batched(
+        self, inspector, table_names: List[str], schema_name: str
+    ) -> Dict[str, TableSchema]:
+        if not table_names:
+            return {}
+
+        schema_config = self.config["schema"]
+        kwargs = {"schema": schema_name, "filter_names": table_names}
+
+        pk_constraints = inspector.get_multi_pk_constraint(**kwargs)
+        columns = (
+            inspector.get_multi_columns(**kwargs)
+            if schema_config["include_columns"]
+            else None
+        )
+        foreign_keys = (
+            inspector.get_multi_foreign_keys(**kwargs)
+            if schema_config["include_foreign_keys"]
+            else None
+        )
+        indices = (
+            inspector.get_multi_indexes(**kwargs)
+            if schema_config["include_indices"]
+            else None
+        )
+        unique_constraints = (
+            inspector.get_multi_unique_constraints(**kwargs)
+            if schema_config["include_constraints"]
+            else None
+        )
+        check_constraints = (
+            inspector.get_multi_check_constraints(**kwargs)
+            if schema_config["include_constraints"]
+            else None
+        )
+
+        schemas: Dict[str, TableSchema] = {}
+        for table_name in table_names:
+            key = (schema_name, table_name)
+            pk_constraint = pk_constraints.get(key)
+            schemas[table_name] = self._build_table_schema(
+                table_name,
+                pk_constraint["constrained_columns"] if pk_constraint else [],
+                columns.get(key, []) if columns is not None else None,
+                foreign_keys.get(key, []) if foreign_keys is not None else None,
+                indices.get(key, []) if indices is not None else None,
+                (
+                    unique_constraints.get(key, [])
+                    if unique_constraints is not None
+                    else None
+                ),
+                (
+                    check_constraints.get(key, [])
+                    if check_constraints is not None
+                    else None
+                ),
+            )
+
+        return schemas
+
     def _extract_table(
         self, inspector, table_name: str, schema_name: str
     ) -> TableSchema:
+        schema_config = self.config["schema"]
         pk_constraint = inspector.get_pk_constraint(table_name, schema=schema_name)
 
-        schema: TableSchema = {
+        return self._build_table_schema(
+            table_name,
+            pk_constraint["constrained_columns"],
+            (
+                inspector.get_columns(table_name, schema=schema_name)
+                if schema_config["include_columns"]
+                else None
+            ),
+            (
+                inspector.get_foreign_keys(table_name, schema=schema_name)
+                if schema_config["include_foreign_keys"]
+                else None
+            ),
+            (
+                inspector.get_indexes(table_name, schema=schema_name)
+                if schema_config["include_indices"]
+                else None
+            ),
+            (
+                inspector.get_unique_constraints(table_name, schema=schema_name)
+                if schema_config["include_constraints"]
+                else None
+            ),
+            (
+                inspector.get_check_constraints(table_name, schema=schema_name)
+                if schema_config["include_constraints"]
+                else None
+            ),
+        )
+
+    def _build_table_schema(
+        self,
+        table_name: str,
+        primary_keys: List[str],
+        columns: Optional[List[Dict[str, Any]]],
+        foreign_keys: Optional[List[Dict[str, Any]]],
+        indices: Optional[List[Dict[str, Any]]],
+        unique_constraints: Optional[List[Dict[str, Any]]],
+        check_constraints: Optional[List[Dict[str, Any]]],
+    ) -> TableSchema:
+        return {
             "name": table_name,
             "columns": (
-                self._extract_columns(
-                    inspector.get_columns(table_name, schema=schema_name)
-                )
-                if self.config["schema"]["include_columns"]
-                else None
+                self._extract_columns(columns) if columns is not None else None
             ),
-            "primary_keys": pk_constraint["constrained_columns"],
+            "primary_keys": primary_keys,
             "foreign_keys": (
-                self._extract_foreign_keys(
-                    inspector.get_foreign_keys(table_name, schema=schema_name)
-                )
-                if self.config["schema"]["include_foreign_keys"]
+                self._extract_foreign_keys(foreign_keys)
+                if foreign_keys is not None
                 else None
             ),
             "indices": (
-                self._extract_indices(
-                    inspector.get_indexes(table_name, schema=schema_name)
-                )
-                if self.config["schema"]["include_indices"]
-                else None
+                self._extract_indices(indices) if indices is not None else None
             ),
             "unique_constraints": (
-                self._extract_constraints(
-                    inspector.get_unique_constraints(table_name, schema=schema_name)
-                )
-                if self.config["schema"]["include_constraints"]
+                self._extract_constraints(unique_constraints)
+                if unique_constraints is not None
                 else None
             ),
             "check_constraints": (
-                self._extract_constraints(
-                    inspector.get_check_constraints(table_name, schema=schema_name)
-                )
-                if self.config["schema"]["include_constraints"]
+                self._extract_constraints(check_constraints)
+                if check_constraints is not None
                 else None
             ),
         }
 
-        return schema
-
     def _extract_columns(self, columns: List[Dict[str, Any]]) -> List[ColumnInfo]:
         return [
             {
@@ -126,10 +282,11 @@ class SchemaExtractor:
     def _extract_constraints(
         self, constraints: List[Dict[str, Any]]
     ) -> List[ConstraintInfo]:
+        # Check constraints are reflected with "sqltext" and no column list
         return [
             {
                 "name": constraint["name"],
-                "columns": constraint["column_names"],
+                "columns": constraint.get("column_names", []),
             }
             for constraint in constraints
         ]
@@ -1,22 +1,44 @@
+import asyncio
+import hashlib
 import json
 import logging
+import pickle
+import threading
 import time
+from concurrent.futures import Executor, Future, ThreadPoolExecutor
+from dataclasses import replace
 from functools import wraps
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
 import yaml
 from sqlalchemy.engine import Engine
 
 from schema_search.schema_extractor import SchemaExtractor
 from schema_search.databricks_schema_extractor import DatabricksSchemaExtractor
+from schema_search.postgres_schema_extractor import PostgresSchemaExtractor
+from schema_search.mysql_schema_extractor import MySQLSchemaExtractor
+from schema_search.sqlite_schema_extractor import SQLiteSchemaExtractor
 from schema_search.chunkers import Chunk, create_chunker
-from schema_search.embedding_cache import create_embedding_cache
+from schema_search.embedding_cache import (
+    create_embedding_cache,
+    prune_embedding_store,
+)
 from schema_search.embedding_cache.bm25 import BM25Cache
 from schema_search.graph_builder import GraphBuilder
+from schema_search.schema_diff import SchemaDiff, diff_schemas
 from schema_search.search import create_search_strategy
-from schema_search.types import IndexResult, SearchResult, SearchType, TableSchema
+from schema_search.search.table_index import TableIndex
+from schema_search.types import (
+    IndexResult,
+    SearchResult,
+    SearchResultItem,
+    SearchType,
+    TableSchema,
+)
 from schema_search.rankers import create_ranker
+from schema_search.utils.lru_cache import LRUCache
+from schema_search.utils.rw_lock import ReadWriteLock
 
 
 logger = logging.getLogger(__name__)
@@ -34,12 +56,22 @@ def time_it(func):
             result["latency_sec"] = round(elapsed, 3)
         elif isinstance(result, SearchResult):
             result.latency_sec = round(elapsed, 3)
+        elif isinstance(result, list):
+            # A batch reports each query's share of the wall time
+            for item in result:
+                item.latency_sec = round(elapsed / len(result), 3)
 
         return result
 
     return wrapper
 
 
+def _copy_results(results: List[SearchResultItem]) -> List[SearchResultItem]:
+    # Result items are plain dicts and lists; a pickle round trip copies them
+    # about four times faster than copy.deepcopy
+    return pickle.loads(pickle.dumps(results, pickle.HIGHEST_PROTOCOL))
+
+
 class SchemaSearch:
     def __init__(
         self,
@@ -47,32 +79,49 @@ class SchemaSearch:
         config_path: Optional[str] = None,
         llm_api_key: Optional[str] = None,
         llm_base_url: Optional[str] = None,
+        executor: Optional[Executor] = None,
     ):
         self.config = self._load_config(config_path)
         self._setup_logging()
 
         base_cache_dir = Path(self.config["embedding"]["cache_dir"])
-        db_name = engine.url.database or "default"
-        cache_dir = base_cache_dir / db_name
+        cache_dir = base_cache_dir / self._cache_dir_name(engine)
         cache_dir.mkdir(parents=True, exist_ok=True)
 
         self.schemas: Dict[str, TableSchema] = {}
         self.chunks: List[Chunk] = []
+        self.table_index = TableIndex([])
         self.cache_dir = cache_dir
 
         self._validate_dependencies()
 
-        if engine.dialect.name == "databricks":
-            self.schema_extractor = DatabricksSchemaExtractor(engine, self.config)
-        else:
-            self.schema_extractor = SchemaExtractor(engine, self.config)
+        self.schema_extractor = self._create_schema_extractor(engine)
         self.chunker = create_chunker(self.config, llm_api_key, llm_base_url)
         self._embedding_cache = None
         self._bm25_cache = None
-        self.graph_builder = GraphBuilder(cache_dir)
+        self.graph_builder = GraphBuilder(
+            cache_dir,
+            neighbor_cache_size=self.config["search"].get("neighbor_cache_size", 4096),
+        )
         self._reranker = None
         self._reranker_config = self.config["reranker"]["model"]
         self._search_strategies = {}
+        self.result_cache = LRUCache(
+            maxsize=self.config["search"].get("result_cache_size", 256),
+            ttl_sec=self.config["search"].get("result_cache_ttl_sec", 300),
+        )
+        # Searches share the index state; index() swaps it out exclusively
+        self._state_lock = ReadWriteLock()
+        self._executor = executor
+        self._owns_executor = False
+        self._inflight: Dict[tuple, Future] = {}
+        self._inflight_lock = threading.Lock()
+        # Lazy state is built once under a lock; later reads skip the lock
+        self._init_lock = threading.RLock()
+        self._embeddings_lock = threading.Lock()
+        self._bm25_lock = threading.Lock()
+        self._embeddings_ready = False
+        self._bm25_ready = False
 
     def _setup_logging(self) -> None:
         level = getattr(logging, self.config["logging"]["level"])
@@ -83,6 +132,16 @@ class SchemaSearch:
         )
         logger.setLevel(level)
 
+    def _cache_dir_name(self, engine: Engine) -> str:
+        database = engine.url.database or "default"
+        if engine.dialect.name != "sqlite" or database == ":memory:":
+            return database
+        # SQLite databases are file paths: keep the file name for readability
+        # and key on the resolved path so same-named files never share a cache
+        path = Path(database).resolve()
+        digest = hashlib.sha256(str(path).encode()).hexdigest()[:16]
+        return f"{path.name}-{digest}"
+
     def _load_config(self, config_path: Optional[str]) -> Dict:
         if config_path is None:
             config_path = str(Path(__file__).parent.parent / "config.yml")
@@ -90,6 +149,20 @@ class SchemaSearch:
         with open(config_path) as f:
             return yaml.safe_load(f)
 
+    def _create_schema_extractor(self, engine: Engine):
+        dialect = engine.dialect.name
+        native = self.config["schema"].get("native_extraction", True)
+
+        if dialect == "databricks":
+            return DatabricksSchemaExtractor(engine, self.config)
+        if native and dialect == "postgresql":
+            return PostgresSchemaExtractor(engine, self.config)
+        if native and dialect in ("mysql", "mariadb"):
+            return MySQLSchemaExtractor(engine, self.config)
+        if native and dialect == "sqlite":
+            return SQLiteSchemaExtractor(engine, self.config)
+        return SchemaExtractor(engine, self.config)
+
     def _validate_dependencies(self) -> None:
         from schema_search.utils.lazy_import import lazy_import_check
 
@@ -110,25 +183,49 @@ class SchemaSearch:
 
     @time_it
     def index(self, force: bool = False) -> IndexResult:
+        with self._state_lock.write():
+            return self._index(force)
+
+    def _index(self, force: bool) -> IndexResult:
         logger.info("Starting schema indexing" + (" (force)" if force else ""))
 
-        current_schema = self._extract_current_schema()
+        # Probe before extracting so a change made mid-extraction is caught next time
+        fingerprint = self._get_catalog_fingerprint()
+
+        current_schema = None
+        if not force and fingerprint is not None:
+            current_schema = self._load_schema_if_unchanged(fingerprint)
 
-        schema_changed = False
-        if not force:
-            cached_schema = self._load_cached_schema()
-            schema_changed = self._schema_has_changed(cached_schema, current_schema)
-            if schema_changed:
-                logger.info("Schema change detected; forcing reindex")
+        rebuild = force
+        diff = SchemaDiff()
+        if current_schema is None:
+            current_schema = self._extract_current_schema()
 
-        self._cache_schema(current_schema)
+            if not force:
+                cached_schema = self._load_cached_schema()
+                if cached_schema is None:
+                    rebuild = True
+                else:
+                    diff = diff_schemas(cached_schema, current_schema)
+                    if diff:
+                        logger.info(f"Schema change detected: {diff}")
 
-        effective_force = force or schema_changed
+            self._cache_schema(current_schema)
+            self._cache_fingerprint(fingerprint)
 
         self.schemas = current_schema
-        self.graph_builder.build(self.schemas, effective_force)
-        self.chunks = self._load_or_generate_chunks(self.schemas, effective_force)
-        self._index_force = effective_force
+        if diff and not rebuild:
+            self.graph_builder.update(self.schemas, diff)
+            self.chunks = self._update_chunks(self.schemas, diff)
+        else:
+            self.graph_builder.build(self.schemas, rebuild)
+            self.chunks = self._load_or_generate_chunks(self.schemas, rebuild)
+        self.table_index = TableIndex(self.chunks)
+        self._index_force = force
+
+        if rebuild or diff:
+            self._refresh_search_caches()
+            self.result_cache.clear()
 
         logger.info(
             f"Indexing complete: {len(self.schemas)} tables, {len(self.chunks)} chunks"
@@ -139,6 +236,56 @@ class SchemaSearch:
             "latency_sec": 0.0,
         }
 
+    def prune_embedding_store(self) -> int:
+        """Drop shared-store vectors that no database under cache_dir still uses.
+
+        Returns the number of vectors deleted.
+        """
+        return prune_embedding_store(self.config)
+
+    def _get_catalog_fingerprint(self) -> Optional[str]:
+        catalog_fingerprint = self.schema_extractor.fingerprint()
+        if catalog_fingerprint is None:
+            return None
+
+        # Extractor choice and schema options also shape the extracted metadata
+        payload = {
+            "catalog": catalog_fingerprint,
+            "extractor": type(self.schema_extractor).__name__,
+            "schema_config": self.config["schema"],
+        }
+        return hashlib.sha256(
+            json.dumps(payload, sort_keys=True).encode()
+        ).hexdigest()
+
+    def _load_schema_if_unchanged(
+        self, fingerprint: str
+    ) -> Optional[Dict[str, TableSchema]]:
+        fingerprint_cache = self.cache_dir / "catalog_fingerprint.json"
+        if not fingerprint_cache.exists():
+            return None
+
+        with open(fingerprint_cache) as f:
+            cached_fingerprint = json.load(f)["fingerprint"]
+
+        if cached_fingerprint != fingerprint:
+            logger.debug("Catalog fingerprint changed")
+            return None
+
+        cached_schema = self._load_cached_schema()
+        if cached_schema is not None:
+            logger.info("Catalog fingerprint unchanged; skipping schema extraction")
+        return cached_schema
+
+    def _cache_fingerprint(self, fingerprint: Optional[str]) -> None:
+        fingerprint_cache = self.cache_dir / "catalog_fingerprint.json"
+        if fingerprint is None:
+            fingerprint_cache.unlink(missing_ok=True)
+            return
+
+        with open(fingerprint_cache, "w") as f:
+            json.dump({"fingerprint": fingerprint}, f)
+
     def _extract_current_schema(self) -> Dict[str, TableSchema]:
         logger.info("Extracting schema from database")
         return self.schema_extractor.extract()
@@ -158,19 +305,6 @@ class SchemaSearch:
         with open(schema_cache, "w") as f:
             json.dump(schema, f, indent=2)
 
-    def _schema_has_changed(
-        self,
-        cached_schema: Optional[Dict[str, TableSchema]],
-        current_schema: Dict[str, TableSchema],
-    ) -> bool:
-        if cached_schema is None:
-            return True
-        if cached_schema != current_schema:
-            logger.debug("Cached schema differs from current schema")
-            return True
-        logger.debug("Schema matches cached version; reuse existing index")
-        return False
-
     def _load_or_generate_chunks(
         self, schemas: Dict[str, TableSchema], force: bool
     ) -> List[Chunk]:
@@ -178,21 +312,60 @@ class SchemaSearch:
 
         if not force and chunks_cache.exists():
             logger.info(f"Loading chunks from cache: {chunks_cache}")
-            with open(chunks_cache) as f:
-                chunk_data = json.load(f)
-                return [
-                    Chunk(
-                        table_name=c["table_name"],
-                        content=c["content"],
-                        chunk_id=c["chunk_id"],
-                        token_count=c["token_count"],
-                    )
-                    for c in chunk_data
-                ]
+            return self._load_cached_chunks()
 
         logger.info("Generating chunks from schemas")
         chunks = self.chunker.chunk_schemas(schemas)
+        self._cache_chunks(chunks)
+
+        return chunks
+
+    def _update_chunks(
+        self, schemas: Dict[str, TableSchema], diff: SchemaDiff
+    ) -> List[Chunk]:
+        chunks_cache = self.cache_dir / "chunk_metadata.json"
+        if not chunks_cache.exists():
+            return self._load_or_generate_chunks(schemas, force=True)
+
+        logger.info(f"Re-chunking {len(diff.affected)} changed tables")
+        stale = set(diff.removed) | set(diff.modified)
+        chunks_by_table: Dict[str, List[Chunk]] = {}
+        for chunk in self._load_cached_chunks():
+            if chunk.table_name not in stale:
+                chunks_by_table.setdefault(chunk.table_name, []).append(chunk)
+
+        new_chunks = self.chunker.chunk_schemas(
+            {table_name: schemas[table_name] for table_name in diff.affected}
+        )
+        for chunk in new_chunks:
+            chunks_by_table.setdefault(chunk.table_name, []).append(chunk)
+
+        # Keep schema order and renumber so chunk ids stay dense
+        chunks: List[Chunk] = []
+        for table_name in schemas:
+            for chunk in chunks_by_table.get(table_name, []):
+                chunk.chunk_id = len(chunks)
+                chunks.append(chunk)
+
+        self._cache_chunks(chunks)
+        return chunks
+
+    def _load_cached_chunks(self) -> List[Chunk]:
+        chunks_cache = self.cache_dir / "chunk_metadata.json"
+        with open(chunks_cache) as f:
+            chunk_data = json.load(f)
+            return [
+                Chunk(
+                    table_name=c["table_name"],
+                    content=c["content"],
+                    chunk_id=c["chunk_id"],
+                    token_count=c["token_count"],
+                )
+                for c in chunk_data
+            ]
 
+    def _cache_chunks(self, chunks: List[Chunk]) -> None:
+        chunks_cache = self.cache_dir / "chunk_metadata.json"
         with open(chunks_cache, "w") as f:
             chunk_data = [
                 {
@@ -205,16 +378,31 @@ class SchemaSearch:
             ]
             json.dump(chunk_data, f, indent=2)
 
-        return chunks
+    def _refresh_search_caches(self) -> None:
+        # Caches already loaded in this process were built from the old chunks
+        embedding_cache = self._embedding_cache
+        if embedding_cache is not None and embedding_cache.is_loaded():
+            embedding_cache.load_or_generate(
+                self.chunks, self._index_force, self.config["chunking"]
+            )
+        if self._bm25_cache is not None and self._bm25_cache.bm25 is not None:
+            logger.info("Rebuilding BM25 index")
+            self._bm25_cache.load_or_build(self.chunks)
 
     def _get_embedding_cache(self):
         if self._embedding_cache is None:
-            self._embedding_cache = create_embedding_cache(self.config, self.cache_dir)
+            with self._init_lock:
+                if self._embedding_cache is None:
+                    self._embedding_cache = create_embedding_cache(
+                        self.config, self.cache_dir
+                    )
         return self._embedding_cache
 
     def _get_reranker(self):
         if self._reranker is None and self._reranker_config:
-            self._reranker = create_ranker(self.config)
+            with self._init_lock:
+                if self._reranker is None:
+                    self._reranker = create_ranker(self.config)
         return self._reranker
 
     @property
@@ -227,32 +415,50 @@ class SchemaSearch:
 
     def _get_bm25_cache(self):
         if self._bm25_cache is None:
-            self._bm25_cache = BM25Cache()
+            with self._init_lock:
+                if self._bm25_cache is None:
+                    self._bm25_cache = BM25Cache(self.cache_dir)
         return self._bm25_cache
 
     def _ensure_embeddings_loaded(self):
-        cache = self._get_embedding_cache()
-        if cache.embeddings is None:
-            cache.load_or_generate(
-                self.chunks, self._index_force, self.config["chunking"]
-            )
+        # is_loaded() turns true before a load finishes, so readers go by the
+        # flag, which is only set once the cache is complete
+        if self._embeddings_ready:
+            return
+
+        with self._embeddings_lock:
+            cache = self._get_embedding_cache()
+            if not cache.is_loaded():
+                cache.load_or_generate(
+                    self.chunks, self._index_force, self.config["chunking"]
+                )
+            self._embeddings_ready = True
 
     def _ensure_bm25_built(self):
-        cache = self._get_bm25_cache()
-        if cache.bm25 is None:
-            logger.info("Building BM25 index")
-            cache.build(self.chunks)
+        if self._bm25_ready:
+            return
+
+        with self._bm25_lock:
+            cache = self._get_bm25_cache()
+            if cache.bm25 is None:
+                cache.load_or_build(self.chunks)
+            self._bm25_ready = True
 
     def _get_search_strategy(self, search_type: str):
-        if search_type not in self._search_strategies:
-            self._search_strategies[search_type] = create_search_strategy(
-                self.config,
-                self._get_embedding_cache,
-                self._get_bm25_cache,
-                self._get_reranker,
-                search_type,
-            )
-        return self._search_strategies[search_type]
+        strategy = self._search_strategies.get(search_type)
+        if strategy is None:
+            with self._init_lock:
+                strategy = self._search_strategies.get(search_type)
+                if strategy is None:
+                    strategy = create_search_strategy(
+                        self.config,
+                        self._get_embedding_cache,
+                        self._get_bm25_cache,
+                        self._get_reranker,
+                        search_type,
+                    )
+                    self._search_strategies[search_type] = strategy
+        return strategy
 
     @time_it
     def search(
@@ -263,6 +469,44 @@ class SchemaSearch:
         search_type: Optional[SearchType] = None,
         output_format: Optional[str] = None,
     ) -> SearchResult:
+        return self._search_batch([query], hops, limit, search_type, output_format)[0]
+
+    @time_it
+    def search_many(
+        self,
+        queries: List[str],
+        hops: Optional[int] = None,
+        limit: Optional[int] = None,
+        search_type: Optional[SearchType] = None,
+        output_format: Optional[str] = None,
+    ) -> List[SearchResult]:
+        """Search several queries at once, one SearchResult per query, in order.
+
+        Query encoding, semantic scoring and reranking run once for the whole
+        batch, which is much faster than calling search() in a loop.
+        """
+        return self._search_batch(queries, hops, limit, search_type, output_format)
+
+    def _search_batch(
+        self,
+        queries: List[str],
+        hops: Optional[int],
+        limit: Optional[int],
+        search_type: Optional[SearchType],
+        output_format: Optional[str],
+    ) -> List[SearchResult]:
+        with self._state_lock.read():
+            return self._search_unlocked(
+                queries, *self._search_params(hops, limit, search_type, output_format)
+            )
+
+    def _search_params(
+        self,
+        hops: Optional[int],
+        limit: Optional[int],
+        search_type: Optional[SearchType],
+        output_format: Optional[str],
+    ) -> Tuple[int, int, str, str]:
         if hops is None:
             hops = int(self.config["search"]["hops"])
         if limit is None:
@@ -271,26 +515,131 @@ class SchemaSearch:
         # Ensure output_format is never None
         output_format = output_format or self.config["output"]["format"]
 
-        logger.debug(f"Searching: {query} (hops={hops}, search_type={search_type})")
-
         search_type = search_type or self.config["search"]["strategy"]
+        return hops, limit, search_type, output_format
 
-        if search_type in ["semantic", "hybrid"]:
-            self._ensure_embeddings_loaded()
-
-        if search_type in ["bm25", "hybrid"]:
-            self._ensure_bm25_built()
+    def _search_unlocked(
+        self,
+        queries: List[str],
+        hops: int,
+        limit: int,
+        search_type: str,
+        output_format: str,
+    ) -> List[SearchResult]:
+        logger.debug(
+            f"Searching {len(queries)} queries (hops={hops}, search_type={search_type})"
+        )
 
-        strategy = self._get_search_strategy(search_type)
+        cache_keys = [
+            self._cache_key(query, hops, limit, search_type, output_format)
+            for query in queries
+        ]
+        found: Dict[tuple, list] = {}
+        pending: Dict[tuple, str] = {}
+        for cache_key, query in zip(cache_keys, queries):
+            if cache_key in found or cache_key in pending:
+                continue
+            cached = self.result_cache.get(cache_key)
+            if cached is not None:
+                found[cache_key] = cached
+            else:
+                pending[cache_key] = query
+
+        if pending:
+            if search_type in ["semantic", "hybrid"]:
+                self._ensure_embeddings_loaded()
+
+            if search_type in ["bm25", "hybrid"]:
+                self._ensure_bm25_built()
+
+            strategy = self._get_search_strategy(search_type)
+
+            batch_results = strategy.search_many(
+                list(pending.values()),
+                self.schemas,
+                self.chunks,
+                self.table_index,
+                self.graph_builder,
+                hops,
+                limit,
+            )
 
-        results = strategy.search(
-            query, self.schemas, self.chunks, self.graph_builder, hops, limit
-        )
+            for cache_key, results in zip(pending, batch_results):
+                logger.debug(f"Found {len(results)} results")
+                self.result_cache.put(cache_key, results)
+                found[cache_key] = results
+
+        # Cached items (and the schemas inside them) are shared; every caller
+        # gets a copy it is free to modify
+        return [
+            SearchResult(
+                results=_copy_results(found[cache_key]),
+                latency_sec=0.0,
+                output_format=output_format,
+            )
+            for cache_key in cache_keys
+        ]
 
-        logger.debug(f"Found {len(results)} results")
+    def _cache_key(
+        self, query: str, hops: int, limit: int, search_type: str, output_format: str
+    ) -> tuple:
+        # Whitespace only: case can matter to the embedding and fuzzy scorers
+        return (" ".join(query.split()), search_type, hops, limit, output_format)
 
-        return SearchResult(
-            results=results,
-            latency_sec=0.0,
-            output_format=output_format
-        )
+    async def asearch(
+        self,
+        query: str,
+        hops: Optional[int] = None,
+        limit: Optional[int] = None,
+        search_type: Optional[SearchType] = None,
+        output_format: Optional[str] = None,
+    ) -> SearchResult:
+        """search() on the executor; identical queries in flight share one run."""
+        params = self._search_params(hops, limit, search_type, output_format)
+        key = ("search",) + self._cache_key(query, *params)
+        result = await self._run_coalesced(key, self.search, query, *params)
+        # Coalesced callers each get their own copy of the results
+        return replace(result, results=_copy_results(result.results))
+
+    async def aindex(self, force: bool = False) -> IndexResult:
+        """index() on the executor; concurrent calls join the one in flight."""
+        result = await self._run_coalesced(("index", force), self.index, force)
+        return IndexResult(**result)
+
+    async def _run_coalesced(self, key: tuple, fn: Callable, *args) -> Any:
+        with self._inflight_lock:
+            future = self._inflight.get(key)
+            submitted = future is None
+            if future is None:
+                future = self._get_executor().submit(fn, *args)
+                self._inflight[key] = future
+
+        if submitted:
+            future.add_done_callback(lambda done: self._forget_inflight(key, done))
+        # A cancelled caller stops waiting; the run it shares with others goes on
+        return await asyncio.shield(asyncio.wrap_future(future))
+
+    def _forget_inflight(self, key: tuple, future: Future) -> None:
+        with self._inflight_lock:
+            if self._inflight.get(key) is future:
+                del self._inflight[key]
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.config["search"].get("async_workers", 4),
+                thread_name_prefix="schema-search",
+            )
+            self._owns_executor = True
+        return self._executor
+
+    def close(self) -> None:
+        """Shut down the thread pool behind asearch() and aindex().
+
+        An executor passed to the constructor belongs to the caller and is left
+        running. A later async call starts a new pool.
+        """
+        if self._owns_executor and self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+            self._owns_executor = False
@@ -1,60 +1,112 @@
-from typing import Dict, List, Optional
+from typing import Dict, List, NamedTuple, Optional
 from abc import ABC, abstractmethod
 
+import numpy as np
+
 from schema_search.types import TableSchema, SearchResultItem
 from schema_search.chunkers import Chunk
 from schema_search.graph_builder import GraphBuilder
 from schema_search.rankers.base import BaseRanker
+from schema_search.search.table_index import TableIndex, pool_scores
+
+# Most chunks per table a pooled retrieval budgets for; one very wide table
+# would otherwise multiply every query's pool and defeat top-k pruning
+MAX_POOL_CHUNKS_PER_TABLE = 4
+
+
+class Candidate(NamedTuple):
+    """A ranked table before its schema and related tables are attached."""
+
+    table_name: str
+    score: float
+    # Position of the matched chunk in the chunk list; None for table-level hits
+    chunk_idx: Optional[int] = None
 
 
 class BaseSearchStrategy(ABC):
     def __init__(
-        self, reranker: Optional[BaseRanker], initial_top_k: int, rerank_top_k: int
+        self,
+        reranker: Optional[BaseRanker],
+        initial_top_k: int,
+        rerank_top_k: int,
+        aggregation: str = "none",
     ):
         self.reranker = reranker
         self.initial_top_k = initial_top_k
         self.rerank_top_k = rerank_top_k
+        self.aggregation = aggregation
 
     def search(
         self,
         query: str,
         schemas: Dict[str, TableSchema],
         chunks: List[Chunk],
+        table_index: TableIndex,
         graph_builder: GraphBuilder,
         hops: int,
         limit: int,
     ) -> List[SearchResultItem]:
-        initial_results = self._initial_ranking(
-            query, schemas, chunks, graph_builder, hops
-        )
+        return self.search_many(
+            [query], schemas, chunks, table_index, graph_builder, hops, limit
+        )[0]
 
-        if self.reranker is None:
-            return initial_results[:limit]
-
-        initial_chunks = []
-        for result in initial_results:
-            for chunk in chunks:
-                if chunk.table_name == result["table"]:
-                    initial_chunks.append(chunk)
-                    break
-
-        self.reranker.build(initial_chunks)
-        ranked = self.reranker.rank(query)
-
-        reranked_results: List[SearchResultItem] = []
-        for chunk_idx, score in ranked[: self.rerank_top_k]:
-            chunk = initial_chunks[chunk_idx]
-            result = self._build_result_item(
-                table_name=chunk.table_name,
-                score=score,
-                schema=schemas[chunk.table_name],
-                matched_chunks=[chunk.content],
-                graph_builder=graph_builder,
-                hops=hops,
-            )
-            reranked_results.append(result)
+    def search_many(
+        self,
+        queries: List[str],
+        schemas: Dict[str, TableSchema],
+        chunks: List[Chunk],
+        table_index: TableIndex,
+        graph_builder: GraphBuilder,
+        hops: int,
+        limit: int,
+    ) -> List[List[SearchResultItem]]:
+        rankings = self._initial_ranking_many(queries, schemas, chunks, table_index)
+
+        if self.reranker is not None:
+            rankings = self._rerank(queries, rankings, chunks, table_index)
+
+        # Only the results actually returned get a schema and graph expansion
+        return [
+            [
+                self._build_result_item(candidate, schemas, chunks, graph_builder, hops)
+                for candidate in candidates[:limit]
+            ]
+            for candidates in rankings
+        ]
+
+    def _rerank(
+        self,
+        queries: List[str],
+        rankings: List[List[Candidate]],
+        chunks: List[Chunk],
+        table_index: TableIndex,
+    ) -> List[List[Candidate]]:
+        assert self.reranker is not None
+
+        # Rerank the chunk each candidate matched on; table-level hits fall
+        # back to the table's first chunk
+        chunk_positions = [
+            [
+                candidate.chunk_idx
+                if candidate.chunk_idx is not None
+                else table_index.table_chunks[candidate.table_name][0]
+                for candidate in candidates
+            ]
+            for candidates in rankings
+        ]
 
-        return reranked_results[:limit]
+        scored = self.reranker.rank_many(
+            queries,
+            [[chunks[p] for p in positions] for positions in chunk_positions],
+        )
+
+        return [
+            [
+                Candidate(chunks[positions[idx]].table_name, score, positions[idx])
+                for idx, score in ranked[: self.rerank_top_k]
+            ]
+            for positions, ranked in zip(chunk_positions, scored)
+        ]
 
     @abstractmethod
     def _initial_ranking(
@@ -62,24 +114,84 @@ class BaseSearchStrategy(ABC):
         query: str,
         schemas: Dict[str, TableSchema],
         chunks: List[Chunk],
-        graph_builder: GraphBuilder,
-        hops: int,
-    ) -> List[SearchResultItem]:
+        table_index: TableIndex,
+    ) -> List[Candidate]:
         pass
 
+    def _initial_ranking_many(
+        self,
+        queries: List[str],
+        schemas: Dict[str, TableSchema],
+        chunks: List[Chunk],
+        table_index: TableIndex,
+    ) -> List[List[Candidate]]:
+        return [
+            self._initial_ranking(query, schemas, chunks, table_index)
+            for query in queries
+        ]
+
+    def _chunk_pool_size(self, table_index: TableIndex) -> int:
+        """Chunks to retrieve so pooling usually yields initial_top_k tables.
+
+        Pooling only sees the retrieved chunks: "max" is exact while no table
+        has more than MAX_POOL_CHUNKS_PER_TABLE chunks, but "sum" and
+        "top2_mean" miss any of a table's chunks that fall outside the pool.
+        Exact semantic and hybrid scans pool every chunk instead.
+        """
+        if self.aggregation == "none":
+            return self.initial_top_k
+        chunks_per_table = min(
+            table_index.max_chunks_per_table, MAX_POOL_CHUNKS_PER_TABLE
+        )
+        return self.initial_top_k * chunks_per_table
+
+    def _select(
+        self,
+        indices: np.ndarray,
+        scores: np.ndarray,
+        chunks: List[Chunk],
+        table_index: TableIndex,
+    ) -> List[Candidate]:
+        """Top initial_top_k candidates from scored chunks, pooled per table."""
+        if self.aggregation == "none":
+            order = np.argsort(-scores, kind="stable")[: self.initial_top_k]
+            return [
+                Candidate(
+                    chunks[indices[o]].table_name, float(scores[o]), int(indices[o])
+                )
+                for o in order
+            ]
+
+        tables, pooled, best = pool_scores(
+            table_index.chunk_tables[indices], scores, self.aggregation
+        )
+        order = np.argsort(-pooled, kind="stable")[: self.initial_top_k]
+        return [
+            Candidate(
+                table_index.table_names[tables[o]],
+                float(pooled[o]),
+                int(indices[best[o]]),
+            )
+            for o in order
+        ]
+
     def _build_result_item(
         self,
-        table_name: str,
-        score: float,
-        schema: TableSchema,
-        matched_chunks: List[str],
+        candidate: Candidate,
+        schemas: Dict[str, TableSchema],
+        chunks: List[Chunk],
         graph_builder: GraphBuilder,
         hops: int,
     ) -> SearchResultItem:
+        matched_chunks = []
+        if candidate.chunk_idx is not None:
+            matched_chunks.append(chunks[candidate.chunk_idx].content)
         return {
-            "table": table_name,
-            "score": score,
-            "schema": schema,
+            "table": candidate.table_name,
+            "score": float(candidate.score),
+            "schema": schemas[candidate.table_name],
             "matched_chunks": matched_chunks,
-            "related_tables": list(graph_builder.get_neighbors(table_name, hops)),
+            "related_tables": list(
+                graph_builder.get_neighbors(candidate.table_name, hops)
+            ),
         }
@@ -1,9 +1,9 @@
 from typing import Dict, List, Optional, TYPE_CHECKING
 
-from schema_search.search.base import BaseSearchStrategy
-from schema_search.types import TableSchema, SearchResultItem
+from schema_search.search.base import BaseSearchStrategy, Candidate
+from schema_search.search.table_index import TableIndex
+from schema_search.types import TableSchema
 from schema_search.chunkers import Chunk
-from schema_search.graph_builder import GraphBuilder
 from schema_search.rankers.base import BaseRanker
 
 if TYPE_CHECKING:
@@ -17,8 +17,9 @@ class BM25SearchStrategy(BaseSearchStrategy):
         initial_top_k: int,
         rerank_top_k: int,
         reranker: Optional[BaseRanker],
+        aggregation: str = "none",
     ):
-        super().__init__(reranker, initial_top_k, rerank_top_k)
+        super().__init__(reranker, initial_top_k, rerank_top_k, aggregation)
         self.bm25_cache = bm25_cache
 
     def _initial_ranking(
@@ -26,23 +27,22 @@ class BM25SearchStrategy(BaseSearchStrategy):
         query: str,
         schemas: Dict[str, TableSchema],
         chunks: List[Chunk],
-        graph_builder: GraphBuilder,
-        hops: int,
-    ) -> List[SearchResultItem]:
-        scores = self.bm25_cache.get_scores(query)
-        top_indices = scores.argsort()[::-1][: self.initial_top_k]
+        table_index: TableIndex,
+    ) -> List[Candidate]:
+        return self._initial_ranking_many([query], schemas, chunks, table_index)[0]
 
-        results: List[SearchResultItem] = []
-        for idx in top_indices:
-            chunk = chunks[idx]
-            result = self._build_result_item(
-                table_name=chunk.table_name,
-                score=float(scores[idx]),
-                schema=schemas[chunk.table_name],
-                matched_chunks=[chunk.content],
-                graph_builder=graph_builder,
-                hops=hops,
-            )
-            results.append(result)
-
-        return results
+    def _initial_ranking_many(
+        self,
+        queries: List[str],
+        schemas: Dict[str, TableSchema],
+        chunks: List[Chunk],
+        table_index: TableIndex,
+    ) -> List[List[Candidate]]:
+        # Pruned retrieval of enough chunks that max pooling is exact
+        rankings = self.bm25_cache.top_k_many(
+            queries, self._chunk_pool_size(table_index)
+        )
+        return [
+            self._select(top_indices, top_scores, chunks, table_index)
+            for top_indices, top_scores in rankings
+        ]
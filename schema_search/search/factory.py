@@ -5,6 +5,7 @@ from schema_search.search.fuzzy import FuzzySearchStrategy
 from schema_search.search.bm25 import BM25SearchStrategy
 from schema_search.search.hybrid import HybridSearchStrategy
 from schema_search.search.base import BaseSearchStrategy
+from schema_search.search.table_index import AGGREGATIONS
 from schema_search.embedding_cache import BaseEmbeddingCache
 from schema_search.rankers.base import BaseRanker
 
@@ -21,6 +22,9 @@ def create_search_strategy(
 
     initial_top_k = search_config["initial_top_k"]
     rerank_top_k = search_config["rerank_top_k"]
+    aggregation = search_config.get("table_aggregation", "none")
+    if aggregation not in AGGREGATIONS:
+        raise ValueError(f"Unknown table aggregation: {aggregation}")
 
     reranker = get_reranker()
 
@@ -30,6 +34,7 @@ def create_search_strategy(
             initial_top_k=initial_top_k,
             rerank_top_k=rerank_top_k,
             reranker=reranker,
+            aggregation=aggregation,
         )
 
     if strategy_type == "bm25":
@@ -38,6 +43,7 @@ def create_search_strategy(
             initial_top_k=initial_top_k,
             rerank_top_k=rerank_top_k,
             reranker=reranker,
+            aggregation=aggregation,
         )
 
     if strategy_type == "fuzzy":
@@ -56,6 +62,7 @@ def create_search_strategy(
             rerank_top_k=rerank_top_k,
             reranker=reranker,
             semantic_weight=semantic_weight,
+            aggregation=aggregation,
         )
 
     raise ValueError(f"Unknown search strategy: {strategy_type}")
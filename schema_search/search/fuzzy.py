@@ -2,10 +2,10 @@ from typing import Dict, List, Optional
 
 from rapidfuzz import fuzz
 
-from schema_search.search.base import BaseSearchStrategy
-from schema_search.types import TableSchema, SearchResultItem
+from schema_search.search.base import BaseSearchStrategy, Candidate
+from schema_search.search.table_index import TableIndex
+from schema_search.types import TableSchema
 from schema_search.chunkers import Chunk
-from schema_search.graph_builder import GraphBuilder
 from schema_search.rankers.base import BaseRanker
 
 
@@ -20,31 +20,19 @@ class FuzzySearchStrategy(BaseSearchStrategy):
         query: str,
         schemas: Dict[str, TableSchema],
         chunks: List[Chunk],
-        graph_builder: GraphBuilder,
-        hops: int,
-    ) -> List[SearchResultItem]:
-        scored_tables: List[tuple[str, float]] = []
+        table_index: TableIndex,
+    ) -> List[Candidate]:
+        # Scores are per table already, so there is nothing to pool
+        scored_tables: List[Candidate] = []
 
         for table_name, schema in schemas.items():
             searchable_text = self._build_searchable_text(table_name, schema)
             score = fuzz.ratio(query, searchable_text, score_cutoff=0) / 100.0
-            scored_tables.append((table_name, score))
-
-        scored_tables.sort(key=lambda x: x[1], reverse=True)
-
-        results: List[SearchResultItem] = []
-        for table_name, score in scored_tables[: self.initial_top_k]:
-            result = self._build_result_item(
-                table_name=table_name,
-                score=score,
-                schema=schemas[table_name],
-                matched_chunks=[],
-                graph_builder=graph_builder,
-                hops=hops,
-            )
-            results.append(result)
-
-        return results
+            scored_tables.append(Candidate(table_name, score))
+
+        scored_tables.sort(key=lambda x: x.score, reverse=True)
+
+        return scored_tables[: self.initial_top_k]
 
     def _build_searchable_text(self, table_name: str, schema: TableSchema) -> str:
         parts = [table_name]
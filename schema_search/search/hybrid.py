@@ -2,11 +2,12 @@ from typing import Dict, List, Optional, TYPE_CHECKING
 
 import numpy as np
 
-from schema_search.search.base import BaseSearchStrategy
-from schema_search.types import TableSchema, SearchResultItem
+from schema_search.search.base import BaseSearchStrategy, Candidate
+from schema_search.search.table_index import TableIndex
+from schema_search.types import TableSchema
 from schema_search.chunkers import Chunk
-from schema_search.graph_builder import GraphBuilder
 from schema_search.embedding_cache import BaseEmbeddingCache
+from schema_search.embedding_cache.base import QUERY_BLOCK_ROWS
 from schema_search.rankers.base import BaseRanker
 
 if TYPE_CHECKING:
@@ -22,8 +23,9 @@ class HybridSearchStrategy(BaseSearchStrategy):
         rerank_top_k: int,
         reranker: Optional[BaseRanker],
         semantic_weight: float,
+        aggregation: str = "none",
     ):
-        super().__init__(reranker, initial_top_k, rerank_top_k)
+        super().__init__(reranker, initial_top_k, rerank_top_k, aggregation)
         assert 0 <= semantic_weight <= 1, "semantic_weight must be between 0 and 1"
         self.embedding_cache = embedding_cache
         self.bm25_cache = bm25_cache
@@ -35,14 +37,66 @@ class HybridSearchStrategy(BaseSearchStrategy):
         query: str,
         schemas: Dict[str, TableSchema],
         chunks: List[Chunk],
-        graph_builder: GraphBuilder,
-        hops: int,
-    ) -> List[SearchResultItem]:
-        query_embedding = self.embedding_cache.encode_query(query)
-        semantic_scores = self.embedding_cache.compute_similarities(query_embedding)
+        table_index: TableIndex,
+    ) -> List[Candidate]:
+        return self._initial_ranking_many([query], schemas, chunks, table_index)[0]
 
-        bm25_scores = self.bm25_cache.get_scores(query)
+    def _initial_ranking_many(
+        self,
+        queries: List[str],
+        schemas: Dict[str, TableSchema],
+        chunks: List[Chunk],
+        table_index: TableIndex,
+    ) -> List[List[Candidate]]:
+        query_embeddings = self.embedding_cache.encode_queries(queries)
+        batch_results: List[List[Candidate]] = []
 
+        if self.embedding_cache.approximate:
+            # Fuse over the union of both retrievers' candidates instead of
+            # scoring every chunk
+            pool_size = self._chunk_pool_size(table_index)
+            semantic_rankings = self.embedding_cache.top_k_many(
+                query_embeddings, pool_size
+            )
+            bm25_rankings = self.bm25_cache.top_k_many(queries, pool_size)
+            for i, query in enumerate(queries):
+                candidates = np.union1d(semantic_rankings[i][0], bm25_rankings[i][0])
+                semantic_scores = self.embedding_cache.score_rows(
+                    query_embeddings[i : i + 1], candidates
+                )
+                bm25_scores = self.bm25_cache.score_rows(query, candidates)
+                batch_results.append(
+                    self._fuse(
+                        candidates, semantic_scores, bm25_scores, chunks, table_index
+                    )
+                )
+            return batch_results
+
+        candidates = np.arange(len(chunks))
+        for start in range(0, len(queries), QUERY_BLOCK_ROWS):
+            # One matrix product scores every chunk for a block of queries
+            semantic_matrix = self.embedding_cache.compute_similarities_many(
+                query_embeddings[start : start + QUERY_BLOCK_ROWS]
+            )
+            bm25_matrix = self.bm25_cache.get_scores_many(
+                queries[start : start + QUERY_BLOCK_ROWS]
+            )
+            for semantic_scores, bm25_scores in zip(semantic_matrix, bm25_matrix):
+                batch_results.append(
+                    self._fuse(
+                        candidates, semantic_scores, bm25_scores, chunks, table_index
+                    )
+                )
+        return batch_results
+
+    def _fuse(
+        self,
+        candidates: np.ndarray,
+        semantic_scores: np.ndarray,
+        bm25_scores: np.ndarray,
+        chunks: List[Chunk],
+        table_index: TableIndex,
+    ) -> List[Candidate]:
         semantic_min = semantic_scores.min()
         semantic_max = semantic_scores.max()
         semantic_range = semantic_max - semantic_min
@@ -64,19 +118,4 @@ class HybridSearchStrategy(BaseSearchStrategy):
             + self.bm25_weight * bm25_scores_norm
         )
 
-        top_indices = hybrid_scores.argsort()[::-1][: self.initial_top_k]
-
-        results: List[SearchResultItem] = []
-        for idx in top_indices:
-            chunk = chunks[idx]
-            result = self._build_result_item(
-                table_name=chunk.table_name,
-                score=float(hybrid_scores[idx]),
-                schema=schemas[chunk.table_name],
-                matched_chunks=[chunk.content],
-                graph_builder=graph_builder,
-                hops=hops,
-            )
-            results.append(result)
-
-        return results
+        return self._select(candidates, hybrid_scores, chunks, table_index)
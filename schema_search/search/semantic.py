@@ -2,11 +2,12 @@ from typing import Dict, List, Optional
 
 import numpy as np
 
-from schema_search.search.base import BaseSearchStrategy
-from schema_search.types import TableSchema, SearchResultItem
+from schema_search.search.base import BaseSearchStrategy, Candidate
+from schema_search.search.table_index import TableIndex
+from schema_search.types import TableSchema
 from schema_search.chunkers import Chunk
-from schema_search.graph_builder import GraphBuilder
 from schema_search.embedding_cache import BaseEmbeddingCache
+from schema_search.embedding_cache.base import QUERY_BLOCK_ROWS
 from schema_search.rankers.base import BaseRanker
 
 
@@ -17,8 +18,9 @@ class SemanticSearchStrategy(BaseSearchStrategy):
         initial_top_k: int,
         rerank_top_k: int,
         reranker: Optional[BaseRanker],
+        aggregation: str = "none",
     ):
-        super().__init__(reranker, initial_top_k, rerank_top_k)
+        super().__init__(reranker, initial_top_k, rerank_top_k, aggregation)
         self.embedding_cache = embedding_cache
 
     def _initial_ranking(
@@ -26,24 +28,36 @@ class SemanticSearchStrategy(BaseSearchStrategy):
         query: str,
         schemas: Dict[str, TableSchema],
         chunks: List[Chunk],
-        graph_builder: GraphBuilder,
-        hops: int,
-    ) -> List[SearchResultItem]:
-        query_embedding = self.embedding_cache.encode_query(query)
-        embedding_scores = self.embedding_cache.compute_similarities(query_embedding)
-        top_indices = embedding_scores.argsort()[::-1][: self.initial_top_k]
-
-        results: List[SearchResultItem] = []
-        for idx in top_indices:
-            chunk = chunks[idx]
-            result = self._build_result_item(
-                table_name=chunk.table_name,
-                score=float(embedding_scores[idx]),
-                schema=schemas[chunk.table_name],
-                matched_chunks=[chunk.content],
-                graph_builder=graph_builder,
-                hops=hops,
+        table_index: TableIndex,
+    ) -> List[Candidate]:
+        return self._initial_ranking_many([query], schemas, chunks, table_index)[0]
+
+    def _initial_ranking_many(
+        self,
+        queries: List[str],
+        schemas: Dict[str, TableSchema],
+        chunks: List[Chunk],
+        table_index: TableIndex,
+    ) -> List[List[Candidate]]:
+        query_embeddings = self.embedding_cache.encode_queries(queries)
+
+        if self.aggregation == "none" or self.embedding_cache.approximate:
+            rankings = self.embedding_cache.top_k_many(
+                query_embeddings, self._chunk_pool_size(table_index)
             )
-            results.append(result)
+            return [
+                self._select(top_indices, top_scores, chunks, table_index)
+                for top_indices, top_scores in rankings
+            ]
 
+        # Exact scores for every chunk, so pooling sees all of a table's chunks
+        all_chunks = np.arange(len(chunks))
+        results: List[List[Candidate]] = []
+        for start in range(0, len(queries), QUERY_BLOCK_ROWS):
+            scores = self.embedding_cache.compute_similarities_many(
+                query_embeddings[start : start + QUERY_BLOCK_ROWS]
+            )
+            results.extend(
+                self._select(all_chunks, row, chunks, table_index) for row in scores
+            )
         return results
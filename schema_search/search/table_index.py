@@ -0,0 +1,90 @@
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from schema_search.chunkers import Chunk
+
+AGGREGATIONS = ("max", "sum", "top2_mean", "none")
+
+
+class TableIndex:
+    """Chunk-to-table lookups for one chunk list, built once per index."""
+
+    def __init__(self, chunks: List[Chunk]):
+        self.table_ids: Dict[str, int] = {}
+        # Chunk positions of each table, in chunk-list order
+        self.table_chunks: Dict[str, List[int]] = {}
+        chunk_tables = np.empty(len(chunks), dtype=np.int32)
+        for position, chunk in enumerate(chunks):
+            chunk_tables[position] = self.table_ids.setdefault(
+                chunk.table_name, len(self.table_ids)
+            )
+            self.table_chunks.setdefault(chunk.table_name, []).append(position)
+        self.table_names = list(self.table_ids)
+        self.chunk_tables = chunk_tables
+        counts = np.bincount(chunk_tables, minlength=len(self.table_names))
+        self.max_chunks_per_table = int(counts.max()) if len(counts) else 1
+
+
+def pool_scores(
+    table_ids: np.ndarray, scores: np.ndarray, method: str
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Pool chunk scores per table.
+
+    Returns the tables present, their pooled scores, and for each table the
+    position (into the inputs) of its best-scoring chunk.
+    """
+    if len(scores) == 0:
+        empty = np.zeros(0, dtype=np.int64)
+        return empty, scores, empty
+    if method not in AGGREGATIONS or method == "none":
+        raise ValueError(f"Unknown table aggregation: {method}")
+
+    if (table_ids[1:] >= table_ids[:-1]).all():
+        return _pool_grouped(table_ids, scores, method)
+
+    # Group by table with each group's chunks in descending score order
+    order = np.lexsort((-scores, table_ids))
+    sorted_tables = table_ids[order]
+    sorted_scores = scores[order]
+    starts = np.flatnonzero(np.r_[True, sorted_tables[1:] != sorted_tables[:-1]])
+    best = sorted_scores[starts]
+
+    if method == "max":
+        pooled = best
+    elif method == "sum":
+        pooled = np.add.reduceat(sorted_scores, starts)
+    elif method == "top2_mean":
+        counts = np.diff(np.r_[starts, len(order)])
+        second = np.where(
+            counts > 1, sorted_scores[np.minimum(starts + 1, len(order) - 1)], best
+        )
+        pooled = (best + second) / 2
+
+    return sorted_tables[starts], pooled, order[starts]
+
+
+def _pool_grouped(
+    table_ids: np.ndarray, scores: np.ndarray, method: str
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """pool_scores for inputs already grouped by table, e.g. a full chunk scan."""
+    starts = np.flatnonzero(np.r_[True, table_ids[1:] != table_ids[:-1]])
+    counts = np.diff(np.r_[starts, len(scores)])
+    best = np.maximum.reduceat(scores, starts)
+
+    # First position in each group holding the group's maximum
+    hits = np.flatnonzero(scores == np.repeat(best, counts))
+    groups = np.searchsorted(starts, hits, side="right") - 1
+    best_positions = hits[np.r_[True, groups[1:] != groups[:-1]]]
+
+    if method == "max":
+        pooled = best
+    elif method == "sum":
+        pooled = np.add.reduceat(scores, starts)
+    else:
+        rest = scores.copy()
+        rest[best_positions] = -np.inf
+        second = np.where(counts > 1, np.maximum.reduceat(rest, starts), best)
+        pooled = (best + second) / 2
+
+    return table_ids[starts], pooled, best_positions
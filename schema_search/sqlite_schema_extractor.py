@@ -0,0 +1,335 @@
+import hashlib
+import logging
+import re
+from typing import Dict, List, Any, Optional, Set, Tuple
+from sqlalchemy.engine import Engine
+from sqlalchemy import text
+
+from schema_search.schema_extractor import SchemaExtractor
+from schema_search.types import (
+    TableSchema,
+    ColumnInfo,
+    ForeignKeyInfo,
+    IndexInfo,
+    ConstraintInfo,
+)
+
+logger = logging.getLogger(__name__)
+
+# sqlite_master is the pre-3.33 name of sqlite_schema and works on every version
+USER_TABLES = "m.type = 'table' AND m.name NOT LIKE 'sqlite\\_%' ESCAPE '\\'"
+
+# The DDL patterns below are the ones SQLAlchemy's SQLite reflection uses
+# (checked against 1.4-2.1), so native extraction and inspector reflection
+# agree on what they find
+IDENTIFIER = (
+    r'"(?:[^"]|"")+"'
+    r"|'(?:[^']|'')+'"
+    r"|\[(?:[^\]]|\]\])+\]"
+    r"|`(?:[^`]|``)+`"
+    r"|\S+"
+)
+CHECK_PATTERN = re.compile(
+    rf"(?<![A-Za-z0-9_])(?:CONSTRAINT\s+({IDENTIFIER})\s+)?CHECK\s*\(",
+    re.IGNORECASE,
+)
+UNIQUE_PATTERN = re.compile(
+    r'(?:CONSTRAINT\s+(?:"(.+?)"|(\w+))\s+)?UNIQUE\s*\((.+?)\)', re.IGNORECASE
+)
+INLINE_UNIQUE_PATTERN = re.compile(
+    r'(?:(".+?")|(?:[\[`])?([a-z0-9_]+)(?:[\]`])?)[\t ]'
+    r"+[a-z0-9_]+(?:[\t ]+[a-z0-9_]+)*?[\t ]+UNIQUE",
+    re.IGNORECASE,
+)
+SIGNATURE_COLUMN = re.compile(r'(?:"(.+?)")|([a-z0-9_]+)', re.IGNORECASE)
+AUTOINDEX_PREFIX = "sqlite_autoindex"
+
+
+def _unquote(identifier: str) -> str:
+    if identifier[0] in "\"[`'":
+        return identifier[1:-1]
+    return identifier
+
+
+def _has_type_resolver(dialect) -> bool:
+    return hasattr(dialect, "_resolve_type_affinity")
+
+
+class SQLiteSchemaExtractor:
+    """Reads a whole SQLite catalog through pragma table-valued functions."""
+
+    def __init__(self, engine: Engine, config: Dict[str, Any]):
+        self.engine = engine
+        self.config = config
+
+    def extract(self) -> Dict[str, TableSchema]:
+        if not _has_type_resolver(self.engine.dialect):
+            logger.warning(
+                "SQLAlchemy's SQLite type resolver is unavailable; "
+                "falling back to inspector reflection"
+            )
+            return SchemaExtractor(self.engine, self.config).extract()
+
+        logger.info("Starting extraction...")
+        schema_config = self.config["schema"]
+
+        with self.engine.connect() as conn:
+            tables = self._get_tables(conn)
+            logger.info(f"Found {len(tables)} tables")
+
+            all_columns, all_primary_keys = self._get_all_columns(conn)
+
+            logger.debug("Fetching all foreign keys...")
+            all_foreign_keys = (
+                self._get_all_foreign_keys(conn, all_primary_keys)
+                if schema_config["include_foreign_keys"]
+                else {}
+            )
+
+            logger.debug("Fetching all indexes...")
+            all_indices, all_unique = (
+                self._get_all_indices(conn, tables)
+                if schema_config["include_indices"]
+                or schema_config["include_constraints"]
+                else ({}, {})
+            )
+
+        schemas: Dict[str, TableSchema] = {}
+        for table_name, sql in tables.items():
+            schemas[table_name] = {
+                "name": table_name,
+                "columns": (
+                    all_columns.get(table_name, [])
+                    if schema_config["include_columns"]
+                    else None
+                ),
+                "primary_keys": all_primary_keys.get(table_name, []),
+                "foreign_keys": (
+                    all_foreign_keys.get(table_name, [])
+                    if schema_config["include_foreign_keys"]
+                    else None
+                ),
+                "indices": (
+                    all_indices.get(table_name, [])
+                    if schema_config["include_indices"]
+                    else None
+                ),
+                "unique_constraints": (
+                    all_unique.get(table_name, [])
+                    if schema_config["include_constraints"]
+                    else None
+                ),
+                "check_constraints": (
+                    self._parse_check_constraints(sql)
+                    if schema_config["include_constraints"]
+                    else None
+                ),
+            }
+
+        return schemas
+
+    def fingerprint(self) -> Optional[str]:
+        # The stored DDL is the whole catalog, and reading it is one page scan
+        query = text(
+            "SELECT type, name, tbl_name, sql FROM sqlite_master ORDER BY type, name"
+        )
+        digest = hashlib.sha256()
+        with self.engine.connect() as conn:
+            for row in conn.execute(query):
+                digest.update(repr(tuple(row)).encode())
+        return digest.hexdigest()
+
+    def _get_tables(self, conn) -> Dict[str, Optional[str]]:
+        query = text(f"""
+            SELECT m.name, m.sql
+            FROM sqlite_master m
+            WHERE {USER_TABLES}
+            ORDER BY m.name
+        """)
+        return {row[0]: row[1] for row in conn.execute(query)}
+
+    def _get_all_columns(
+        self, conn
+    ) -> Tuple[Dict[str, List[ColumnInfo]], Dict[str, List[str]]]:
+        # hidden = 1 marks virtual-table internals; 2 and 3 are generated columns
+        query = text(f"""
+            SELECT m.name, p.name, p.type, p."notnull", p.dflt_value, p.pk, p.hidden
+            FROM sqlite_master m
+            JOIN pragma_table_xinfo(m.name) p
+            WHERE {USER_TABLES} AND p.hidden <> 1
+            ORDER BY m.name, p.cid
+        """)
+
+        columns_by_table: Dict[str, List[ColumnInfo]] = {}
+        pk_positions: Dict[str, List[Tuple[int, str]]] = {}
+        type_names: Dict[Tuple[str, bool], str] = {}
+        for row in conn.execute(query):
+            table_name = row[0]
+            if table_name not in columns_by_table:
+                columns_by_table[table_name] = []
+
+            type_key = (row[2], bool(row[6]))
+            if type_key not in type_names:
+                type_names[type_key] = self._resolve_type(*type_key)
+
+            columns_by_table[table_name].append({
+                "name": row[1],
+                "type": type_names[type_key],
+                "nullable": not row[3],
+                "default": row[4],
+            })
+
+            if row[5]:
+                pk_positions.setdefault(table_name, []).append((row[5], row[1]))
+
+        primary_keys = {
+            table_name: [name for _, name in sorted(positions)]
+            for table_name, positions in pk_positions.items()
+        }
+        return columns_by_table, primary_keys
+
+    def _resolve_type(self, declared_type: str, generated: bool) -> str:
+        """Render a declared type the way inspector reflection reports it."""
+        declared_type = declared_type.upper()
+        if generated:
+            # pragma reports "INTEGER GENERATED ALWAYS" for generated columns
+            declared_type = re.sub("GENERATED|ALWAYS", "", declared_type).strip()
+        # SQLite types are loose; reflection maps them by column affinity with
+        # this private dialect hook (present in SQLAlchemy 1.4-2.x; extract()
+        # falls back to reflection without it)
+        return str(self.engine.dialect._resolve_type_affinity(declared_type))
+
+    def _get_all_foreign_keys(
+        self, conn, primary_keys: Dict[str, List[str]]
+    ) -> Dict[str, List[ForeignKeyInfo]]:
+        query = text(f"""
+            SELECT m.name, p.id, p."table", p."from", p."to"
+            FROM sqlite_master m
+            JOIN pragma_foreign_key_list(m.name) p
+            WHERE {USER_TABLES}
+            ORDER BY m.name, p.id, p.seq
+        """)
+
+        fks_by_table: Dict[str, Dict[int, ForeignKeyInfo]] = {}
+        for row in conn.execute(query):
+            table_name, fk_id, ref_table = row[0], row[1], row[2]
+
+            if table_name not in fks_by_table:
+                fks_by_table[table_name] = {}
+
+            if fk_id not in fks_by_table[table_name]:
+                fks_by_table[table_name][fk_id] = {
+                    "constrained_columns": [],
+                    "referred_table": ref_table,
+                    "referred_columns": [],
+                }
+
+            fks_by_table[table_name][fk_id]["constrained_columns"].append(row[3])
+            if row[4] is not None:
+                fks_by_table[table_name][fk_id]["referred_columns"].append(row[4])
+
+        for fks in fks_by_table.values():
+            for fk in fks.values():
+                # REFERENCES parent without a column list targets the parent's PK
+                if not fk["referred_columns"]:
+                    fk["referred_columns"] = list(
+                        primary_keys.get(fk["referred_table"], [])
+                    )
+
+        return {k: list(v.values()) for k, v in fks_by_table.items()}
+
+    def _get_all_indices(
+        self, conn, tables: Dict[str, Optional[str]]
+    ) -> Tuple[Dict[str, List[IndexInfo]], Dict[str, List[ConstraintInfo]]]:
+        query = text(f"""
+            SELECT m.name, il.name, il."unique", ii.name
+            FROM sqlite_master m
+            JOIN pragma_index_list(m.name) il
+            JOIN pragma_index_info(il.name) ii
+            WHERE {USER_TABLES}
+            ORDER BY m.name, il.name, ii.seqno
+        """)
+
+        indices_by_table: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        for row in conn.execute(query):
+            table_name, index_name = row[0], row[1]
+
+            if table_name not in indices_by_table:
+                indices_by_table[table_name] = {}
+
+            if index_name not in indices_by_table[table_name]:
+                indices_by_table[table_name][index_name] = {
+                    # Reflection passes the pragma's 0/1 through unchanged
+                    "unique": row[2],
+                    "columns": [],
+                }
+
+            index = indices_by_table[table_name][index_name]
+            if row[3] is None:
+                # Expression index parts have no column name; reflection
+                # skips such indexes entirely
+                index["columns"] = None
+            elif index["columns"] is not None:
+                index["columns"].append(row[3])
+
+        indices: Dict[str, List[IndexInfo]] = {}
+        unique_constraints: Dict[str, List[ConstraintInfo]] = {}
+        for table_name, table_indices in indices_by_table.items():
+            # UNIQUE and PRIMARY KEY constraints are backed by autoindexes
+            autoindex_columns = set()
+            for index_name, index in table_indices.items():
+                if index["columns"] is None:
+                    continue
+                if index_name.startswith(AUTOINDEX_PREFIX):
+                    autoindex_columns.add(tuple(index["columns"]))
+                else:
+                    indices.setdefault(table_name, []).append({
+                        "name": index_name,
+                        "columns": index["columns"],
+                        "unique": index["unique"],
+                    })
+
+            constraints = self._parse_unique_constraints(
+                tables.get(table_name), autoindex_columns
+            )
+            if constraints:
+                unique_constraints[table_name] = constraints
+
+        return indices, unique_constraints
+
+    def _parse_unique_constraints(
+        self, sql: Optional[str], autoindex_columns: Set[Tuple[str, ...]]
+    ) -> List[ConstraintInfo]:
+        # Backing indexes are named sqlite_autoindex_*; the real name is in the
+        # DDL, and only DDL matches backed by an autoindex are constraints
+        parsed = [
+            (match.group(1) or match.group(2), match.group(3))
+            for match in UNIQUE_PATTERN.finditer(sql or "")
+        ] + [
+            (None, match.group(1) or match.group(2))
+            for match in INLINE_UNIQUE_PATTERN.finditer(sql or "")
+        ]
+
+        constraints: List[ConstraintInfo] = []
+        for name, signature in parsed:
+            columns = [
+                match.group(1) or match.group(2)
+                for match in SIGNATURE_COLUMN.finditer(signature)
+            ]
+            if tuple(columns) in autoindex_columns:
+                autoindex_columns.discard(tuple(columns))
+                constraints.append({"name": name, "columns": columns})
+        return constraints
+
+    def _parse_check_constraints(self, sql: Optional[str]) -> List[ConstraintInfo]:
+        # SQLite exposes CHECK constraints only through the table DDL
+        constraints: List[ConstraintInfo] = [
+            {
+                "name": _unquote(match.group(1)) if match.group(1) else None,
+                "columns": [],
+            }
+            for match in CHECK_PATTERN.finditer(sql or "")
+        ]
+        # Reflection orders them by name, unnamed ones last
+        constraints.sort(key=lambda constraint: constraint["name"] or "~")
+        return constraints
@@ -0,0 +1,24 @@
+import os
+import tempfile
+from contextlib import contextmanager
+from pathlib import Path
+from typing import IO, Iterator
+
+
+@contextmanager
+def atomic_write(path: Path, mode: str = "wb") -> Iterator[IO]:
+    """Write beside `path` under a name unique to this writer, then rename.
+
+    Readers see either the old file or the complete new one, and concurrent
+    writers never share a temp file.
+    """
+    f = tempfile.NamedTemporaryFile(
+        mode, dir=path.parent, prefix=f"{path.name}.", suffix=".tmp", delete=False
+    )
+    try:
+        with f:
+            yield f
+        os.replace(f.name, path)
+    except BaseException:
+        Path(f.name).unlink(missing_ok=True)
+        raise
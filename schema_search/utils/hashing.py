@@ -0,0 +1,6 @@
+import hashlib
+
+
+def content_hash(text: str) -> str:
+    """Stable hex digest used to key cached artifacts by their content."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
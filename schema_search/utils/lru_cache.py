@@ -0,0 +1,69 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+
+class LRUCache:
+    """Bounded least-recently-used mapping with optional per-entry expiry.
+
+    Safe to share between threads. Reads take no lock: each step is a single
+    OrderedDict call, which is atomic, and a read racing an eviction simply
+    misses. Writes hold an internal lock. The hit/miss counters are
+    best-effort under concurrent use.
+    """
+
+    def __init__(self, maxsize: int, ttl_sec: Optional[float] = None):
+        self.maxsize = maxsize
+        self.ttl_sec = ttl_sec
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is not None and self._expired(entry[0]):
+            with self._lock:
+                if self._entries.get(key) is entry:
+                    del self._entries[key]
+            entry = None
+
+        if entry is None:
+            self.misses += 1
+            return None
+
+        try:
+            self._entries.move_to_end(key)
+        except KeyError:
+            # Evicted since the lookup; the value read is still valid
+            pass
+        self.hits += 1
+        return entry[1]
+
+    def put(self, key: Hashable, value: Any) -> None:
+        if self.maxsize <= 0:
+            return
+
+        with self._lock:
+            self._entries[key] = (time.monotonic(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "size": len(self._entries),
+        }
+
+    def _expired(self, stored_at: float) -> bool:
+        return self.ttl_sec is not None and time.monotonic() - stored_at > self.ttl_sec
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -0,0 +1,6 @@
+from schema_search.vector_index.base import BaseVectorIndex
+from schema_search.vector_index.ivf import IVFIndex
+from schema_search.vector_index.hnsw import HNSWIndex
+from schema_search.vector_index.factory import create_vector_index
+
+__all__ = ["BaseVectorIndex", "IVFIndex", "HNSWIndex", "create_vector_index"]
@@ -0,0 +1,36 @@
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Dict
+
+import numpy as np
+
+
+class BaseVectorIndex(ABC):
+    """Approximate candidate generator over the cached embedding matrix.
+
+    Indexes only propose row ids; the embedding cache scores the candidates
+    against its full-precision rows.
+    """
+
+    def __init__(self, metric: str):
+        self.metric = metric
+
+    @abstractmethod
+    def params(self) -> Dict:
+        """Settings that invalidate a persisted index when they change."""
+
+    @abstractmethod
+    def build(self, embeddings: np.ndarray) -> None:
+        pass
+
+    @abstractmethod
+    def candidates(self, query_embedding: np.ndarray, count: int) -> np.ndarray:
+        """Sorted row ids of at least `count` likely neighbours, when available."""
+
+    @abstractmethod
+    def save(self, cache_dir: Path) -> None:
+        pass
+
+    @abstractmethod
+    def load(self, cache_dir: Path, dim: int) -> None:
+        pass
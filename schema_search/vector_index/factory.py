@@ -0,0 +1,30 @@
+from typing import Dict, Optional
+
+from schema_search.vector_index.base import BaseVectorIndex
+from schema_search.vector_index.hnsw import HNSWIndex
+from schema_search.vector_index.ivf import IVFIndex
+
+
+def create_vector_index(config: Dict) -> Optional[BaseVectorIndex]:
+    embedding_config = config["embedding"]
+    index_type = embedding_config.get("index", "flat")
+    metric = embedding_config["metric"]
+
+    if index_type == "flat":
+        return None
+
+    if index_type == "ivf":
+        return IVFIndex(
+            metric=metric,
+            nlist=embedding_config.get("ivf_nlist"),
+            nprobe=embedding_config.get("ivf_nprobe", 8),
+        )
+
+    if index_type == "hnsw":
+        return HNSWIndex(
+            metric=metric,
+            m=embedding_config.get("hnsw_m", 16),
+            ef_search=embedding_config.get("hnsw_ef_search", 64),
+        )
+
+    raise ValueError(f"Unknown vector index: {index_type}")
@@ -0,0 +1,58 @@
+from pathlib import Path
+from typing import Any, Dict
+
+import numpy as np
+
+from schema_search.utils.atomic import atomic_write
+from schema_search.utils.lazy_import import lazy_import_check
+from schema_search.vector_index.base import BaseVectorIndex
+
+INDEX_FILE = "hnsw_index.bin"
+EF_CONSTRUCTION = 200
+
+# hnswlib has no manhattan space; candidates are rescored exactly anyway
+SPACES = {"cosine": "cosine", "dot": "ip", "euclidean": "l2", "manhattan": "l2"}
+
+
+class HNSWIndex(BaseVectorIndex):
+    """Graph-based index backed by hnswlib."""
+
+    def __init__(self, metric: str, m: int, ef_search: int):
+        super().__init__(metric)
+        self.m = m
+        self.ef_search = ef_search
+        self.index: Any = None
+
+    def params(self) -> Dict:
+        return {"type": "hnsw", "m": self.m, "metric": self.metric}
+
+    def _new_index(self, dim: int) -> Any:
+        hnswlib = lazy_import_check("hnswlib", "ann", "the HNSW vector index")
+        return hnswlib.Index(space=SPACES[self.metric], dim=dim)
+
+    def build(self, embeddings: np.ndarray) -> None:
+        num_rows, dim = embeddings.shape
+        self.index = self._new_index(dim)
+        self.index.init_index(
+            max_elements=max(num_rows, 1), ef_construction=EF_CONSTRUCTION, M=self.m
+        )
+        if num_rows:
+            self.index.add_items(np.asarray(embeddings), np.arange(num_rows))
+
+    def candidates(self, query_embedding: np.ndarray, count: int) -> np.ndarray:
+        count = min(count, self.index.get_current_count())
+        if count == 0:
+            return np.zeros(0, dtype=np.int64)
+
+        self.index.set_ef(max(self.ef_search, count))
+        labels, _ = self.index.knn_query(query_embedding.reshape(1, -1), k=count)
+        return np.sort(labels[0].astype(np.int64))
+
+    def save(self, cache_dir: Path) -> None:
+        # hnswlib writes by path, so it fills the unique temp file by name
+        with atomic_write(cache_dir / INDEX_FILE) as f:
+            self.index.save_index(f.name)
+
+    def load(self, cache_dir: Path, dim: int) -> None:
+        self.index = self._new_index(dim)
+        self.index.load_index(str(cache_dir / INDEX_FILE))
@@ -0,0 +1,119 @@
+import logging
+from pathlib import Path
+from typing import Dict, Optional
+
+import numpy as np
+
+from schema_search.utils.atomic import atomic_write
+from schema_search.vector_index.base import BaseVectorIndex
+
+logger = logging.getLogger(__name__)
+
+INDEX_FILE = "ivf_index.npz"
+# k-means trains on a sample of this many rows per list
+TRAINING_ROWS_PER_LIST = 64
+ASSIGN_BLOCK_ROWS = 65536
+
+
+class IVFIndex(BaseVectorIndex):
+    """Inverted file index: k-means centroids with one row-id list each."""
+
+    def __init__(
+        self,
+        metric: str,
+        nlist: Optional[int],
+        nprobe: int,
+        iterations: int = 20,
+        seed: int = 0,
+    ):
+        super().__init__(metric)
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.iterations = iterations
+        self.seed = seed
+        self.centroids: Optional[np.ndarray] = None
+        self.order: Optional[np.ndarray] = None
+        self.offsets: Optional[np.ndarray] = None
+
+    def params(self) -> Dict:
+        return {"type": "ivf", "nlist": self.nlist, "metric": self.metric}
+
+    def build(self, embeddings: np.ndarray) -> None:
+        num_rows = embeddings.shape[0]
+        nlist = min(self.nlist or max(1, int(np.sqrt(num_rows))), num_rows)
+        if nlist == 0:
+            self.centroids = np.zeros((0, embeddings.shape[1]), dtype=np.float32)
+            self.order = np.zeros(0, dtype=np.int64)
+            self.offsets = np.zeros(1, dtype=np.int64)
+            return
+
+        rng = np.random.default_rng(self.seed)
+        sample_size = min(num_rows, nlist * TRAINING_ROWS_PER_LIST)
+        sample_rows = np.sort(rng.choice(num_rows, sample_size, replace=False))
+        sample = np.asarray(embeddings[sample_rows], dtype=np.float32)
+        centroids = sample[rng.choice(sample_size, nlist, replace=False)].copy()
+
+        for _ in range(self.iterations):
+            assignments = self._assign(sample, centroids)
+            counts = np.bincount(assignments, minlength=nlist)
+            # Segment sums over rows grouped by list; empty lists keep their
+            # previous centroid
+            grouped = sample[np.argsort(assignments, kind="stable")]
+            filled = counts > 0
+            starts = np.concatenate([[0], np.cumsum(counts)[:-1]])[filled]
+            sums = np.add.reduceat(grouped, starts, axis=0)
+            centroids[filled] = sums / counts[filled, None]
+
+        assignments = np.empty(num_rows, dtype=np.int64)
+        for start in range(0, num_rows, ASSIGN_BLOCK_ROWS):
+            block = np.asarray(embeddings[start : start + ASSIGN_BLOCK_ROWS])
+            assignments[start : start + len(block)] = self._assign(block, centroids)
+
+        self.centroids = centroids
+        self.order = np.argsort(assignments, kind="stable")
+        self.offsets = np.concatenate(
+            [[0], np.cumsum(np.bincount(assignments, minlength=nlist))]
+        )
+        logger.info(f"Built IVF index: {num_rows} rows in {nlist} lists")
+
+    def _assign(self, rows: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+        # argmin |x - c|^2 == argmax (x . c - |c|^2 / 2)
+        return self._centroid_scores(rows, centroids).argmax(axis=1)
+
+    def _centroid_scores(self, rows: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+        half_norms = 0.5 * np.einsum("ij,ij->i", centroids, centroids)
+        return rows @ centroids.T - half_norms
+
+    def candidates(self, query_embedding: np.ndarray, count: int) -> np.ndarray:
+        assert self.centroids is not None
+        assert self.order is not None and self.offsets is not None
+
+        query = query_embedding.reshape(1, -1).astype(np.float32)
+        if self.metric == "cosine":
+            query /= np.linalg.norm(query) + 1e-8
+
+        ranked_lists = self._centroid_scores(query, self.centroids)[0].argsort()[::-1]
+        sizes = np.diff(self.offsets)[ranked_lists]
+        # Probe nprobe lists, and more if they hold fewer than `count` rows
+        enough = np.searchsorted(np.cumsum(sizes), count) + 1
+        probe = ranked_lists[: max(self.nprobe, enough)]
+
+        return np.sort(
+            np.concatenate(
+                [self.order[self.offsets[i] : self.offsets[i + 1]] for i in probe]
+                + [np.zeros(0, dtype=np.int64)]
+            )
+        )
+
+    def save(self, cache_dir: Path) -> None:
+        assert self.centroids is not None
+        with atomic_write(cache_dir / INDEX_FILE) as f:
+            np.savez(
+                f, centroids=self.centroids, order=self.order, offsets=self.offsets
+            )
+
+    def load(self, cache_dir: Path, dim: int) -> None:
+        data = np.load(cache_dir / INDEX_FILE)
+        self.centroids = data["centroids"]
+        self.order = data["order"]
+        self.offsets = data["offsets"]
@@ -50,6 +50,9 @@ setup(
         "databricks": [
             "databricks-sqlalchemy>=2.0.0",
         ],
+        "ann": [
+            "hnswlib>=0.7.0",
+        ],
     },
     entry_points={
         "console_scripts": [
@@ -0,0 +1,85 @@
+import zlib
+from pathlib import Path
+from typing import Callable, List
+
+import numpy as np
+import pytest
+import yaml
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import Engine
+
+
+def create_synthetic_catalog(engine: Engine, num_tables: int) -> None:
+    """Create a chain of FK-linked tables with indexes and constraints."""
+    with engine.begin() as conn:
+        for i in range(num_tables):
+            parent = f"entity_{i // 2}" if i > 0 else None
+            parent_col = (
+                f", parent_id INTEGER REFERENCES {parent}(id)" if parent else ""
+            )
+            conn.execute(
+                text(
+                    f"CREATE TABLE entity_{i} ("
+                    "id INTEGER PRIMARY KEY, "
+                    "name VARCHAR(64) NOT NULL, "
+                    "code VARCHAR(32), "
+                    "created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP"
+                    f"{parent_col}, "
+                    f"CONSTRAINT uq_entity_{i}_code UNIQUE (code), "
+                    f"CONSTRAINT ck_entity_{i}_id CHECK (id > 0))"
+                )
+            )
+            conn.execute(
+                text(f"CREATE INDEX ix_entity_{i}_name ON entity_{i} (name)")
+            )
+
+
+@pytest.fixture
+def make_sqlite_engine(tmp_path) -> Callable[[int], Engine]:
+    def _make(num_tables: int) -> Engine:
+        db_path = tmp_path / f"synthetic_{num_tables}.db"
+        engine = create_engine(f"sqlite:///{db_path}")
+        create_synthetic_catalog(engine, num_tables)
+        return engine
+
+    return _make
+
+
+@pytest.fixture
+def config(tmp_path):
+    config_path = Path(__file__).parent.parent / "config.yml"
+    with open(config_path) as f:
+        config = yaml.safe_load(f)
+    config["embedding"]["cache_dir"] = str(tmp_path / "cache")
+    return config
+
+
+@pytest.fixture
+def config_path(tmp_path, config):
+    path = tmp_path / "config.yml"
+    with open(path, "w") as f:
+        yaml.safe_dump(config, f)
+    return str(path)
+
+
+class HashingEncoder:
+    """Deterministic stand-in for SentenceTransformer that records its inputs."""
+
+    def __init__(self, dim: int = 32):
+        self.dim = dim
+        self.encoded: List[str] = []
+
+    def encode(self, texts, batch_size=32, normalize_embeddings=True, **kwargs):
+        self.encoded.extend(texts)
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for i, sentence in enumerate(texts):
+            rng = np.random.default_rng(zlib.crc32(sentence.encode()))
+            vectors[i] = rng.standard_normal(self.dim)
+        if normalize_embeddings and len(texts):
+            vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors
+
+
+@pytest.fixture
+def encoder() -> HashingEncoder:
+    return HashingEncoder()
@@ -0,0 +1,163 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import bm25s
+import numpy as np
+
+from schema_search.chunkers import Chunk
+from schema_search.embedding_cache.bm25 import BM25Cache
+
+
+def _chunks(contents):
+    return [
+        Chunk(table_name=f"t{i}", content=content, chunk_id=i, token_count=1)
+        for i, content in enumerate(contents)
+    ]
+
+
+def test_persisted_index_is_memory_mapped(tmp_path):
+    """A second process loads the saved index instead of re-tokenizing."""
+    contents = [f"Table: orders_{i}\nColumns: id, total" for i in range(50)]
+    contents.append("Table: refunds\nColumns: id, refund_amount")
+
+    built = BM25Cache(tmp_path)
+    built.load_or_build(_chunks(contents))
+
+    loaded = BM25Cache(tmp_path)
+    loaded.load_or_build(_chunks(contents))
+
+    assert loaded.tokenized_docs is None
+    assert isinstance(loaded.bm25.scores["data"], np.memmap)
+    np.testing.assert_allclose(
+        loaded.get_scores("refund amount"), built.get_scores("refund amount")
+    )
+
+
+def test_changed_chunks_rebuild_persisted_index(tmp_path):
+    contents = ["Table: orders\nColumns: id", "Table: users\nColumns: id"]
+    BM25Cache(tmp_path).load_or_build(_chunks(contents))
+
+    contents[1] = "Table: users\nColumns: id, email"
+    cache = BM25Cache(tmp_path)
+    cache.load_or_build(_chunks(contents))
+
+    assert cache.tokenized_docs is not None
+    assert cache.get_scores("email").argmax() == 1
+
+    reloaded = BM25Cache(tmp_path)
+    reloaded.load_or_build(_chunks(contents))
+    assert reloaded.tokenized_docs is None
+    assert reloaded.get_scores("email").argmax() == 1
+
+
+def test_concurrent_cold_saves_leave_a_loadable_index(tmp_path):
+    """Workers that all miss the cache save side by side without clobbering."""
+    contents = [f"Table: orders_{i}\nColumns: id, total" for i in range(200)]
+    contents.append("Table: refunds\nColumns: id, refund_amount")
+
+    # Every worker has missed the cache before any of them saves
+    started = threading.Barrier(8)
+
+    class ColdStartCache(BM25Cache):
+        def build(self, chunks):
+            started.wait()
+            super().build(chunks)
+
+    def _cold_start(_):
+        cache = ColdStartCache(tmp_path)
+        cache.load_or_build(_chunks(contents))
+        return int(cache.get_scores("refund amount").argmax())
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        assert set(pool.map(_cold_start, range(8))) == {200}
+
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["bm25"]
+    reloaded = BM25Cache(tmp_path)
+    reloaded.load_or_build(_chunks(contents))
+    assert reloaded.tokenized_docs is None
+    assert reloaded.get_scores("refund amount").argmax() == 200
+
+
+def test_pruned_top_k_matches_dense_scores():
+    """MaxScore top-k returns the same chunks and scores as a full scan."""
+    rng = np.random.default_rng(0)
+    words = [f"term{i}" for i in range(300)]
+    contents = [
+        "Table: t{}\nColumns: id, name, {}".format(i, ", ".join(rng.choice(words, 6)))
+        for i in range(3000)
+    ]
+    cache = BM25Cache()
+    cache.build(_chunks(contents))
+
+    for query in ["term12 id", "term7 term200 name", "name", "term3 term4 term5"]:
+        dense = cache.get_scores(query)
+        expected = np.sort(dense)[::-1][:20]
+        indices, scores = cache.top_k(query, 20)
+
+        np.testing.assert_allclose(scores, expected[expected > 0], rtol=1e-5)
+        np.testing.assert_allclose(dense[indices], scores, rtol=1e-5)
+        np.testing.assert_allclose(
+            cache.score_rows(query, indices), scores, rtol=1e-5
+        )
+
+    assert len(cache.top_k("unknown words", 20)[0]) == 0
+
+
+def test_batch_scores_match_single_queries():
+    """get_scores_many equals get_scores row by row, repeated terms included."""
+    rng = np.random.default_rng(1)
+    words = [f"term{i}" for i in range(100)]
+    contents = [
+        "Table: t{}\nColumns: id, {}".format(i, ", ".join(rng.choice(words, 5)))
+        for i in range(500)
+    ]
+    cache = BM25Cache()
+    cache.build(_chunks(contents))
+
+    queries = ["term1 id", "term2 term2 term40", "id", "term9 unknown"]
+    np.testing.assert_allclose(
+        cache.get_scores_many(queries),
+        np.stack([cache.get_scores(query) for query in queries]),
+        rtol=1e-6,
+    )
+
+
+def test_pruned_top_k_benchmark():
+    """Short queries over many column-level chunks: full scan vs MaxScore."""
+    num_chunks, top_k = 300000, 20
+    rng = np.random.default_rng(0)
+    # Letters only, with no s/d/g, so _tokenize leaves the terms untouched
+    letters = "abcefhjklmnopqrtuvwxz"
+    vocab = np.array(
+        ["q" + a + b + c for a in letters for b in letters for c in letters]
+    )
+    # Zipf-like term frequencies, plus tokens shared by every column chunk
+    weights = 1.0 / np.arange(1, len(vocab) + 1)
+    sampled = rng.choice(vocab, size=(num_chunks, 4), p=weights / weights.sum())
+    docs = [["table", "column", "id", *row] for row in sampled.tolist()]
+
+    cache = BM25Cache()
+    cache.bm25 = bm25s.BM25()
+    cache.bm25.index(docs, show_progress=False)
+
+    queries = [
+        f"{vocab[5]} {vocab[900]}",
+        f"{vocab[40]} id",
+        f"{vocab[7]} {vocab[77]} {vocab[777]}",
+    ]
+    for query in queries:
+        start = time.time()
+        dense = cache.get_scores(query)
+        dense_top = dense.argsort()[::-1][:top_k]
+        dense_ms = (time.time() - start) * 1000
+
+        start = time.time()
+        indices, scores = cache.top_k(query, top_k)
+        pruned_ms = (time.time() - start) * 1000
+
+        print(
+            f"\n{query!r:20} full scan {dense_ms:6.1f} ms | "
+            f"MaxScore {pruned_ms:6.1f} ms"
+        )
+        np.testing.assert_allclose(scores, dense[dense_top], rtol=1e-5)
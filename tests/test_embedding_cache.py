@@ -0,0 +1,423 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+import shutil
+import tracemalloc
+
+import numpy as np
+import pytest
+
+from schema_search.chunkers import Chunk
+from schema_search.embedding_cache import (
+    EmbeddingStore,
+    create_embedding_cache,
+    prune_embedding_store,
+)
+from schema_search.utils.hashing import content_hash
+from tests.conftest import HashingEncoder
+
+
+def _chunks(contents):
+    return [
+        Chunk(table_name=f"t{i}", content=content, chunk_id=i, token_count=1)
+        for i, content in enumerate(contents)
+    ]
+
+
+def _cache(config, tmp_path, encoder):
+    cache = create_embedding_cache(config, tmp_path / "db")
+    cache.model = encoder
+    return cache
+
+
+def test_patch_reembeds_only_changed_chunks(config, tmp_path, encoder):
+    """Unchanged chunk texts keep their cached rows across a reindex."""
+    contents = [f"Table: t{i}\nColumns: id, name_{i}" for i in range(10)]
+
+    cache = _cache(config, tmp_path, encoder)
+    cache.load_or_generate(_chunks(contents), False, config["chunking"])
+    original = cache.embeddings.copy()
+
+    contents[3] = "Table: t3\nColumns: id, name_3, refund_amount"
+    contents.append("Table: refunds\nColumns: id")
+    encoder.encoded.clear()
+
+    reloaded = _cache(config, tmp_path, encoder)
+    reloaded.load_or_generate(_chunks(contents), False, config["chunking"])
+
+    assert encoder.encoded == [contents[3], contents[10]]
+    assert reloaded.embeddings.shape == (11, original.shape[1])
+    unchanged = [i for i in range(10) if i != 3]
+    np.testing.assert_array_equal(reloaded.embeddings[unchanged], original[unchanged])
+
+
+def test_shared_store_reuses_vectors_across_databases(config, tmp_path, encoder):
+    """A second database with the same chunk texts, reordered, encodes nothing."""
+    contents = [f"Table: tenant_{i}\nColumns: id, amount" for i in range(5)]
+
+    first = _cache(config, tmp_path, encoder)
+    first.load_or_generate(_chunks(contents), False, config["chunking"])
+    encoder.encoded.clear()
+
+    second = create_embedding_cache(config, tmp_path / "other_db")
+    second.model = encoder
+    second.load_or_generate(_chunks(contents[::-1]), False, config["chunking"])
+
+    assert encoder.encoded == []
+    np.testing.assert_array_equal(second.embeddings, first.embeddings[::-1])
+
+
+def test_prune_drops_only_unreferenced_store_vectors(config, tmp_path, encoder):
+    """Pruning keeps every vector a memory or vectordb cache still uses."""
+    cache_root = Path(config["embedding"]["cache_dir"])
+    contents = [f"Table: t{i}\nColumns: id, v{i}" for i in range(6)]
+
+    memory = create_embedding_cache(config, cache_root / "memory_db")
+    memory.model = encoder
+    memory.load_or_generate(_chunks(contents), False, config["chunking"])
+    vectordb = _vectordb_cache(config, cache_root / "vectordb_db", encoder)
+    vectordb.load_or_generate(_chunks(contents[3:]), False, config["chunking"])
+    # t0 is dropped from the only database that used it
+    memory.load_or_generate(_chunks(contents[1:]), False, config["chunking"])
+
+    assert prune_embedding_store(config) == 1
+
+    store = EmbeddingStore(cache_root / "embedding_store")
+    hashes = [content_hash(content) for content in contents]
+    assert set(store.get_many(memory.model_name, hashes)) == set(hashes[1:])
+    assert prune_embedding_store(config) == 0
+
+
+def test_duplicate_chunk_texts_are_encoded_once(config, tmp_path, encoder):
+    """Identical chunk texts within one database share a single encode."""
+    contents = ["Table: a\nColumns: id"] * 3 + ["Table: b\nColumns: id"]
+
+    cache = _cache(config, tmp_path, encoder)
+    cache.load_or_generate(_chunks(contents), False, config["chunking"])
+
+    assert len(encoder.encoded) == 2
+    assert cache.embeddings.shape[0] == 4
+
+
+def test_warm_start_memory_maps_embeddings(config, tmp_path, encoder):
+    """A restart maps the saved matrix instead of decoding or re-encoding it."""
+    contents = [f"Table: t{i}\nColumns: id, name_{i}" for i in range(8)]
+
+    cache = _cache(config, tmp_path, encoder)
+    cache.load_or_generate(_chunks(contents), False, config["chunking"])
+    query = encoder.encode(["name_3"])
+    expected = cache.compute_similarities(query)
+    encoder.encoded.clear()
+
+    reloaded = _cache(config, tmp_path, encoder)
+    reloaded.load_or_generate(_chunks(contents), False, config["chunking"])
+
+    assert encoder.encoded == []
+    assert isinstance(reloaded.embeddings, np.memmap)
+    np.testing.assert_allclose(
+        reloaded.compute_similarities(query), expected, rtol=1e-6
+    )
+
+
+def test_files_newer_than_manifest_force_rebuild(config, tmp_path, encoder):
+    """A save that died before its manifest is rebuilt, not served."""
+    contents = [f"Table: t{i}\nColumns: id, name_{i}" for i in range(8)]
+    newer = [f"Table: t{i}\nColumns: id, code_{i}" for i in range(8)]
+
+    cache = _cache(config, tmp_path, encoder)
+    cache.load_or_generate(_chunks(contents), False, config["chunking"])
+    expected = np.array(cache.embeddings)
+    torn = create_embedding_cache(config, tmp_path / "torn")
+    torn.model = encoder
+    torn.load_or_generate(_chunks(newer), False, config["chunking"])
+    for name in ("embedding_hashes.npy", "embeddings.npy"):
+        shutil.copy(tmp_path / "torn" / name, tmp_path / "db" / name)
+
+    reloaded = _cache(config, tmp_path, encoder)
+    reloaded.load_or_generate(_chunks(contents), False, config["chunking"])
+
+    np.testing.assert_array_equal(reloaded.embeddings, expected)
+
+
+def test_concurrent_writers_never_share_temp_files(config, tmp_path, encoder):
+    """Workers saving the same cache at once leave complete files, no temps."""
+    contents = [f"Table: t{i}\nColumns: id, name_{i}" for i in range(200)]
+
+    def _cold_start(_):
+        cache = _cache(config, tmp_path, encoder)
+        cache.load_or_generate(_chunks(contents), True, config["chunking"])
+        return cache.embeddings.shape
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        assert set(pool.map(_cold_start, range(16))) == {(200, encoder.dim)}
+
+    assert not list((tmp_path / "db").glob("*.tmp"))
+    reloaded = _cache(config, tmp_path, encoder)
+    reloaded.load_or_generate(_chunks(contents), False, config["chunking"])
+    assert isinstance(reloaded.embeddings, np.memmap)
+    assert reloaded.embeddings.shape == (200, encoder.dim)
+
+
+def test_quantized_warm_start_rescores_exactly(config, tmp_path, encoder):
+    """int8 scores come from the compact matrix; the top-k are exact float32."""
+    config["embedding"]["precision"] = "int8"
+    contents = [f"Table: t{i}\nColumns: id, name_{i}" for i in range(50)]
+
+    cache = _cache(config, tmp_path, encoder)
+    cache.load_or_generate(_chunks(contents), False, config["chunking"])
+    encoder.encoded.clear()
+
+    reloaded = _cache(config, tmp_path, encoder)
+    reloaded.load_or_generate(_chunks(contents), False, config["chunking"])
+
+    assert encoder.encoded == []
+    assert reloaded.quantized.dtype == np.int8
+    assert isinstance(reloaded.quantized, np.memmap)
+
+    query = encoder.encode(["name_7"])
+    scores = reloaded.compute_similarities(query)
+    exact = (np.asarray(reloaded.embeddings) @ query.T).flatten()
+    top = scores.argsort()[::-1][: config["search"]["initial_top_k"]]
+    np.testing.assert_allclose(scores[top], exact[top], rtol=1e-5)
+
+
+def test_precision_recall_memory_benchmark(config, tmp_path):
+    """Report recall@initial_top_k against float32 and matrix size per precision."""
+    num_chunks, dim, num_queries = 20000, 384, 50
+    top_k = config["search"]["initial_top_k"]
+    contents = [f"Table: t{i}\nColumns: id, value_{i}" for i in range(num_chunks)]
+    chunks = _chunks(contents)
+
+    rng = np.random.default_rng(0)
+    exact = None
+    queries = None
+    for precision, rescore in [
+        ("float32", False),
+        ("float16", False),
+        ("int8", False),
+        ("int8", True),
+    ]:
+        config["embedding"]["precision"] = precision
+        config["embedding"]["rescore"] = rescore
+        run_dir = tmp_path / f"{precision}_{rescore}"
+        run_dir.mkdir()
+        cache = _cache(config, run_dir, HashingEncoder(dim))
+        cache.load_or_generate(chunks, False, config["chunking"])
+
+        if queries is None:
+            # Queries near a handful of stored rows, like a real lookup
+            anchors = rng.integers(0, num_chunks, size=(num_queries, 4))
+            queries = cache.embeddings[anchors].mean(axis=1)
+            queries += rng.standard_normal(queries.shape).astype(np.float32) * 0.05
+
+        start = time.time()
+        tops = [
+            set(cache.compute_similarities(q[None, :]).argsort()[::-1][:top_k])
+            for q in queries
+        ]
+        query_ms = (time.time() - start) / num_queries * 1000
+        if exact is None:
+            exact = tops
+
+        recall = np.mean([len(a & b) / top_k for a, b in zip(tops, exact)])
+        matrix = cache.quantized if cache.quantized is not None else cache.embeddings
+        print(
+            f"\n{precision:>7} rescore={rescore!s:<5} | "
+            f"matrix {matrix.nbytes / 2**20:6.1f} MiB | "
+            f"recall@{top_k} {recall:.3f} | {query_ms:.2f} ms/query"
+        )
+
+        if precision == "float16" or rescore:
+            assert recall >= 0.99
+        else:
+            assert recall >= 0.9
+
+
+def test_binary_prefilter_benchmark(config, tmp_path):
+    """Compare flat float32 top-k with the Hamming prefilter plus exact rescoring."""
+    num_chunks, dim, num_queries = 100000, 384, 50
+    top_k = config["search"]["initial_top_k"]
+    chunks = _chunks([f"Table: t{i}\nColumns: id" for i in range(num_chunks)])
+
+    config["embedding"]["binary_prefilter"] = True
+    cache = _cache(config, tmp_path, HashingEncoder(dim))
+    cache.load_or_generate(chunks, False, config["chunking"])
+
+    rng = np.random.default_rng(0)
+    anchors = rng.integers(0, num_chunks, size=(num_queries, 4))
+    queries = cache.embeddings[anchors].mean(axis=1)
+    queries += rng.standard_normal(queries.shape).astype(np.float32) * 0.01
+
+    start = time.time()
+    exact = [
+        set(super(type(cache), cache).top_k(q[None, :], top_k)[0]) for q in queries
+    ]
+    flat_ms = (time.time() - start) / num_queries * 1000
+
+    start = time.time()
+    approx = [set(cache.top_k(q[None, :], top_k)[0]) for q in queries]
+    binary_ms = (time.time() - start) / num_queries * 1000
+
+    overlap = np.mean([len(a & b) / top_k for a, b in zip(approx, exact)])
+    # Beyond the anchors, the exact top-k of isotropic random vectors are
+    # near-ties, so anchor recall is the meaningful quality number
+    recall = np.mean([len(set(a) & b) / len(a) for a, b in zip(anchors, approx)])
+    print(
+        f"\nChunks: {num_chunks} x {dim} | "
+        f"float32 {cache.embeddings.nbytes / 2**20:.1f} MiB, "
+        f"binary {cache.binary.nbytes / 2**20:.1f} MiB"
+    )
+    print(
+        f"Flat: {flat_ms:.2f} ms/query | Binary prefilter: {binary_ms:.2f} ms/query "
+        f"| anchor recall {recall:.3f} | top-{top_k} overlap {overlap:.3f}"
+    )
+
+    assert cache.binary.shape == (dim // 64, num_chunks)
+    assert recall >= 0.95
+
+
+def _vectordb_cache(config, cache_dir, encoder):
+    config["embedding"]["location"] = "vectordb"
+    cache_dir.mkdir(exist_ok=True)
+    cache = create_embedding_cache(config, cache_dir)
+    cache.model = encoder
+    return cache
+
+
+def test_vectordb_matches_in_memory_scores(config, tmp_path, encoder):
+    """The on-disk store ranks and scores chunks exactly like the matrix cache."""
+    contents = [f"Table: t{i // 2}\nColumns: id, part_{i}" for i in range(40)]
+    chunks = [
+        Chunk(table_name=f"t{i // 2}", content=text, chunk_id=i, token_count=1)
+        for i, text in enumerate(contents)
+    ]
+
+    memory = _cache(config, tmp_path, encoder)
+    memory.load_or_generate(chunks, False, config["chunking"])
+    vectordb = _vectordb_cache(config, tmp_path / "vectordb", encoder)
+    vectordb.load_or_generate(chunks, False, config["chunking"])
+
+    query = encoder.encode(["part_17"])
+    np.testing.assert_allclose(
+        vectordb.compute_similarities(query),
+        memory.compute_similarities(query),
+        rtol=1e-6,
+    )
+    indices, scores = vectordb.top_k(query, 5)
+    expected_indices, expected_scores = memory.top_k(query, 5)
+    np.testing.assert_array_equal(indices, expected_indices)
+    np.testing.assert_allclose(scores, expected_scores, rtol=1e-6)
+    np.testing.assert_allclose(
+        vectordb.score_rows(query, indices), expected_scores, rtol=1e-6
+    )
+    shuffled = np.random.default_rng(0).permutation(len(chunks))
+    np.testing.assert_allclose(
+        vectordb.score_rows(query, shuffled),
+        memory.compute_similarities(query)[shuffled],
+        rtol=1e-6,
+        atol=1e-6,
+    )
+
+    # A one-chunk table replacing t0 shifts every later table start
+    solo = Chunk(table_name="solo", content="Table: solo", chunk_id=0, token_count=1)
+    vectordb.load_or_generate([solo] + chunks[2:], False, config["chunking"])
+    np.testing.assert_allclose(
+        vectordb.score_rows(query, np.arange(len(chunks) - 1)),
+        vectordb.compute_similarities(query),
+        rtol=1e-6,
+        atol=1e-6,
+    )
+
+
+def test_vectordb_rejects_interleaved_tables(config, tmp_path, encoder):
+    """Row offsets assume each table's chunks sit next to each other."""
+    chunks = [
+        Chunk(table_name=name, content=f"Table: {name}", chunk_id=i, token_count=1)
+        for i, name in enumerate(["a", "b", "a"])
+    ]
+    cache = _vectordb_cache(config, tmp_path / "vectordb", encoder)
+
+    with pytest.raises(ValueError, match="not contiguous"):
+        cache.load_or_generate(chunks, False, config["chunking"])
+
+
+def test_vectordb_upserts_and_deletes_per_table(config, tmp_path, encoder):
+    """A reindex re-embeds changed tables only and shifts the rest in place."""
+    tables = {f"t{i}": f"Table: t{i}\nColumns: id, name_{i}" for i in range(10)}
+    cache = _vectordb_cache(config, tmp_path / "vectordb", encoder)
+    cache.load_or_generate(_table_chunks(tables), False, config["chunking"])
+
+    del tables["t0"]
+    tables["t5"] = "Table: t5\nColumns: id, name_5, refund_amount"
+    tables["t10"] = "Table: t10\nColumns: id"
+    encoder.encoded.clear()
+
+    reloaded = _vectordb_cache(config, tmp_path / "vectordb", encoder)
+    chunks = _table_chunks(tables)
+    reloaded.load_or_generate(chunks, False, config["chunking"])
+
+    assert sorted(encoder.encoded) == sorted([tables["t5"], tables["t10"]])
+    for position, chunk in enumerate(chunks):
+        query = encoder.encode([chunk.content])
+        assert reloaded.top_k(query, 1)[0][0] == position
+
+
+def _table_chunks(tables):
+    return [
+        Chunk(table_name=name, content=content, chunk_id=i, token_count=1)
+        for i, (name, content) in enumerate(tables.items())
+    ]
+
+
+def test_vectordb_memory_benchmark(config, tmp_path):
+    """Peak allocation of a vectordb query stays flat as databases are added."""
+    num_databases, chunks_per_database, dim = 6, 10000, 384
+    encoder = HashingEncoder(dim)
+    caches = []
+    for d in range(num_databases):
+        chunks = _chunks(
+            [f"Table: db{d}_t{i}\nColumns: id" for i in range(chunks_per_database)]
+        )
+        cache = _vectordb_cache(config, tmp_path / f"db{d}", encoder)
+        cache.load_or_generate(chunks, False, config["chunking"])
+        caches.append(cache)
+
+    query = encoder.encode(["Table: db3_t42"])
+    tracemalloc.start()
+    start = time.time()
+    for cache in caches:
+        cache.top_k(query, config["search"]["initial_top_k"])
+    elapsed = time.time() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    matrix_mib = chunks_per_database * dim * 4 / 2**20
+    print(
+        f"\n{num_databases} databases x {chunks_per_database} chunks "
+        f"({matrix_mib:.1f} MiB float32 each)"
+    )
+    print(
+        f"Query all: {elapsed * 1000:.1f} ms | "
+        f"peak allocation {peak / 2**20:.1f} MiB"
+    )
+    assert peak < matrix_mib * 2**20
+
+
+def test_query_embeddings_are_cached_in_memory_and_on_disk(config, tmp_path, encoder):
+    """Repeated queries skip the model, and the disk tier survives a restart."""
+    config["embedding"]["query_disk_cache"] = True
+
+    cache = _cache(config, tmp_path, encoder)
+    first = cache.encode_query("where are refunds stored?")
+    second = cache.encode_query("where are refunds stored?")
+
+    assert encoder.encoded == ["where are refunds stored?"]
+    assert cache.query_cache.stats()["hits"] == 1
+    np.testing.assert_array_equal(first, second)
+
+    restarted = _cache(config, tmp_path, encoder)
+    restarted_emb = restarted.encode_query("where are refunds stored?")
+
+    assert encoder.encoded == ["where are refunds stored?"]
+    assert restarted_emb.shape == first.shape
+    np.testing.assert_array_equal(restarted_emb, first)
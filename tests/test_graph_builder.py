@@ -0,0 +1,211 @@
+import pickle
+import subprocess
+import sys
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+
+import networkx as nx
+import numpy as np
+import pytest
+
+from schema_search.graph_builder import GraphBuilder
+from schema_search.schema_diff import diff_schemas
+
+
+def _schemas(num_tables, seed=0):
+    """Tables with zero to three FKs, a few hubs referenced by many tables."""
+    rng = np.random.default_rng(seed)
+    schemas = {}
+    for i in range(num_tables):
+        referred = set()
+        for _ in range(rng.integers(0, 4)):
+            if i > 0:
+                hub = rng.random() < 0.3
+                referred.add(int(rng.integers(0, min(i, 20) if hub else i)))
+        schemas[f"t{i}"] = {
+            "name": f"t{i}",
+            "columns": [],
+            "foreign_keys": [
+                {
+                    "constrained_columns": [f"t{j}_id"],
+                    "referred_table": f"t{j}",
+                    "referred_columns": ["id"],
+                }
+                for j in sorted(referred)
+            ],
+        }
+    return schemas
+
+
+def _networkx_neighbors(graph, table_name, hops):
+    forward = nx.single_source_shortest_path_length(graph, table_name, cutoff=hops)
+    backward = nx.single_source_shortest_path_length(
+        graph.reverse(), table_name, cutoff=hops
+    )
+    return (set(forward) | set(backward)) - {table_name}
+
+
+def test_neighbors_match_networkx_traversal(tmp_path):
+    """CSR neighbourhoods equal both shortest-path walks, also after a patch."""
+    schemas = _schemas(300)
+    builder = GraphBuilder(tmp_path)
+    builder.build(schemas, force=True)
+
+    for table_name in list(schemas)[::7]:
+        for hops in (0, 1, 2, 3):
+            assert builder.get_neighbors(table_name, hops) == _networkx_neighbors(
+                builder.to_networkx(), table_name, hops
+            )
+    assert builder.get_neighbors("missing", 1) == frozenset()
+
+    updated = dict(schemas)
+    del updated["t5"]
+    updated["t300"] = {
+        "name": "t300",
+        "columns": [],
+        "foreign_keys": [
+            {
+                "constrained_columns": ["t1_id"],
+                "referred_table": "t1",
+                "referred_columns": ["id"],
+            }
+        ],
+    }
+    builder.update(updated, diff_schemas(schemas, updated))
+
+    assert builder.get_neighbors("t5", 1) == frozenset()
+    for table_name in ("t1", "t300", "t10"):
+        assert builder.get_neighbors(table_name, 2) == _networkx_neighbors(
+            builder.to_networkx(), table_name, 2
+        )
+
+    reloaded = GraphBuilder(tmp_path)
+    reloaded.build(updated, force=False)
+    assert reloaded.get_neighbors("t1", 2) == builder.get_neighbors("t1", 2)
+
+
+def test_concurrent_builds_leave_a_complete_artifact(tmp_path):
+    """Workers rebuilding the graph at once never clobber each other's file."""
+    schemas = _schemas(2000)
+
+    def _build(_):
+        GraphBuilder(tmp_path).build(schemas, force=True)
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(_build, range(16)))
+
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["graph.npz"]
+    reloaded = GraphBuilder(tmp_path)
+    reloaded.build({}, force=False)
+    assert reloaded.get_neighbors("t7", 1) == _networkx_neighbors(
+        reloaded.to_networkx(), "t7", 1
+    )
+
+
+@pytest.mark.parametrize("num_tables", [8000])
+def test_neighbor_lookup_benchmark(tmp_path, num_tables):
+    """Graph expansion for a search's worth of results, cold and memoized."""
+    schemas = _schemas(num_tables)
+    builder = GraphBuilder(tmp_path)
+    builder.build(schemas, force=True)
+    tables = [f"t{i}" for i in range(0, num_tables, num_tables // 20)]
+
+    graph = builder.to_networkx()
+    start = time.perf_counter()
+    expected = [_networkx_neighbors(graph, t, 1) for t in tables]
+    networkx_sec = time.perf_counter() - start
+
+    start = time.perf_counter()
+    cold = [builder.get_neighbors(t, 1) for t in tables]
+    cold_sec = time.perf_counter() - start
+
+    start = time.perf_counter()
+    warm = [builder.get_neighbors(t, 1) for t in tables]
+    warm_sec = time.perf_counter() - start
+
+    print(
+        f"\n{num_tables} tables, {len(tables)} lookups: "
+        f"networkx {networkx_sec * 1000:.1f} ms, csr {cold_sec * 1000:.2f} ms, "
+        f"memoized {warm_sec * 1000:.3f} ms"
+    )
+    assert cold == expected
+    assert warm == expected
+    assert cold_sec < networkx_sec
+
+
+def _legacy_pickle(schemas, path):
+    """The previous artifact: a DiGraph carrying every schema as node data."""
+    graph = nx.DiGraph()
+    for table_name, schema in schemas.items():
+        graph.add_node(table_name, **schema)
+    for table_name, schema in schemas.items():
+        for fk in schema["foreign_keys"]:
+            graph.add_edge(table_name, fk["referred_table"], **fk)
+    with open(path, "wb") as f:
+        pickle.dump(graph, f)
+
+
+def _timed_load(load):
+    tracemalloc.start()
+    start = time.perf_counter()
+    loaded = load()
+    elapsed = time.perf_counter() - start
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return loaded, elapsed, retained / 2**20
+
+
+def test_graph_artifact_load_benchmark(tmp_path):
+    """The npz artifact loads faster and retains less than the pickled DiGraph."""
+    schemas = _schemas(8000)
+    for schema in schemas.values():
+        schema["columns"] = [
+            {"name": f"col_{c}", "type": "INTEGER", "nullable": True}
+            for c in range(12)
+        ]
+
+    legacy_file = tmp_path / "legacy" / "graph.pkl"
+    legacy_file.parent.mkdir()
+    _legacy_pickle(schemas, legacy_file)
+    GraphBuilder(tmp_path).build(schemas, force=True)
+
+    def _load_legacy():
+        with open(legacy_file, "rb") as f:
+            return pickle.load(f)
+
+    def _load_compact():
+        builder = GraphBuilder(tmp_path)
+        builder.build({}, force=False)
+        return builder
+
+    _, legacy_sec, legacy_mib = _timed_load(_load_legacy)
+    builder, compact_sec, compact_mib = _timed_load(_load_compact)
+
+    legacy_size = legacy_file.stat().st_size / 2**20
+    compact_size = (tmp_path / "graph.npz").stat().st_size / 2**20
+    print(
+        f"\npickled DiGraph: {legacy_size:.1f} MiB file, load {legacy_sec:.3f}s, "
+        f"{legacy_mib:.1f} MiB retained"
+        f"\ngraph.npz: {compact_size:.1f} MiB file, load {compact_sec:.3f}s, "
+        f"{compact_mib:.1f} MiB retained"
+    )
+    assert builder.get_neighbors("t7", 1) == _networkx_neighbors(
+        builder.to_networkx(), "t7", 1
+    )
+    assert compact_mib < legacy_mib
+
+
+def test_serving_path_does_not_import_networkx(tmp_path):
+    """Loading the artifact and expanding neighbours never imports networkx."""
+    GraphBuilder(tmp_path).build(_schemas(50), force=True)
+    script = (
+        "import sys\n"
+        "from pathlib import Path\n"
+        "from schema_search.graph_builder import GraphBuilder\n"
+        f"builder = GraphBuilder(Path({str(tmp_path)!r}))\n"
+        "builder.build({}, force=False)\n"
+        "assert builder.get_neighbors('t10', 2)\n"
+        "assert 'networkx' not in sys.modules\n"
+    )
+    subprocess.run([sys.executable, "-c", script], check=True)
@@ -0,0 +1,38 @@
+import time
+
+from schema_search import SchemaSearch
+
+
+def test_index_pipeline_benchmark(make_sqlite_engine, config_path):
+    """Time cold and warm indexing plus BM25 search on a large offline catalog."""
+    num_tables = 2000
+    engine = make_sqlite_engine(num_tables)
+
+    search = SchemaSearch(engine, config_path=config_path)
+
+    start = time.time()
+    cold = search.index(force=True)
+    cold_sec = time.time() - start
+
+    start = time.time()
+    warm = search.index()
+    warm_sec = time.time() - start
+
+    response = search.search("entity parent code", search_type="bm25")
+
+    # A new process reuses the persisted BM25 index
+    restarted = SchemaSearch(engine, config_path=config_path)
+    restarted.index()
+    restarted_response = restarted.search("entity parent code", search_type="bm25")
+
+    print(f"\nTables: {cold['tables']} | Chunks: {cold['chunks']}")
+    print(f"Cold index: {cold_sec:.3f}s | Warm index: {warm_sec:.3f}s")
+    print(f"BM25 search: {response.latency_sec:.3f}s")
+    print(f"BM25 search after restart: {restarted_response.latency_sec:.3f}s")
+
+    assert cold["tables"] == num_tables
+    assert warm["chunks"] == cold["chunks"]
+    assert len(response.results) > 0
+    assert [r["table"] for r in restarted_response.results] == [
+        r["table"] for r in response.results
+    ]
@@ -0,0 +1,203 @@
+import os
+import time
+from pathlib import Path
+
+import pytest
+from dotenv import load_dotenv
+from sqlalchemy import create_engine, create_mock_engine, event
+
+from schema_search.schema_extractor import SchemaExtractor
+from schema_search.postgres_schema_extractor import PostgresSchemaExtractor
+from schema_search.mysql_schema_extractor import MySQLSchemaExtractor
+from schema_search import sqlite_schema_extractor
+from schema_search.sqlite_schema_extractor import SQLiteSchemaExtractor
+
+
+@pytest.fixture(scope="module")
+def database_url():
+    env_path = Path(__file__).parent / ".env"
+    load_dotenv(env_path)
+
+    url = os.getenv("DATABASE_URL")
+    if not url:
+        pytest.skip("DATABASE_URL not set in tests/.env file")
+
+    return url
+
+
+def _count_round_trips(engine):
+    counter = {"queries": 0}
+
+    def _on_execute(conn, cursor, statement, parameters, context, executemany):
+        counter["queries"] += 1
+
+    event.listen(engine, "before_cursor_execute", _on_execute)
+    return counter
+
+
+def test_batched_matches_per_table(make_sqlite_engine, config):
+    """Batched multi-table reflection returns the same schemas as per-table."""
+    engine = make_sqlite_engine(20)
+
+    config["schema"]["batch_reflection"] = True
+    batched = SchemaExtractor(engine, config).extract()
+
+    config["schema"]["batch_reflection"] = False
+    per_table = SchemaExtractor(engine, config).extract()
+
+    assert len(batched) == 20
+    assert batched == per_table
+    assert batched["entity_3"]["foreign_keys"][0]["referred_table"] == "entity_1"
+    assert batched["entity_3"]["check_constraints"][0]["columns"] == []
+
+
+def test_extraction_benchmark(make_sqlite_engine, config):
+    """Report catalog round trips and wall time for both reflection modes."""
+    engine = make_sqlite_engine(300)
+    counter = _count_round_trips(engine)
+
+    modes = [
+        ("per-table", SchemaExtractor, False),
+        ("batched", SchemaExtractor, True),
+        ("sqlite", SQLiteSchemaExtractor, True),
+    ]
+
+    print()
+    for mode, extractor_cls, batch_reflection in modes:
+        config["schema"]["batch_reflection"] = batch_reflection
+        extractor = extractor_cls(engine, config)
+
+        counter["queries"] = 0
+        start = time.time()
+        schemas = extractor.extract()
+        elapsed = time.time() - start
+
+        print(
+            f"{mode:>10}: {len(schemas)} tables | "
+            f"{counter['queries']} round trips | {elapsed:.3f}s"
+        )
+        assert len(schemas) == 300
+
+
+def _assert_matches_inspector(native, reflected):
+    assert native.keys() == reflected.keys()
+    for table_name, schema in reflected.items():
+        assert native[table_name]["primary_keys"] == schema["primary_keys"]
+        assert [c["name"] for c in native[table_name]["columns"]] == [
+            c["name"] for c in schema["columns"]
+        ]
+        assert native[table_name]["foreign_keys"] == schema["foreign_keys"]
+
+
+def test_postgres_extractor_matches_inspector(database_url, config):
+    """Native pg_catalog extraction agrees with SQLAlchemy reflection."""
+    engine = create_engine(database_url)
+    if engine.dialect.name != "postgresql":
+        pytest.skip("DATABASE_URL is not a PostgreSQL database")
+
+    _assert_matches_inspector(
+        PostgresSchemaExtractor(engine, config).extract(),
+        SchemaExtractor(engine, config).extract(),
+    )
+
+
+def test_mysql_extractor_matches_inspector(database_url, config):
+    """Bulk information_schema extraction agrees with SQLAlchemy reflection."""
+    engine = create_engine(database_url)
+    if engine.dialect.name not in ("mysql", "mariadb"):
+        pytest.skip("DATABASE_URL is not a MySQL/MariaDB database")
+
+    _assert_matches_inspector(
+        MySQLSchemaExtractor(engine, config).extract(),
+        SchemaExtractor(engine, config).extract(),
+    )
+
+
+@pytest.mark.parametrize(
+    "column_type, reflected",
+    [
+        ("varchar(64)", "VARCHAR(64)"),
+        ("int(11) unsigned", "INTEGER"),
+        ("decimal(10,2)", "DECIMAL(10, 2)"),
+        ("tinyint(1)", "TINYINT"),
+        ("enum('a','b')", "ENUM"),
+    ],
+)
+def test_mysql_column_types_are_spelled_like_reflection(column_type, reflected):
+    """information_schema COLUMN_TYPE is rendered the way inspector reflection is."""
+    engine = create_mock_engine("mysql+pymysql://", lambda *args, **kwargs: None)
+    assert MySQLSchemaExtractor(engine, {})._resolve_type(column_type) == reflected
+
+
+def test_sqlite_extractor_matches_inspector(make_sqlite_engine, config):
+    """Pragma-based SQLite extraction matches SQLAlchemy reflection exactly."""
+    engine = make_sqlite_engine(50)
+    counter = _count_round_trips(engine)
+
+    native = SQLiteSchemaExtractor(engine, config).extract()
+    native_queries = counter["queries"]
+
+    assert native == SchemaExtractor(engine, config).extract()
+    assert native_queries == 4
+
+
+@pytest.mark.filterwarnings("ignore:Skipped unsupported reflection")
+def test_sqlite_extractor_matches_inspector_on_loose_ddl(tmp_path, config):
+    """Affinity-only types, expression indexes and unordered CHECKs agree too."""
+    engine = create_engine(f"sqlite:///{tmp_path / 'loose.db'}")
+    statements = [
+        "CREATE TABLE parent (id INTEGER PRIMARY KEY, code VARCHAR(20) UNIQUE)",
+        """CREATE TABLE loose (
+            id INT PRIMARY KEY, untyped, amount DECIMAL(10, 2), label STRING,
+            txt CHARACTER VARYING(30), dbl DOUBLE PRECISION, ti TINYINT,
+            cl CLOB, parent_id INTEGER REFERENCES parent,
+            CONSTRAINT positive CHECK (amount > 0),
+            CHECK (dbl >= 0),
+            CONSTRAINT "b check" CHECK (ti <> 1),
+            CONSTRAINT uq_label UNIQUE (label, txt)
+        )""",
+        """CREATE TABLE generated (
+            k TEXT PRIMARY KEY, a INTEGER DEFAULT 3,
+            g INTEGER GENERATED ALWAYS AS (a + 1) VIRTUAL,
+            "quoted col" varchar(9) NOT NULL DEFAULT 'x', UNIQUE ("quoted col")
+        )""",
+        "CREATE INDEX ix_expr ON loose (lower(label), amount)",
+        "CREATE INDEX ix_plain ON loose (txt)",
+        "CREATE UNIQUE INDEX ux_loose ON loose (cl, ti)",
+    ]
+    with engine.begin() as conn:
+        for statement in statements:
+            conn.exec_driver_sql(statement)
+
+    native = SQLiteSchemaExtractor(engine, config).extract()
+
+    assert native == SchemaExtractor(engine, config).extract()
+    assert native["loose"]["columns"][1]["type"] == "NULL"
+    assert [i["name"] for i in native["loose"]["indices"]] == ["ix_plain", "ux_loose"]
+
+
+def test_sqlite_extractor_falls_back_without_dialect_hooks(
+    make_sqlite_engine, config, monkeypatch, caplog
+):
+    """A SQLAlchemy without the private type resolver gets plain reflection."""
+    engine = make_sqlite_engine(5)
+    monkeypatch.setattr(sqlite_schema_extractor, "_has_type_resolver", lambda d: False)
+
+    native = SQLiteSchemaExtractor(engine, config).extract()
+
+    assert native == SchemaExtractor(engine, config).extract()
+    assert "falling back to inspector reflection" in caplog.text
+
+
+def test_parallel_extraction_is_deterministic(make_sqlite_engine, config):
+    """Parallel batches merge into the same ordered dict as a sequential run."""
+    engine = make_sqlite_engine(50)
+
+    sequential = SchemaExtractor(engine, config).extract()
+
+    config["schema"]["max_connections"] = 4
+    config["schema"]["table_batch_size"] = 7
+    parallel = SchemaExtractor(engine, config).extract()
+
+    assert parallel == sequential
+    assert list(parallel.keys()) == list(sequential.keys())
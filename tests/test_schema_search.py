@@ -0,0 +1,458 @@
+import asyncio
+import copy
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+from sqlalchemy import create_engine, text
+
+import schema_search.schema_search as schema_search_module
+from schema_search import SchemaSearch
+from schema_search.rankers.cross_encoder import CrossEncoderRanker
+from schema_search.utils.lru_cache import LRUCache
+from tests.conftest import create_synthetic_catalog
+
+
+@pytest.fixture
+def engine(make_sqlite_engine):
+    return make_sqlite_engine(30)
+
+
+def test_unchanged_fingerprint_skips_extraction(engine, config_path, monkeypatch):
+    """A matching catalog fingerprint reuses metadata.json without extracting."""
+    SchemaSearch(engine, config_path=config_path).index()
+
+    search = SchemaSearch(engine, config_path=config_path)
+
+    def _fail():
+        raise AssertionError("extract() should not run for an unchanged catalog")
+
+    monkeypatch.setattr(search.schema_extractor, "extract", _fail)
+    stats = search.index()
+
+    assert stats["tables"] == 30
+    assert len(search.chunks) > 0
+
+
+def test_changed_fingerprint_reextracts(engine, config_path):
+    """DDL changes move the fingerprint and the new table gets indexed."""
+    search = SchemaSearch(engine, config_path=config_path)
+    search.index()
+
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE refunds (id INTEGER PRIMARY KEY)"))
+
+    stats = search.index()
+
+    assert stats["tables"] == 31
+    assert "refunds" in search.schemas
+
+
+def test_incremental_reindex_touches_only_changed_tables(engine, config_path):
+    """One changed, one added and one dropped table are patched in place."""
+    search = SchemaSearch(engine, config_path=config_path)
+    search.index()
+    search.search("entity", search_type="bm25")
+
+    with engine.begin() as conn:
+        conn.execute(text("ALTER TABLE entity_3 ADD COLUMN refund_amount INTEGER"))
+        conn.execute(
+            text(
+                "CREATE TABLE refunds (id INTEGER PRIMARY KEY, "
+                "entity_id INTEGER REFERENCES entity_3(id))"
+            )
+        )
+        conn.execute(text("DROP TABLE entity_29"))
+
+    chunked = []
+    chunk_schemas = search.chunker.chunk_schemas
+
+    def _spy(schemas):
+        chunked.extend(schemas)
+        return chunk_schemas(schemas)
+
+    search.chunker.chunk_schemas = _spy
+    search.index()
+
+    assert sorted(chunked) == ["entity_3", "refunds"]
+    assert "entity_29" not in search.schemas
+    assert [c.chunk_id for c in search.chunks] == list(range(len(search.chunks)))
+    assert "refunds" in search.graph_builder.get_neighbors("entity_3", 1)
+    assert "entity_29" not in search.graph_builder.get_neighbors("entity_14", 1)
+
+    response = search.search("refund amount", search_type="bm25", limit=3)
+    assert response.results[0]["table"] in ("entity_3", "refunds")
+
+    fresh = SchemaSearch(engine, config_path=config_path)
+    fresh.index()
+    assert [c.content for c in fresh.chunks] == [c.content for c in search.chunks]
+
+
+def test_same_named_sqlite_files_get_separate_caches(tmp_path, config_path):
+    """Cache dirs are keyed on the resolved path, not just the file name."""
+    engines = []
+    for directory, num_tables in (("a", 3), ("b", 5)):
+        (tmp_path / directory).mkdir()
+        engine = create_engine(f"sqlite:///{tmp_path / directory / 'app.db'}")
+        create_synthetic_catalog(engine, num_tables)
+        engines.append(engine)
+
+    first, second = (SchemaSearch(e, config_path=config_path) for e in engines)
+    assert first.cache_dir != second.cache_dir
+    assert first.cache_dir.name.startswith("app.db-")
+    assert first.index()["tables"] == 3
+    assert second.index()["tables"] == 5
+
+    same_file = create_engine(f"sqlite:///{tmp_path / 'b' / '..' / 'a' / 'app.db'}")
+    assert SchemaSearch(same_file, config_path=config_path).cache_dir == (
+        first.cache_dir
+    )
+
+
+def test_repeated_search_is_served_from_result_cache(engine, config_path):
+    """Identical searches hit the cache until a reindex changes the schema."""
+    search = SchemaSearch(engine, config_path=config_path)
+    search.index()
+
+    first = search.search("entity  parent", search_type="bm25")
+    strategy = search._get_search_strategy("bm25")
+    calls = []
+    original = strategy.search_many
+
+    def _counting_search(*args, **kwargs):
+        calls.append(1)
+        return original(*args, **kwargs)
+
+    strategy.search_many = _counting_search
+
+    second = search.search(" entity parent ", search_type="bm25")
+    assert calls == []
+    assert [r["table"] for r in second.results] == [r["table"] for r in first.results]
+    assert search.result_cache.stats()["hits"] == 1
+
+    search.search("entity parent", search_type="bm25", limit=2)
+    assert calls == [1]
+
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE entity_parent (id INTEGER PRIMARY KEY)"))
+    search.index()
+
+    assert len(search.result_cache) == 0
+    search.search("entity parent", search_type="bm25")
+    assert calls == [1, 1]
+
+
+def test_callers_cannot_modify_cached_results(engine, config_path):
+    """Editing a returned result leaves cache hits and the schemas untouched."""
+    search = SchemaSearch(engine, config_path=config_path)
+    search.index()
+
+    first = search.search("entity parent", search_type="bm25")
+    expected = copy.deepcopy(first.results)
+    table_name = first.results[0]["table"]
+    first.results[0]["related_tables"].append("bogus")
+    first.results[0]["schema"]["columns"].clear()
+    first.results.pop()
+
+    second = search.search("entity parent", search_type="bm25")
+    assert search.result_cache.stats()["hits"] == 1
+    assert second.results == expected
+    assert search.schemas[table_name]["columns"]
+
+    async def _coalesced():
+        return await asyncio.gather(
+            search.asearch("entity code", search_type="bm25"),
+            search.asearch("entity code", search_type="bm25"),
+        )
+
+    one, other = asyncio.run(_coalesced())
+    one.results[0]["matched_chunks"].clear()
+    assert other.results[0]["matched_chunks"]
+
+
+class OverlapCrossEncoder:
+    """CrossEncoder stand-in scoring pairs by shared words; counts predict calls."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def predict(self, pairs, show_progress_bar=False):
+        self.calls += 1
+        return np.array(
+            [len(set(q.split()) & set(doc.split())) for q, doc in pairs],
+            dtype=np.float32,
+        )
+
+
+@pytest.mark.parametrize("search_type", ["semantic", "bm25", "hybrid"])
+def test_search_many_matches_individual_searches(
+    make_sqlite_engine, config_path, encoder, search_type
+):
+    """Batched results equal one search() per query, with a single rerank call."""
+    search = SchemaSearch(make_sqlite_engine(60), config_path=config_path)
+    search.index()
+    search.embedding_cache.model = encoder
+    queries = [f"entity_{i} parent name code" for i in range(0, 60, 3)]
+    queries.append(queries[0])
+    search.search("warm up", search_type=search_type)
+
+    def _timed(run):
+        timings = []
+        for _ in range(3):
+            search.result_cache.clear()
+            search.embedding_cache.query_cache.clear()
+            start = time.perf_counter()
+            responses = run()
+            timings.append(time.perf_counter() - start)
+        return responses, min(timings)
+
+    batched, batch_sec = _timed(
+        lambda: search.search_many(queries, search_type=search_type, limit=5)
+    )
+    single, single_sec = _timed(
+        lambda: [search.search(q, search_type=search_type, limit=5) for q in queries]
+    )
+
+    print(
+        f"\n{search_type}: {len(queries)} queries, search_many {batch_sec:.3f}s, "
+        f"search loop {single_sec:.3f}s"
+    )
+    assert len(batched) == len(queries)
+    for many, one in zip(batched, single):
+        assert [r["table"] for r in many.results] == [r["table"] for r in one.results]
+        assert [r["score"] for r in many.results] == pytest.approx(
+            [r["score"] for r in one.results], abs=1e-5
+        )
+
+    cross_encoder = OverlapCrossEncoder()
+    search._reranker = CrossEncoderRanker("overlap")
+    search._reranker.model = cross_encoder
+    search._search_strategies.clear()
+    search.result_cache.clear()
+
+    reranked = search.search_many(queries[:10], search_type=search_type, limit=3)
+    assert cross_encoder.calls == 1
+    search.result_cache.clear()
+    for query, response in zip(queries[:10], reranked):
+        expected = search.search(query, search_type=search_type, limit=3)
+        assert [r["table"] for r in response.results] == [
+            r["table"] for r in expected.results
+        ]
+
+
+def test_asearch_coalesces_identical_inflight_queries(engine, config_path):
+    """Concurrent identical asearch calls share one run; aindex runs exclusively."""
+    search = SchemaSearch(engine, config_path=config_path)
+    asyncio.run(search.aindex())
+
+    strategy = search._get_search_strategy("bm25")
+    calls = []
+    original = strategy.search_many
+
+    def _slow_search(queries, *args, **kwargs):
+        calls.append(list(queries))
+        time.sleep(0.2)
+        return original(queries, *args, **kwargs)
+
+    strategy.search_many = _slow_search
+
+    async def _run():
+        return await asyncio.gather(
+            *[search.asearch("entity parent", search_type="bm25") for _ in range(5)],
+            search.asearch("entity code", search_type="bm25"),
+        )
+
+    responses = asyncio.run(_run())
+
+    assert sorted(calls) == [["entity code"], ["entity parent"]]
+    assert len({id(response) for response in responses}) == len(responses)
+    expected = search.search("entity parent", search_type="bm25")
+    for response in responses[:5]:
+        assert [r["table"] for r in response.results] == [
+            r["table"] for r in expected.results
+        ]
+
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE entity_parent (id INTEGER PRIMARY KEY)"))
+
+    async def _reindex_while_searching():
+        return await asyncio.gather(
+            search.aindex(),
+            search.aindex(),
+            search.asearch("entity parent", search_type="bm25", limit=50),
+        )
+
+    first, second, _ = asyncio.run(_reindex_while_searching())
+    assert first["tables"] == second["tables"] == 31
+
+
+def test_cancelled_caller_leaves_coalesced_search_running(engine, config_path):
+    """One coalesced caller giving up does not cancel the others' search."""
+    executor = ThreadPoolExecutor(max_workers=1)
+    search = SchemaSearch(engine, config_path=config_path, executor=executor)
+    search.index()
+    release = threading.Event()
+    # Occupy the only worker so the shared search is still queued when cancelled
+    executor.submit(release.wait)
+
+    async def _cancel_one():
+        first = asyncio.ensure_future(search.asearch("entity parent"))
+        second = asyncio.ensure_future(search.asearch("entity parent"))
+        await asyncio.sleep(0.05)
+        first.cancel()
+        await asyncio.sleep(0.05)
+        release.set()
+        return first, await second
+
+    first, response = asyncio.run(_cancel_one())
+
+    assert first.cancelled()
+    assert response.results
+    # The caller's executor outlives close(); an owned pool does not
+    search.close()
+    assert executor.submit(lambda: 1).result() == 1
+    executor.shutdown()
+
+    owned = SchemaSearch(engine, config_path=config_path)
+    asyncio.run(owned.aindex())
+    pool = owned._executor
+    owned.close()
+    with pytest.raises(RuntimeError):
+        pool.submit(lambda: 1)
+
+
+def _uncached_hybrid_search(make_sqlite_engine, config_path, encoder):
+    search = SchemaSearch(make_sqlite_engine(60), config_path=config_path)
+    search.index()
+    search.result_cache = LRUCache(maxsize=0)
+    search.embedding_cache.model = encoder
+
+    def _search(query):
+        response = search.search(query, search_type="hybrid")
+        return [r["table"] for r in response.results]
+
+    return search, _search
+
+
+def test_concurrent_searches_initialize_once_and_agree(
+    make_sqlite_engine, config_path, encoder, monkeypatch
+):
+    """Threads racing on first use build each lazy component exactly once.
+
+    Afterwards concurrent searches return exactly what serial ones do.
+    """
+    search, _search = _uncached_hybrid_search(make_sqlite_engine, config_path, encoder)
+    cache = search.embedding_cache
+    bm25_cache = search._get_bm25_cache()
+
+    counts = {"embeddings": 0, "bm25": 0, "strategy": 0}
+
+    def _counting(name, fn):
+        def _wrapper(*args, **kwargs):
+            counts[name] += 1
+            time.sleep(0.05)
+            return fn(*args, **kwargs)
+
+        return _wrapper
+
+    cache.load_or_generate = _counting("embeddings", cache.load_or_generate)
+    bm25_cache.load_or_build = _counting("bm25", bm25_cache.load_or_build)
+    monkeypatch.setattr(
+        schema_search_module,
+        "create_search_strategy",
+        _counting("strategy", schema_search_module.create_search_strategy),
+    )
+
+    queries = [f"entity_{i % 60} parent name" for i in range(120)]
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(_search, queries[:8]))
+    assert counts == {"embeddings": 1, "bm25": 1, "strategy": 1}
+
+    cache.query_cache = LRUCache(maxsize=0)
+    serial = [_search(query) for query in queries]
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        assert list(pool.map(_search, queries)) == serial
+
+
+def test_concurrent_search_throughput_benchmark(
+    make_sqlite_engine, config_path, encoder
+):
+    """Searches overlap while model inference releases the GIL.
+
+    Ratios depend on the machine, so only "threads are not slower than one"
+    is asserted.
+    """
+    search, _search = _uncached_hybrid_search(make_sqlite_engine, config_path, encoder)
+    queries = [f"entity_{i % 60} parent name" for i in range(120)]
+    _search("warm up")
+    # Every search now runs the model, which releases the GIL during
+    # inference like a real SentenceTransformer does
+    search.embedding_cache.query_cache = LRUCache(maxsize=0)
+    search.embedding_cache.model = InferenceLatencyEncoder(encoder, latency_sec=0.005)
+
+    start = time.perf_counter()
+    for query in queries:
+        _search(query)
+    serial_qps = len(queries) / (time.perf_counter() - start)
+
+    for workers in (4, 8):
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            list(pool.map(_search, queries))
+        qps = len(queries) / (time.perf_counter() - start)
+        print(f"\n{workers} threads: {qps:.0f} q/s (serial {serial_qps:.0f} q/s)")
+        assert qps >= serial_qps
+
+
+class InferenceLatencyEncoder:
+    """Wraps an encoder and sleeps per call, standing in for model inference."""
+
+    def __init__(self, encoder, latency_sec):
+        self.encoder = encoder
+        self.latency_sec = latency_sec
+
+    def encode(self, texts, **kwargs):
+        time.sleep(self.latency_sec)
+        return self.encoder.encode(texts, **kwargs)
+
+
+def test_lru_cache_survives_concurrent_reads_and_evictions():
+    """Lock-free reads racing puts and evictions never raise or return junk."""
+    cache = LRUCache(maxsize=64)
+
+    def _hammer(seed):
+        rng = np.random.default_rng(seed)
+        for key in rng.integers(0, 256, size=20_000).tolist():
+            value = cache.get(key)
+            if value is None:
+                cache.put(key, key * 2)
+            else:
+                assert value == key * 2
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(_hammer, range(8)))
+    assert len(cache) <= 64
+
+
+def test_graph_expansion_runs_only_for_returned_results(engine, config_path):
+    """Candidates stay lightweight until the final `limit` results are built."""
+    search = SchemaSearch(engine, config_path=config_path)
+    search.index()
+    search._reranker = CrossEncoderRanker("overlap")
+    search._reranker.model = OverlapCrossEncoder()
+
+    expanded = []
+    get_neighbors = search.graph_builder.get_neighbors
+
+    def _spy(table_name, hops):
+        expanded.append(table_name)
+        return get_neighbors(table_name, hops)
+
+    search.graph_builder.get_neighbors = _spy
+    response = search.search("entity parent name", search_type="bm25", limit=3)
+
+    assert [r["table"] for r in response.results] == expanded
+    assert len(expanded) == 3
+    assert all(r["matched_chunks"] for r in response.results)
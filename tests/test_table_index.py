@@ -0,0 +1,220 @@
+import time
+from collections import defaultdict
+
+import numpy as np
+import pytest
+import yaml
+
+from schema_search import SchemaSearch
+from schema_search.chunkers import Chunk
+from schema_search.graph_builder import GraphBuilder
+from schema_search.rankers.base import BaseRanker
+from schema_search.search.base import (
+    MAX_POOL_CHUNKS_PER_TABLE,
+    BaseSearchStrategy,
+    Candidate,
+)
+from schema_search.search.table_index import TableIndex, pool_scores
+
+
+def _naive_pool(table_ids, scores, method):
+    by_table = defaultdict(list)
+    for table_id, score in zip(table_ids.tolist(), scores.tolist()):
+        by_table[table_id].append(score)
+    pooled = {}
+    for table_id, table_scores in by_table.items():
+        table_scores.sort(reverse=True)
+        if method == "max":
+            pooled[table_id] = table_scores[0]
+        elif method == "sum":
+            pooled[table_id] = sum(table_scores)
+        else:
+            pooled[table_id] = sum(table_scores[:2]) / len(table_scores[:2])
+    return pooled
+
+
+@pytest.mark.parametrize("grouped", [False, True])
+@pytest.mark.parametrize("method", ["max", "sum", "top2_mean"])
+def test_pool_scores_matches_per_table_loop(method, grouped):
+    """Vectorized pooling agrees with a dict-of-lists loop; best chunk is the max."""
+    rng = np.random.default_rng(0)
+    table_ids = rng.integers(0, 500, size=5000).astype(np.int32)
+    if grouped:
+        table_ids.sort()
+    scores = rng.standard_normal(5000).astype(np.float32)
+
+    tables, pooled, best = pool_scores(table_ids, scores, method)
+    expected = _naive_pool(table_ids, scores, method)
+
+    assert sorted(tables.tolist()) == sorted(expected)
+    assert pooled == pytest.approx(
+        [expected[t] for t in tables.tolist()], rel=1e-5, abs=1e-5
+    )
+    assert (table_ids[best] == tables).all()
+    for table_id, position in zip(tables.tolist(), best.tolist()):
+        assert scores[position] == scores[table_ids == table_id].max()
+
+
+def test_aggregation_deduplicates_multi_chunk_tables(
+    make_sqlite_engine, config, tmp_path, encoder
+):
+    """Split tables come back once, scored by their best chunk under max."""
+    config["chunking"]["max_tokens"] = 12
+    config["chunking"]["overlap_tokens"] = 0
+    engine = make_sqlite_engine(40)
+
+    def _search(aggregation):
+        config["search"]["table_aggregation"] = aggregation
+        path = tmp_path / f"config_{aggregation}.yml"
+        with open(path, "w") as f:
+            yaml.safe_dump(config, f)
+        search = SchemaSearch(engine, config_path=str(path))
+        search.index()
+        search.embedding_cache.model = encoder
+        return search
+
+    chunked = _search("none")
+    assert chunked.table_index.max_chunks_per_table > 1
+    pooled = _search("max")
+
+    for search_type in ("semantic", "bm25", "hybrid"):
+        chunk_hits = chunked.search(
+            "entity parent name code", search_type=search_type, limit=20
+        ).results
+        table_hits = pooled.search(
+            "entity parent name code", search_type=search_type, limit=20
+        ).results
+
+        tables = [r["table"] for r in table_hits]
+        assert len(tables) == len(set(tables)) == 20
+        best_chunk_score = {}
+        for r in chunk_hits:
+            best_chunk_score.setdefault(r["table"], r["score"])
+        for r in table_hits:
+            if r["table"] in best_chunk_score:
+                assert r["score"] == pytest.approx(best_chunk_score[r["table"]])
+
+
+def test_pooling_benchmark():
+    """Pooling a full catalog's chunk scores, in scan order and shuffled."""
+    rng = np.random.default_rng(1)
+    num_chunks = 1_000_000
+    table_ids = np.sort(rng.integers(0, 200_000, size=num_chunks)).astype(np.int32)
+    scores = rng.random(num_chunks, dtype=np.float32)
+
+    shuffle = rng.permutation(num_chunks)
+
+    for method in ("max", "sum", "top2_mean"):
+        start = time.perf_counter()
+        tables, pooled, _ = pool_scores(table_ids, scores, method)
+        grouped_sec = time.perf_counter() - start
+
+        start = time.perf_counter()
+        shuffled = pool_scores(table_ids[shuffle], scores[shuffle], method)
+        shuffled_sec = time.perf_counter() - start
+
+        print(
+            f"\n{method}: pooled {num_chunks} chunks into {len(tables)} tables "
+            f"in {grouped_sec * 1000:.1f} ms grouped, "
+            f"{shuffled_sec * 1000:.1f} ms shuffled"
+        )
+        assert (shuffled[0] == tables).all()
+        assert shuffled[1] == pytest.approx(pooled, rel=1e-4, abs=1e-4)
+
+
+class RecordingRanker(BaseRanker):
+    """Keeps each chunk it is asked to rank; scores them in reverse order."""
+
+    def __init__(self):
+        super().__init__()
+        self.ranked = []
+
+    def build(self, chunks):
+        self.chunks = chunks
+        self.ranked.append([chunk.content for chunk in chunks])
+
+    def rank(self, query):
+        return [(i, float(i)) for i in reversed(range(len(self.chunks)))]
+
+
+class FixedStrategy(BaseSearchStrategy):
+    def __init__(self, candidates, reranker):
+        super().__init__(reranker, initial_top_k=10, rerank_top_k=10)
+        self.candidates = candidates
+
+    def _initial_ranking(self, query, schemas, chunks, table_index):
+        return self.candidates
+
+
+def _chunks(num_tables, chunks_per_table):
+    return [
+        Chunk(f"t{t}", f"t{t} part {c}", c, 4)
+        for t in range(num_tables)
+        for c in range(chunks_per_table)
+    ]
+
+
+def test_pool_size_caps_chunks_per_table():
+    """One very wide table does not multiply every pooled query's retrieval."""
+    wide = [Chunk("wide", f"wide part {c}", c, 4) for c in range(100)]
+    table_index = TableIndex(_chunks(5, 1) + wide)
+    strategy = FixedStrategy([], None)
+    assert strategy._chunk_pool_size(table_index) == 10
+
+    strategy.aggregation = "max"
+    assert strategy._chunk_pool_size(table_index) == 10 * MAX_POOL_CHUNKS_PER_TABLE
+
+
+def test_rerank_scores_the_matched_chunk(tmp_path):
+    """Reranking sees the chunk each candidate matched, not the table's first."""
+    chunks = _chunks(4, 3)
+    table_index = TableIndex(chunks)
+    assert table_index.table_chunks["t2"] == [6, 7, 8]
+
+    ranker = RecordingRanker()
+    strategy = FixedStrategy(
+        [Candidate("t2", 0.9, 8), Candidate("t0", 0.5, 1), Candidate("t3", 0.4)],
+        ranker,
+    )
+    schemas = {f"t{t}": {"name": f"t{t}"} for t in range(4)}
+    graph_builder = GraphBuilder(tmp_path)
+    graph_builder.build({}, force=True)
+
+    results = strategy.search(
+        "query", schemas, chunks, table_index, graph_builder, hops=0, limit=3
+    )
+
+    assert ranker.ranked == [["t2 part 2", "t0 part 1", "t3 part 0"]]
+    assert [r["table"] for r in results] == ["t3", "t0", "t2"]
+    assert [r["matched_chunks"] for r in results] == [
+        ["t3 part 0"],
+        ["t0 part 1"],
+        ["t2 part 2"],
+    ]
+
+
+def test_rerank_chunk_lookup_benchmark():
+    """Chunk lookup for a query's candidates, scanning chunks vs the index."""
+    chunks = _chunks(50_000, 4)
+    table_index = TableIndex(chunks)
+    rng = np.random.default_rng(2)
+    tables = [f"t{t}" for t in rng.integers(0, 50_000, size=50).tolist()]
+
+    start = time.perf_counter()
+    scanned = []
+    for table_name in tables:
+        for position, chunk in enumerate(chunks):
+            if chunk.table_name == table_name:
+                scanned.append(position)
+                break
+    scan_sec = time.perf_counter() - start
+
+    start = time.perf_counter()
+    indexed = [table_index.table_chunks[table_name][0] for table_name in tables]
+    index_sec = time.perf_counter() - start
+
+    print(
+        f"\n{len(chunks)} chunks, {len(tables)} candidates: "
+        f"scan {scan_sec * 1000:.1f} ms, index {index_sec * 1000:.3f} ms"
+    )
+    assert indexed == scanned
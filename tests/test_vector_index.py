@@ -0,0 +1,75 @@
+import time
+
+import numpy as np
+
+from schema_search.chunkers import Chunk
+from schema_search.embedding_cache import create_embedding_cache
+from schema_search.vector_index import IVFIndex
+
+
+def _chunks(num_chunks):
+    return [
+        Chunk(table_name=f"t{i}", content=f"Table: t{i}", chunk_id=i, token_count=1)
+        for i in range(num_chunks)
+    ]
+
+
+def _clustered(num_rows, dim, num_clusters, seed=0):
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((num_clusters, dim)).astype(np.float32)
+    rows = centers[rng.integers(0, num_clusters, num_rows)]
+    rows += rng.standard_normal(rows.shape).astype(np.float32) * 1.5
+    return rows / np.linalg.norm(rows, axis=1, keepdims=True)
+
+
+def test_ivf_index_persists_with_embeddings(config, tmp_path, encoder):
+    """A warm start loads the saved IVF lists instead of re-clustering."""
+    config["embedding"]["index"] = "ivf"
+    chunks = _chunks(500)
+
+    cache = create_embedding_cache(config, tmp_path / "db")
+    cache.model = encoder
+    cache.load_or_generate(chunks, False, config["chunking"])
+
+    reloaded = create_embedding_cache(config, tmp_path / "db")
+    reloaded.model = encoder
+    reloaded.load_or_generate(chunks, False, config["chunking"])
+
+    assert reloaded.approximate
+    np.testing.assert_array_equal(reloaded.index.order, cache.index.order)
+
+    query = encoder.encode(["Table: t42"])
+    indices, scores = reloaded.top_k(query, 5)
+    assert indices[0] == 42
+    assert np.all(np.diff(scores) <= 0)
+
+
+def test_ivf_recall_benchmark():
+    """Report IVF recall@20 and latency against a flat scan across nprobe."""
+    num_rows, dim, num_queries, top_k = 100000, 384, 50, 20
+    embeddings = _clustered(num_rows, dim, num_clusters=1000)
+    queries = _clustered(num_queries, dim, num_clusters=1000)
+
+    start = time.time()
+    exact = [set(np.argsort(embeddings @ q)[::-1][:top_k]) for q in queries]
+    flat_ms = (time.time() - start) / num_queries * 1000
+
+    index = IVFIndex(metric="cosine", nlist=None, nprobe=1)
+    start = time.time()
+    index.build(embeddings)
+    print(f"\nIVF build: {time.time() - start:.2f}s for {num_rows} x {dim}")
+    print(f"Flat: {flat_ms:.2f} ms/query")
+
+    for nprobe in (1, 4, 8, 16):
+        index.nprobe = nprobe
+        start = time.time()
+        found = []
+        for q in queries:
+            candidates = index.candidates(q, top_k)
+            scores = embeddings[candidates] @ q
+            found.append(set(candidates[np.argsort(scores)[::-1][:top_k]]))
+        query_ms = (time.time() - start) / num_queries * 1000
+        recall = np.mean([len(a & b) / top_k for a, b in zip(found, exact)])
+        print(f"nprobe={nprobe:<3} recall@{top_k} {recall:.3f} | {query_ms:.2f} ms/query")
+
+    assert recall >= 0.9